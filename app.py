@@ -10,19 +10,35 @@ from models import db
 from resources.user import LoginResource
 from resources.user import SignupResource
 from resources.user import UserListResource, RecruiterStatsResource
-from resources.assessments import AssessmentResource
+from resources.assessments import AssessmentResource, AssessmentGradeResource, AssessmentExportResource, AssessmentCodewarsSyncResource
 from resources.Questions import QuestionDetailResource,QuestionsListResource
 from resources.results import IntervieweeResultsResource, ResultReleaseResource,ResultCreateOrUpdateResource,IntervieweeRankingResource
 
-from resources.feedback import FeedbackResource
+from resources.feedback import FeedbackResource, SubmissionFeedbackResource
 from resources.profile import ProfileResource
 from resources.Submission import SubmissionListResource
-from resources.notification import NotificationListResource,NotificationReadResource
+from resources.notification import NotificationListResource,NotificationReadResource,NotificationStreamResource,NotificationStreamTokenResource
 
 
 #from resources.profile import IntervieewProfileResource
 from resources.Submission import SubmissionListResource,SubmissionDetailResource
-from resources.invites import InviteListResource, InviteResource, InviteAcceptanceResource
+from resources.invites import InviteListResource, InviteResource, InviteAcceptanceResource, InviteDeliveryResource, InviteBulkResource
+from resources.metrics import MetricsResource
+from resources.jobs import JobResource
+from utils.mail_outbox import deliver_mail_command, start_outbox_worker
+from utils.background import start_on_first_request
+from utils.invite_sweeper import start_invite_sweeper, sweep_invites_command
+from utils.notification import init_notifications
+from utils.instrumentation import init_instrumentation
+from utils.notification_stream import init_notification_stream
+from utils.query_plans import check_query_plans_command
+from utils.assessment_stats import rebuild_assessment_stats_command
+from utils.serializers import output_json
+from utils.passwords import init_passwords
+from utils.database import configure_database, init_database
+from utils.sandbox import init_sandbox
+from utils.codewars import codewars_sync_command
+from utils.auth import scoped_token_allowed
 
 
 
@@ -32,13 +48,30 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 api = Api(app)
+api.representations["application/json"] = output_json
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("SQLALCHEMY_DATABASE_URI")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# 🗄 Pool sizing, SQLite WAL pragmas and the optional read replica (SQLALCHEMY_REPLICA_URI)
+configure_database(app)
 app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False
-app.config["SQLALCHEMY_ECHO"] = True
+# Only the notification stream reads ?jwt=, and only short-lived stream tokens (see utils/auth.py)
+app.config["JWT_TOKEN_LOCATION"] = ["headers"]
+# Lets flask-restful hand JWT errors to flask-jwt-extended's handlers (401/422, not 500)
+app.config["PROPAGATE_EXCEPTIONS"] = True
+app.config["NOTIFICATION_STREAM_TOKEN_TTL"] = int(os.getenv("NOTIFICATION_STREAM_TOKEN_TTL", 60))
+# 🔏 Invite links are HMAC-signed; without a secret one is derived from JWT_SECRET_KEY
+app.config["INVITE_TOKEN_SECRET"] = os.getenv("INVITE_TOKEN_SECRET")
+# Random tokens from before signing keep working until this is switched off
+app.config["INVITE_LEGACY_TOKENS"] = os.getenv("INVITE_LEGACY_TOKENS", "true").lower() == "true"
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Statement logging is for local debugging; /metrics carries the aggregate picture
+app.config["SQLALCHEMY_ECHO"] = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"
+app.config["SLOW_REQUEST_MS"] = int(os.getenv("SLOW_REQUEST_MS", 500))
+app.config["N_PLUS_ONE_THRESHOLD"] = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
 # Initialize Flask-Mail
 app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER", "smtp.gmail.com")
 app.config["MAIL_PORT"] = 587
@@ -54,16 +87,64 @@ app.config["MAIL_USE_TLS"] = True
 app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
 app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
 app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER")
+app.config["MAIL_OUTBOX_INTERVAL"] = int(os.getenv("MAIL_OUTBOX_INTERVAL", 5))
+app.config["MAIL_OUTBOX_BATCH_SIZE"] = int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", 50))
+app.config["SYNC_DELETE_LIMIT"] = int(os.getenv("SYNC_DELETE_LIMIT", 5000))
+app.config["JOB_WORKERS"] = int(os.getenv("JOB_WORKERS", 2))
+# 🧪 Codekata sandbox: warm runner processes and per-run limits
+app.config["SANDBOX_WORKERS"] = int(os.getenv("SANDBOX_WORKERS", 2))
+app.config["SANDBOX_CPU_SECONDS"] = int(os.getenv("SANDBOX_CPU_SECONDS", 2))
+app.config["SANDBOX_MEMORY_MB"] = int(os.getenv("SANDBOX_MEMORY_MB", 256))
+app.config["SANDBOX_WALL_SECONDS"] = int(os.getenv("SANDBOX_WALL_SECONDS", 5))
+# 🥋 Codewars completion sync; point CODEWARS_API_URL at a stand-in server for local runs
+app.config["CODEWARS_API_URL"] = os.getenv("CODEWARS_API_URL", "https://www.codewars.com/api/v1")
+app.config["CODEWARS_CONCURRENCY"] = int(os.getenv("CODEWARS_CONCURRENCY", 8))
+app.config["CODEWARS_MAX_RETRIES"] = int(os.getenv("CODEWARS_MAX_RETRIES", 3))
+app.config["CODEWARS_CACHE_DIR"] = os.getenv("CODEWARS_CACHE_DIR", os.path.join(app.instance_path, "codewars-cache"))
+app.config["CODEWARS_KATA_TTL"] = int(os.getenv("CODEWARS_KATA_TTL", 24 * 3600))
+app.config["CODEWARS_COMPLETIONS_TTL"] = int(os.getenv("CODEWARS_COMPLETIONS_TTL", 600))
+app.config["INVITE_SWEEP_INTERVAL"] = int(os.getenv("INVITE_SWEEP_INTERVAL", 300))
+app.config["INVITE_SWEEP_BATCH_SIZE"] = int(os.getenv("INVITE_SWEEP_BATCH_SIZE", 500))
+app.config["INVITE_REMINDER_HOURS"] = int(os.getenv("INVITE_REMINDER_HOURS", 24))
+app.config["NOTIFICATION_BROKER_URL"] = os.getenv("NOTIFICATION_BROKER_URL")
+app.config["NOTIFICATION_STREAM_HEARTBEAT"] = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", 15))
+app.config["NOTIFICATION_STREAM_MAX_AGE"] = int(os.getenv("NOTIFICATION_STREAM_MAX_AGE", 300))
 
 migrate = Migrate(app, db)
 jwt = JWTManager(app)
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+jwt.token_verification_loader(scoped_token_allowed)
+CORS(
+    app,
+    resources={r"/*": {"origins": "*"}},
+    supports_credentials=True,
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Location"],
+)
 mail = Mail(app) # Initialize Flask-Mail
 
 
 
 db.init_app(app)
-
+init_database(app)
+# Registered first so its after_request runs last and sees every statement
+init_instrumentation(app)
+init_notifications(app)
+init_passwords(app)
+init_sandbox(app)
+init_notification_stream(app)
+app.cli.add_command(check_query_plans_command)
+app.cli.add_command(rebuild_assessment_stats_command)
+app.cli.add_command(codewars_sync_command)
+app.cli.add_command(sweep_invites_command)
+app.cli.add_command(deliver_mail_command)
+
+# 📬 Deliver queued emails in the background (one worker thread per serving process,
+# never under CLI commands); `flask deliver-mail` is the standalone alternative
+if os.getenv("MAIL_ENABLED", "true").lower() == "true" and os.getenv("MAIL_OUTBOX_WORKER", "true").lower() == "true":
+    start_on_first_request(app, start_outbox_worker)
+
+# ⏰ Expire overdue invites and send reminders; safe to run in every serving process
+if os.getenv("INVITE_SWEEPER", "true").lower() == "true":
+    start_on_first_request(app, start_invite_sweeper)
 
 
 
@@ -80,11 +161,15 @@ api.add_resource(LoginResource, "/login")
 api.add_resource(SignupResource, "/signup")
 api.add_resource(UserListResource, "/users")
 api.add_resource(AssessmentResource, "/assessments", "/assessments/<int:assessment_id>")
+api.add_resource(AssessmentGradeResource, "/assessments/<int:assessment_id>/grade")
+api.add_resource(AssessmentExportResource, "/assessments/<int:assessment_id>/export")
+api.add_resource(AssessmentCodewarsSyncResource, "/assessments/<int:assessment_id>/codewars-sync")
 api.add_resource(SubmissionListResource, "/submissions")
 api.add_resource(SubmissionDetailResource, "/submissions/<int:submission_id>")
 api.add_resource(QuestionsListResource, "/assessments/<int:assessment_id>/questions")
-api.add_resource(QuestionDetailResource, "/questions/<int:id>")
+api.add_resource(QuestionDetailResource, "/questions/<int:question_id>")
 api.add_resource(FeedbackResource, "/feedback", "/feedback/<int:id>")
+api.add_resource(SubmissionFeedbackResource, "/submissions/<int:submission_id>/feedback")
 
 api.add_resource(ProfileResource, "/profile", "/profile/<id>")
 
@@ -92,12 +177,18 @@ api.add_resource(ProfileResource, "/profile", "/profile/<id>")
 
 
 api.add_resource(InviteListResource, "/invites")
+api.add_resource(InviteBulkResource, "/invites/bulk")
 api.add_resource(InviteResource, "/invites/<int:invite_id>")
+api.add_resource(InviteDeliveryResource, "/invites/<int:invite_id>/delivery")
 api.add_resource(InviteAcceptanceResource, "/invites/accept/<string:token>")
 api.add_resource(IntervieweeResultsResource, "/interviewee/results")
 api.add_resource(ResultReleaseResource, "/results/<int:result_id>/release")
 api.add_resource(ResultCreateOrUpdateResource, "/results")
 api.add_resource(IntervieweeRankingResource, "/interviewee-rankings")
 api.add_resource(NotificationListResource, "/notifications")
+api.add_resource(NotificationStreamResource, "/notifications/stream")
+api.add_resource(NotificationStreamTokenResource, "/notifications/stream-token")
 api.add_resource(NotificationReadResource, "/notifications/<int:notification_id>/read")
 api.add_resource(RecruiterStatsResource, "/stats/recruiter")
+api.add_resource(MetricsResource, "/metrics")
+api.add_resource(JobResource, "/jobs/<int:job_id>")
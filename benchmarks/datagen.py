@@ -0,0 +1,238 @@
+"""Build a seeded SQLite dataset for the endpoint benchmarks.
+
+    python -m benchmarks.datagen --scale large
+    python -m benchmarks.datagen --users 5000 --assessments 200 --submissions 100000
+
+The same scale and seed always produce the same rows, and the database file
+is cached under --data-dir so runs can be compared against each other.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+SCALES = {
+    "small": {"users": 2000, "assessments": 100, "submissions": 20000},
+    "medium": {"users": 10000, "assessments": 500, "submissions": 200000},
+    "large": {"users": 50000, "assessments": 2000, "submissions": 1000000},
+}
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), ".data")
+QUESTIONS_PER_ASSESSMENT = 10
+RECRUITER_SHARE = 20  # one recruiter per 20 users
+INSERT_CHUNK_SIZE = 10000
+# Fixed so that seeded data (timestamps, expiries) does not depend on the day it was built
+EPOCH = datetime(2026, 1, 1)
+PASSWORD = "benchmark"
+
+
+def dataset_path(data_dir, users, assessments, submissions, seed):
+    return os.path.join(data_dir, f"bench-u{users}-a{assessments}-s{submissions}-seed{seed}.db")
+
+
+def load_app(database_path, **config):
+    """Import the app against `database_path`; env must be set before app.py runs."""
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(database_path)}"
+    os.environ["MAIL_OUTBOX_WORKER"] = "false"
+    os.environ["INVITE_SWEEPER"] = "false"
+    os.environ["SQLALCHEMY_ECHO"] = "false"
+    os.environ["JWT_SECRET_KEY"] = "benchmark-only-signing-key-0123456789abcdef"
+    # Background Codewars syncs must never reach the real API
+    os.environ["CODEWARS_API_URL"] = "http://127.0.0.1:9"
+    os.environ["CODEWARS_MAX_RETRIES"] = "0"
+    for key, value in config.items():
+        os.environ[key] = str(value)
+
+    from app import app
+
+    return app
+
+
+def _insert(model, rows):
+    from models import db
+
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(db.insert(model), rows[start : start + INSERT_CHUNK_SIZE])
+
+
+def seed(users, assessments, submissions, seed=42, echo=print):
+    """Populate the current app's database; must run inside an app context."""
+    from models import (
+        db,
+        User,
+        Profile,
+        Assessments,
+        Questions,
+        Submissions,
+        Results,
+        Invites,
+        Notification,
+        Feedback,
+    )
+    from utils.assessment_stats import REBUILD_CHUNK_SIZE, rebuild
+    from utils.passwords import hash_password
+
+    rng = random.Random(seed)
+    recruiters = max(1, users // RECRUITER_SHARE)
+    interviewee_ids = range(recruiters + 1, users + 1)
+    started = time.perf_counter()
+
+    def step(name, model, rows):
+        _insert(model, rows)
+        echo(f"  {name:<14} {len(rows):>9} rows  {time.perf_counter() - started:6.1f}s")
+
+    db.create_all()
+
+    # One hash shared by every user keeps seeding fast at any bcrypt cost
+    password = hash_password(PASSWORD)
+    step("users", User, [
+        {"id": i, "name": f"user{i}", "email": f"user{i}@example.com", "password": password,
+         "role": "recruiter" if i <= recruiters else "interviewee"}
+        for i in range(1, users + 1)
+    ])
+    step("profiles", Profile, [
+        {"user_id": i, "name": f"user{i}", "company": "Acme" if i <= recruiters else None,
+         "skills": "python, sql", "location": "Nairobi"}
+        for i in range(1, users + 1)
+    ])
+
+    creators = {a: rng.randint(1, recruiters) for a in range(1, assessments + 1)}
+    step("assessments", Assessments, [
+        {"id": a, "title": f"Assessment {a}", "creator_id": creators[a], "published": rng.random() < 0.9,
+         "time_limit": rng.choice((30, 45, 60, 90))}
+        for a in range(1, assessments + 1)
+    ])
+
+    questions = []
+    choice_questions = {}
+    for a in range(1, assessments + 1):
+        for n in range(QUESTIONS_PER_ASSESSMENT):
+            qid = len(questions) + 1
+            kind = "codekata" if n == 8 else "codewars" if n == 9 else "multiple_choice"
+            questions.append({
+                "id": qid, "assessment_id": a, "type": kind, "prompt": f"Question {n + 1} of assessment {a}",
+                "options": ["a", "b", "c", "d"] if kind == "multiple_choice" else None,
+                "answer_key": rng.choice("abcd") if kind == "multiple_choice" else "solution",
+                "meta": {"difficulty": rng.randint(1, 5)},
+            })
+            if kind == "multiple_choice":
+                choice_questions.setdefault(a, []).append(qid)
+    step("questions", Questions, questions)
+
+    submission_rows = []
+    result_rows = []
+    for s in range(1, submissions + 1):
+        a = rng.randint(1, assessments)
+        graded = rng.random() < 0.7
+        grade = round(rng.uniform(0, 100), 2) if graded else None
+        submission_rows.append({
+            "id": s, "assessment_id": a, "recruiter_id": creators[a], "user_id": rng.choice(interviewee_ids),
+            "answers": {str(q): rng.choice("abcd") for q in choice_questions.get(a, ())},
+            "submitted_at": EPOCH - timedelta(seconds=rng.randint(0, 180 * 86400)),
+            "grade": grade,
+        })
+        if graded and rng.random() < 0.7:
+            result_rows.append({
+                "submission_id": s, "assessment_id": a, "score": grade,
+                "time_taken": rng.randint(300, 5400), "pass_status": grade >= 50,
+                "is_released": rng.random() < 0.5, "feedback_summary": "",
+            })
+    step("submissions", Submissions, submission_rows)
+    step("results", Results, result_rows)
+    del submission_rows, result_rows
+    db.session.execute(db.text(
+        "UPDATE results SET rank = ranked.new_rank FROM ("
+        "SELECT id, RANK() OVER (PARTITION BY assessment_id "
+        "ORDER BY score DESC NULLS LAST, time_taken ASC NULLS LAST) AS new_rank FROM results"
+        ") AS ranked WHERE results.id = ranked.id"
+    ))
+
+    statuses = ("pending", "accepted", "declined", "expired")
+    invite_rows = []
+    for i in range(1, submissions // 2 + 1):
+        a = rng.randint(1, assessments)
+        sent_at = EPOCH - timedelta(seconds=rng.randint(0, 180 * 86400))
+        status = rng.choices(statuses, weights=(5, 3, 1, 1))[0]
+        invite_rows.append({
+            "id": i, "recruiter_id": creators[a], "interviewee_id": rng.choice(interviewee_ids),
+            "assessment_id": a, "status": status, "sent_at": sent_at,
+            "expires_at": sent_at + timedelta(days=7) if status != "pending" else datetime(2100, 1, 1),
+            "accepted_at": sent_at + timedelta(days=1) if status == "accepted" else None,
+            "delivery_channel": "email", "token": f"bench-{seed}-{i}",
+        })
+    step("invites", Invites, invite_rows)
+    del invite_rows
+
+    step("notifications", Notification, [
+        {"user_id": rng.randint(1, users), "text": f"Notification {n}", "read": rng.random() < 0.6,
+         "timestamp": EPOCH - timedelta(seconds=rng.randint(0, 90 * 86400)),
+         "assessment_id": rng.randint(1, assessments)}
+        for n in range(submissions)
+    ])
+    step("feedback", Feedback, [
+        {"submission_id": rng.randint(1, submissions), "question_id": rng.randint(1, len(questions)),
+         "recruiter_id": rng.randint(1, recruiters), "comment": "Clear reasoning"}
+        for _ in range(submissions // 10)
+    ])
+
+    for start in range(1, assessments + 1, REBUILD_CHUNK_SIZE):
+        rebuild(range(start, min(start + REBUILD_CHUNK_SIZE, assessments + 1)))
+    db.session.commit()
+    echo(f"  assessment stats rebuilt  {time.perf_counter() - started:6.1f}s")
+
+
+def ensure_dataset(data_dir, users, assessments, submissions, seed=42, regenerate=False, echo=print):
+    """Return the cached dataset for these parameters, generating it if needed."""
+    path = dataset_path(data_dir, users, assessments, submissions, seed)
+    if os.path.exists(path) and not regenerate:
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    echo(f"Generating {os.path.basename(path)}")
+    # Generation runs in a child process so the caller can load the app against another file
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.datagen", "--output", partial, "--users", str(users),
+         "--assessments", str(assessments), "--submissions", str(submissions), "--seed", str(seed)],
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    os.replace(partial, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--assessments", type=int)
+    parser.add_argument("--submissions", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", help="write to this file instead of the cache")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key):
+            sizes[key] = getattr(args, key)
+
+    if not args.output:
+        print(ensure_dataset(args.data_dir, seed=args.seed, regenerate=True, **sizes))
+        return
+
+    if os.path.exists(args.output):
+        os.remove(args.output)
+    app = load_app(args.output, BCRYPT_LOG_ROUNDS=args.bcrypt_rounds)
+    with app.app_context():
+        seed(seed=args.seed, **sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+"""Drive every route in app.py over a seeded dataset and record latency, SQL and memory.
+
+    python -m benchmarks.endpoints --scale small --output before.json
+    python -m benchmarks.endpoints --scale small --output after.json --compare before.json
+    python -m benchmarks.endpoints --only submissions --iterations 100
+
+Each run works on a fresh copy of the cached dataset (see benchmarks.datagen),
+so write scenarios never leak into the next run.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+
+from benchmarks.datagen import DEFAULT_DATA_DIR, PASSWORD, SCALES, ensure_dataset, load_app
+
+Scenario = namedtuple("Scenario", ["method", "rule", "role", "stream", "build"])
+
+SCENARIOS = []
+
+# flask-restful registers every method of a resource on each of its rules; these
+# combinations route to a handler that needs the other rule's arguments
+UNROUTABLE = {
+    ("PATCH", "/assessments"),
+    ("DELETE", "/assessments"),
+    ("POST", "/assessments/<int:assessment_id>"),
+    ("POST", "/feedback/<int:id>"),
+    ("GET", "/profile"),
+    ("PATCH", "/profile"),
+    ("POST", "/profile/<id>"),
+}
+
+
+def scenario(method, rule, role="recruiter", stream=False):
+    def register(build):
+        SCENARIOS.append(Scenario(method, rule, role, stream, build))
+        return build
+
+    return register
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Context:
+    """Picks representative rows once and creates throwaway ones for write scenarios."""
+
+    def __init__(self):
+        from models import db, User, Assessments, Questions, Submissions, Feedback, Invites, Results, Notification
+
+        self._sequence = itertools.count(1)
+        session = db.session
+
+        # The busiest recruiter and assessment give the worst realistic page sizes
+        self.recruiter_id, self.assessment_id = session.execute(
+            db.select(Assessments.creator_id, Assessments.id)
+            .join(Submissions, Submissions.assessment_id == Assessments.id)
+            .group_by(Assessments.id)
+            .order_by(db.func.count().desc(), Assessments.id)
+            .limit(1)
+        ).one()
+        self.interviewee_id = session.scalar(
+            db.select(Notification.user_id)
+            .join(User, User.id == Notification.user_id)
+            .where(User.role == "interviewee")
+            .group_by(Notification.user_id)
+            .order_by(db.func.count().desc(), Notification.user_id)
+            .limit(1)
+        )
+        self.submission_id = session.scalar(
+            db.select(Submissions.id).where(Submissions.assessment_id == self.assessment_id).order_by(Submissions.id).limit(1)
+        )
+        self.result_id = session.scalar(
+            db.select(Results.id).where(Results.assessment_id == self.assessment_id).order_by(Results.id).limit(1)
+        )
+        self.invite_id = session.scalar(
+            db.select(Invites.id).where(Invites.recruiter_id == self.recruiter_id).order_by(Invites.id).limit(1)
+        )
+        self.question_id = session.scalar(
+            db.select(Questions.id).where(Questions.assessment_id == self.assessment_id).order_by(Questions.id).limit(1)
+        )
+        self.feedback_id = session.scalar(
+            db.select(db.func.min(Feedback.id)).where(Feedback.recruiter_id == self.recruiter_id)
+        )
+        self.interviewee_emails = session.scalars(
+            db.select(User.email).where(User.role == "interviewee").order_by(User.id).limit(200)
+        ).all()
+        self.recruiter = session.get(User, self.recruiter_id)
+        self._headers = {
+            "recruiter": self.headers_for(self.recruiter_id),
+            "interviewee": self.headers_for(self.interviewee_id),
+            None: {},
+        }
+
+    def headers(self, role):
+        return self._headers[role]
+
+    def headers_for(self, user_id):
+        from models import db, User
+        from utils.auth import issue_token
+
+        return {"Authorization": f"Bearer {issue_token(db.session.get(User, user_id))}"}
+
+    def unique(self):
+        return next(self._sequence)
+
+    def create(self, model, **fields):
+        from models import db
+
+        row = model(**fields)
+        db.session.add(row)
+        db.session.commit()
+        return row
+
+
+# -- index, auth and users ----------------------------------------------------
+
+@scenario("GET", "/", role=None)
+def index(ctx):
+    return {"path": "/"}
+
+
+@scenario("POST", "/signup", role=None)
+def signup(ctx):
+    n = ctx.unique()
+    return {"path": "/signup", "json": {"name": f"new{n}", "email": f"bench-new{n}@example.com",
+                                         "password": PASSWORD, "role": "interviewee"}}
+
+
+@scenario("POST", "/login", role=None)
+def login(ctx):
+    return {"path": "/login", "json": {"email": ctx.recruiter.email, "password": PASSWORD}}
+
+
+@scenario("GET", "/users")
+def users(ctx):
+    return {"path": "/users"}
+
+
+@scenario("GET", "/stats/recruiter")
+def recruiter_stats(ctx):
+    return {"path": "/stats/recruiter"}
+
+
+@scenario("GET", "/metrics", role=None)
+def metrics(ctx):
+    return {"path": "/metrics"}
+
+
+# -- assessments and questions -------------------------------------------------
+
+@scenario("GET", "/assessments")
+def assessment_list(ctx):
+    return {"path": "/assessments"}
+
+
+@scenario("POST", "/assessments")
+def assessment_create(ctx):
+    return {"path": "/assessments", "json": {"title": f"Bench {ctx.unique()}", "time_limit": 60}}
+
+
+@scenario("GET", "/assessments/<int:assessment_id>")
+def assessment_detail(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}"}
+
+
+@scenario("PATCH", "/assessments/<int:assessment_id>")
+def assessment_update(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}", "json": {"time_limit": 60}}
+
+
+@scenario("DELETE", "/assessments/<int:assessment_id>")
+def assessment_delete(ctx):
+    from models import Assessments
+
+    assessment = ctx.create(Assessments, title="Disposable", creator_id=ctx.recruiter_id, time_limit=30)
+    return {"path": f"/assessments/{assessment.id}"}
+
+
+@scenario("POST", "/assessments/<int:assessment_id>/grade")
+def assessment_grade(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}/grade", "json": {}}
+
+
+@scenario("GET", "/assessments/<int:assessment_id>/export")
+def assessment_export(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}/export"}
+
+
+@scenario("POST", "/assessments/<int:assessment_id>/codewars-sync")
+def assessment_codewars_sync(ctx):
+    # Only the enqueue is timed; load_app points the API at a closed local port
+    return {"path": f"/assessments/{ctx.assessment_id}/codewars-sync"}
+
+
+@scenario("GET", "/assessments/<int:assessment_id>/questions", role="interviewee")
+def question_list(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}/questions"}
+
+
+@scenario("POST", "/assessments/<int:assessment_id>/questions")
+def question_create(ctx):
+    return {"path": f"/assessments/{ctx.assessment_id}/questions",
+            "json": {"prompt": "Pick one", "type": "multiple_choice", "options": ["a", "b"], "answer_key": "a"}}
+
+
+@scenario("GET", "/questions/<int:question_id>")
+def question_detail(ctx):
+    return {"path": f"/questions/{ctx.question_id}"}
+
+
+@scenario("PATCH", "/questions/<int:question_id>")
+def question_update(ctx):
+    return {"path": f"/questions/{ctx.question_id}", "json": {"prompt": f"Question revision {ctx.unique()}", "type": "multiple_choice"}}
+
+
+@scenario("DELETE", "/questions/<int:question_id>")
+def question_delete(ctx):
+    from models import Questions
+
+    question = ctx.create(Questions, assessment_id=ctx.assessment_id, type="multiple_choice",
+                          prompt="Disposable", options=["a", "b"], answer_key="a")
+    return {"path": f"/questions/{question.id}"}
+
+
+# -- submissions, results and feedback -----------------------------------------
+
+@scenario("GET", "/submissions")
+def submission_list(ctx):
+    return {"path": "/submissions"}
+
+
+@scenario("POST", "/submissions", role="interviewee")
+def submission_create(ctx):
+    return {"path": "/submissions", "json": {"assessment_id": ctx.assessment_id, "answers": {"1": "a"}}}
+
+
+@scenario("DELETE", "/submissions")
+def submission_delete_all(ctx):
+    from models import User, Assessments, Submissions
+
+    # A throwaway recruiter, since this deletes every submission the caller owns
+    n = ctx.unique()
+    recruiter = ctx.create(User, name=f"scratch{n}", email=f"bench-scratch{n}@example.com",
+                           password="x", role="recruiter")
+    assessment = ctx.create(Assessments, title="Scratch", creator_id=recruiter.id, time_limit=30)
+    for _ in range(10):
+        ctx.create(Submissions, assessment_id=assessment.id, recruiter_id=recruiter.id,
+                   user_id=ctx.interviewee_id, answers={})
+    return {"path": "/submissions", "headers": ctx.headers_for(recruiter.id)}
+
+
+@scenario("PATCH", "/submissions/<int:submission_id>")
+def submission_grade(ctx):
+    return {"path": f"/submissions/{ctx.submission_id}", "json": {"grade": 50 + ctx.unique() % 50}}
+
+
+@scenario("POST", "/results")
+def result_upsert(ctx):
+    return {"path": "/results", "json": {"submission_id": ctx.submission_id, "score": 40 + ctx.unique() % 60,
+                                         "time_taken": 1200, "pass_status": True}}
+
+
+@scenario("PATCH", "/results/<int:result_id>/release")
+def result_release(ctx):
+    return {"path": f"/results/{ctx.result_id}/release"}
+
+
+@scenario("GET", "/interviewee/results", role="interviewee")
+def interviewee_results(ctx):
+    return {"path": "/interviewee/results"}
+
+
+@scenario("GET", "/interviewee-rankings")
+def rankings(ctx):
+    return {"path": "/interviewee-rankings"}
+
+
+@scenario("GET", "/feedback")
+def feedback_list(ctx):
+    return {"path": "/feedback"}
+
+
+@scenario("GET", "/feedback/<int:id>")
+def feedback_detail(ctx):
+    return {"path": f"/feedback/{ctx.feedback_id}"}
+
+
+@scenario("POST", "/feedback")
+def feedback_create(ctx):
+    return {"path": "/feedback", "json": {"question_id": ctx.question_id, "submission_id": ctx.submission_id,
+                                          "comment": "Good structure"}}
+
+
+@scenario("GET", "/submissions/<int:submission_id>/feedback")
+def submission_feedback(ctx):
+    return {"path": f"/submissions/{ctx.submission_id}/feedback"}
+
+
+@scenario("POST", "/submissions/<int:submission_id>/feedback")
+def submission_feedback_create(ctx):
+    return {"path": f"/submissions/{ctx.submission_id}/feedback",
+            "json": {"feedback": [{"question_id": ctx.question_id, "comment": "Good structure"}] * 5}}
+
+
+# -- profiles -------------------------------------------------------------------
+
+@scenario("GET", "/profile/<id>", role="interviewee")
+def profile_detail(ctx):
+    return {"path": "/profile/self"}
+
+
+@scenario("PATCH", "/profile/<id>", role="interviewee")
+def profile_update(ctx):
+    return {"path": "/profile/self", "json": {"location": "Mombasa"}}
+
+
+@scenario("POST", "/profile", role=None)
+def profile_create(ctx):
+    from models import User
+
+    n = ctx.unique()
+    user = ctx.create(User, name=f"profileless{n}", email=f"bench-profileless{n}@example.com",
+                      password="x", role="interviewee")
+    return {"path": "/profile", "json": {"name": user.name, "skills": "python"}, "headers": ctx.headers_for(user.id)}
+
+
+# -- invites ----------------------------------------------------------------------
+
+@scenario("GET", "/invites")
+def invite_list(ctx):
+    return {"path": "/invites"}
+
+
+@scenario("POST", "/invites")
+def invite_create(ctx):
+    email = ctx.interviewee_emails[ctx.unique() % len(ctx.interviewee_emails)]
+    return {"path": "/invites", "json": {"assessment_id": ctx.assessment_id, "interviewee_email": email}}
+
+
+@scenario("POST", "/invites/bulk")
+def invite_bulk(ctx):
+    start = ctx.unique() % len(ctx.interviewee_emails)
+    emails = (ctx.interviewee_emails * 2)[start : start + 50]
+    return {"path": "/invites/bulk", "json": {"assessment_id": ctx.assessment_id, "emails": emails}}
+
+
+@scenario("GET", "/invites/<int:invite_id>")
+def invite_detail(ctx):
+    return {"path": f"/invites/{ctx.invite_id}"}
+
+
+@scenario("GET", "/invites/<int:invite_id>/delivery")
+def invite_delivery(ctx):
+    return {"path": f"/invites/{ctx.invite_id}/delivery"}
+
+
+@scenario("PATCH", "/invites/accept/<string:token>", role="interviewee")
+def invite_accept(ctx):
+    from models import db, Invites
+    from utils.invite_tokens import sign_invite_token
+
+    expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(days=7)
+    invite = ctx.create(Invites, recruiter_id=ctx.recruiter_id, interviewee_id=ctx.interviewee_id,
+                        assessment_id=ctx.assessment_id, status="pending",
+                        sent_at=datetime.utcnow(), expires_at=expires_at)
+    invite.token = sign_invite_token(invite.id, expires_at)
+    db.session.commit()
+    return {"path": f"/invites/accept/{invite.token}"}
+
+
+# -- notifications ----------------------------------------------------------------
+
+@scenario("GET", "/notifications", role="interviewee")
+def notification_list(ctx):
+    return {"path": "/notifications"}
+
+
+@scenario("PATCH", "/notifications/<int:notification_id>/read", role="interviewee")
+def notification_read(ctx):
+    from models import Notification
+
+    notification = ctx.create(Notification, user_id=ctx.interviewee_id, text="Unread", read=False)
+    return {"path": f"/notifications/{notification.id}/read"}
+
+
+@scenario("GET", "/notifications/stream", role="interviewee", stream=True)
+def notification_stream(ctx):
+    # Time to first event (the retry hint); the stream itself stays open for minutes
+    return {"path": "/notifications/stream"}
+
+
+# -- jobs ---------------------------------------------------------------------------
+
+@scenario("GET", "/jobs/<int:job_id>")
+def job_detail(ctx):
+    from models import Job
+
+    job = ctx.create(Job, kind="delete_recruiter_submissions", owner_id=ctx.recruiter_id,
+                     params={"recruiter_id": ctx.recruiter_id}, status="succeeded", total=10, processed=10)
+    return {"path": f"/jobs/{job.id}"}
+
+
+# -- runner -----------------------------------------------------------------------
+
+class QueryCounter:
+    def __init__(self):
+        self.active = False
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.count += 1
+
+
+def run_scenario(app, client, ctx, item, iterations, warmup, queries):
+    from models import db
+
+    def prepare():
+        with app.app_context():
+            request = item.build(ctx)
+            db.session.remove()
+        headers = request.pop("headers", None)
+        if headers is None:
+            headers = ctx.headers(item.role)
+        return request, headers
+
+    def send(request, headers):
+        response = client.open(method=item.method, headers=headers, buffered=False, **request)
+        if item.stream:
+            next(response.iter_encoded(), b"")
+        else:
+            response.get_data()
+        response.close()
+        return response.status_code
+
+    for _ in range(warmup):
+        send(*prepare())
+
+    latencies = []
+    statuses = Counter()
+    query_counts = []
+    for _ in range(iterations):
+        request, headers = prepare()
+        queries.count, queries.active = 0, True
+        started = time.perf_counter()
+        status = send(request, headers)
+        latencies.append(time.perf_counter() - started)
+        queries.active = False
+        statuses[status] += 1
+        query_counts.append(queries.count)
+
+    # Peak memory is traced on a separate request: tracemalloc would skew the timings
+    request, headers = prepare()
+    tracemalloc.start()
+    send(request, headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "method": item.method,
+        "rule": item.rule,
+        "role": item.role,
+        "iterations": iterations,
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "queries_per_request": round(statistics.mean(query_counts), 2),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+def uncovered_routes(app):
+    covered = {(s.method, s.rule) for s in SCENARIOS} | UNROUTABLE
+    return sorted(
+        (method, rule.rule)
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static"
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+        if (method, rule.rule) not in covered
+    )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["method"], r["rule"]): r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {baseline_path}:")
+    print(f"{'route':<52}{'p50 ms':>18}{'p95 ms':>18}{'queries':>14}")
+    for result in current:
+        before = baseline.get((result["method"], result["rule"]))
+        if not before:
+            continue
+
+        def delta(key):
+            old, new = before[key], result[key]
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            return f"{new:>9.2f} {change:>7}"
+
+        print(f"{result['method'] + ' ' + result['rule']:<52}{delta('p50_ms'):>18}{delta('p95_ms'):>18}"
+              f"{result['queries_per_request']:>7.1f}/{before['queries_per_request']:<6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--assessments", type=int)
+    parser.add_argument("--submissions", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the cached dataset")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", help="run routes whose rule contains this text")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="keeps /login and /signup about the app, not bcrypt")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key):
+            sizes[key] = getattr(args, key)
+
+    dataset = ensure_dataset(args.data_dir, seed=args.seed, regenerate=args.regenerate, **sizes)
+    workdir = tempfile.mkdtemp(prefix="endpoint-bench-")
+    database = os.path.join(workdir, "bench.db")
+    shutil.copyfile(dataset, database)
+
+    try:
+        app = load_app(database, BCRYPT_LOG_ROUNDS=args.bcrypt_rounds)
+        app.config["NOTIFICATION_STREAM_MAX_AGE"] = 1
+        # The table below reports queries per request; skip the per-request N+1/slow log lines
+        logging.getLogger("utils.instrumentation").setLevel(logging.ERROR)
+
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        queries = QueryCounter()
+        event.listen(Engine, "after_cursor_execute", queries)
+
+        with app.app_context():
+            ctx = Context()
+        client = app.test_client()
+
+        selected = [s for s in SCENARIOS if not args.only or args.only in s.rule]
+        results = []
+        print(f"{'route':<52}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'peak KiB':>10}  status")
+        for item in selected:
+            result = run_scenario(app, client, ctx, item, args.iterations, args.warmup, queries)
+            results.append(result)
+            print(f"{item.method + ' ' + item.rule:<52}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                  f"{result['p99_ms']:>9.2f}{result['queries_per_request']:>9.1f}{result['peak_memory_kib']:>10.0f}"
+                  f"  {','.join(result['statuses'])}")
+
+        missing = uncovered_routes(app)
+        for method, rule in missing:
+            print(f"warning: no scenario for {method} {rule}")
+
+        report = {
+            "meta": {
+                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "dataset": {**sizes, "seed": args.seed},
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "bcrypt_rounds": args.bcrypt_rounds,
+                "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "uncovered_routes": [f"{method} {rule}" for method, rule in missing],
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+        if args.compare:
+            compare(results, args.compare)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
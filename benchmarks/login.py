@@ -0,0 +1,89 @@
+"""Throughput of POST /login under concurrent clients.
+
+    python -m benchmarks.login --requests 200 --concurrency 8 --rounds 12
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor")
+    parser.add_argument("--workers", type=int, default=None, help="password hashing pool size")
+    parser.add_argument("--legacy", action="store_true", help="seed werkzeug hashes to measure rehash-on-login")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="login-bench-")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["MAIL_OUTBOX_WORKER"] = "false"
+    os.environ["BCRYPT_LOG_ROUNDS"] = str(args.rounds)
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+    from werkzeug.security import generate_password_hash
+
+    from app import app
+    from models import db, User
+    from utils.passwords import hash_password
+
+    app.config["SQLALCHEMY_ECHO"] = False
+    with app.app_context():
+        db.create_all()
+        stored = generate_password_hash("secret") if args.legacy else hash_password("secret")
+        db.session.execute(
+            db.insert(User),
+            [
+                {"name": f"user{i}", "email": f"user{i}@example.com", "password": stored, "role": "interviewee"}
+                for i in range(args.users)
+            ],
+        )
+        db.session.commit()
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def worker():
+        client = app.test_client()
+        for i in counter:
+            start = time.perf_counter()
+            response = client.post("/login", json={"email": f"user{i % args.users}@example.com", "password": "secret"})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    print(f"rounds={args.rounds} concurrency={args.concurrency} requests={len(latencies)} statuses={statuses}")
+    print(f"throughput: {len(latencies) / wall:.1f} logins/s")
+    print(
+        "latency ms: "
+        f"mean={statistics.mean(latencies) * 1000:.1f} "
+        f"p50={percentile(latencies, 50) * 1000:.1f} "
+        f"p95={percentile(latencies, 95) * 1000:.1f} "
+        f"p99={percentile(latencies, 99) * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
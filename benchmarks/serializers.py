@@ -0,0 +1,85 @@
+"""Compare SerializerMixin.to_dict() with the precompiled serializers.
+
+    python -m benchmarks.serializers --rows 10000
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from models import db, User, Profile, Assessments, Questions, Feedback, Submissions
+from utils.serializers import serialize_many
+
+
+def seed(rows):
+    recruiter = User(name="Recruiter", email="recruiter@example.com", password="x", role="recruiter")
+    db.session.add(recruiter)
+    db.session.flush()
+    assessment = Assessments(title="Benchmark", creator_id=recruiter.id, published=True, time_limit=60)
+    db.session.add(assessment)
+    db.session.flush()
+
+    db.session.execute(
+        db.insert(User),
+        [{"name": f"user{i}", "email": f"user{i}@example.com", "password": "x", "role": "interviewee"} for i in range(rows)],
+    )
+    db.session.execute(db.insert(Profile), [{"user_id": i + 2, "name": f"user{i}", "skills": "python"} for i in range(rows)])
+    db.session.execute(
+        db.insert(Questions),
+        [
+            {"assessment_id": assessment.id, "type": "multiple_choice", "prompt": f"Question {i}",
+             "options": ["a", "b", "c", "d"], "answer_key": "a", "meta": {"difficulty": i % 5}}
+            for i in range(rows)
+        ],
+    )
+    db.session.execute(
+        db.insert(Submissions),
+        [{"assessment_id": assessment.id, "recruiter_id": recruiter.id, "user_id": i + 2, "answers": {"1": "a"}}
+         for i in range(rows)],
+    )
+    db.session.execute(
+        db.insert(Feedback),
+        [{"question_id": i + 1, "submission_id": i + 1, "recruiter_id": recruiter.id, "comment": "Good"} for i in range(rows)],
+    )
+    db.session.commit()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+
+        print(f"{'model':<12}{'rows':>8}{'to_dict (s)':>14}{'compiled (s)':>14}{'speedup':>10}")
+        for model, options in (
+            (User, [db.selectinload(User.profiles)]),
+            (Questions, []),
+            (Feedback, []),
+        ):
+            objects = model.query.options(*options).all()
+            assert [o.to_dict() for o in objects] == serialize_many(objects)
+
+            baseline = best_of(args.repeat, lambda: [o.to_dict() for o in objects])
+            compiled = best_of(args.repeat, lambda: serialize_many(objects))
+            print(f"{model.__name__:<12}{len(objects):>8}{baseline:>14.3f}{compiled:>14.3f}{baseline / compiled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
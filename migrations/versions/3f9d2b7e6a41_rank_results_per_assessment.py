@@ -0,0 +1,44 @@
+"""rank results per assessment
+
+Revision ID: 3f9d2b7e6a41
+Revises: e5a80c4d17f2
+Create Date: 2026-10-18 11:26:55.671203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9d2b7e6a41'
+down_revision = 'e5a80c4d17f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('assessment_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_results_assessment_id_assessments', 'assessments', ['assessment_id'], ['id'])
+
+    op.execute(
+        "UPDATE results SET assessment_id = "
+        "(SELECT submissions.assessment_id FROM submissions WHERE submissions.id = results.submission_id)"
+    )
+    # Replace client-supplied ranks with the per-assessment window ranking
+    op.execute(
+        "UPDATE results SET rank = ranked.new_rank FROM ("
+        "SELECT id, RANK() OVER (PARTITION BY assessment_id "
+        "ORDER BY score DESC NULLS LAST, time_taken ASC NULLS LAST) AS new_rank FROM results"
+        ") AS ranked WHERE results.id = ranked.id"
+    )
+
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.create_index('ix_results_assessment_rank', ['assessment_id', 'rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.drop_index('ix_results_assessment_rank')
+        batch_op.drop_constraint('fk_results_assessment_id_assessments', type_='foreignkey')
+        batch_op.drop_column('assessment_id')
@@ -0,0 +1,85 @@
+"""assessment stats rollup
+
+Revision ID: 9a6c2f4e8d13
+Revises: 3f9d2b7e6a41
+Create Date: 2026-10-18 13:02:41.518330
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a6c2f4e8d13'
+down_revision = '3f9d2b7e6a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE invite_statuses ADD VALUE IF NOT EXISTS 'expired'")
+
+    op.create_table('assessment_stats',
+    sa.Column('assessment_id', sa.Integer(), nullable=False),
+    sa.Column('submission_count', sa.Integer(), nullable=False),
+    sa.Column('graded_count', sa.Integer(), nullable=False),
+    sa.Column('grade_total', sa.Float(), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.Column('passed_count', sa.Integer(), nullable=False),
+    sa.Column('invites_pending', sa.Integer(), nullable=False),
+    sa.Column('invites_accepted', sa.Integer(), nullable=False),
+    sa.Column('invites_declined', sa.Integer(), nullable=False),
+    sa.Column('invites_expired', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+    sa.PrimaryKeyConstraint('assessment_id')
+    )
+    op.create_table('assessment_score_buckets',
+    sa.Column('assessment_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+    sa.PrimaryKeyConstraint('assessment_id', 'bucket')
+    )
+
+    # Backfill from the source tables
+    op.execute(
+        "INSERT INTO assessment_stats (assessment_id, submission_count, graded_count, grade_total, "
+        "result_count, passed_count, invites_pending, invites_accepted, invites_declined, "
+        "invites_expired, updated_at) SELECT a.id, "
+        "(SELECT COUNT(*) FROM submissions s WHERE s.assessment_id = a.id), "
+        "(SELECT COUNT(s.grade) FROM submissions s WHERE s.assessment_id = a.id), "
+        "(SELECT COALESCE(SUM(s.grade), 0) FROM submissions s WHERE s.assessment_id = a.id), "
+        "(SELECT COUNT(*) FROM results r WHERE r.assessment_id = a.id), "
+        "(SELECT COUNT(*) FROM results r WHERE r.assessment_id = a.id AND r.pass_status), "
+        "(SELECT COUNT(*) FROM invites i WHERE i.assessment_id = a.id AND i.status = 'pending'), "
+        "(SELECT COUNT(*) FROM invites i WHERE i.assessment_id = a.id AND i.status = 'accepted'), "
+        "(SELECT COUNT(*) FROM invites i WHERE i.assessment_id = a.id AND i.status = 'declined'), "
+        "(SELECT COUNT(*) FROM invites i WHERE i.assessment_id = a.id AND i.status = 'expired'), "
+        "CURRENT_TIMESTAMP FROM assessments a"
+    )
+    # Buckets are the nearest whole grade point clamped to 0-100, as in
+    # utils.assessment_stats.score_bucket; computed here because CAST(... AS
+    # INTEGER) truncates on SQLite but rounds on PostgreSQL
+    connection = op.get_bind()
+    buckets = {}
+    for assessment_id, grade, count in connection.execute(sa.text(
+        "SELECT assessment_id, grade, COUNT(*) FROM submissions "
+        "WHERE assessment_id IS NOT NULL AND grade IS NOT NULL GROUP BY assessment_id, grade"
+    )):
+        key = (assessment_id, min(100, max(0, round(grade))))
+        buckets[key] = buckets.get(key, 0) + count
+    if buckets:
+        connection.execute(
+            sa.text("INSERT INTO assessment_score_buckets (assessment_id, bucket, count) VALUES (:a, :b, :c)"),
+            [{"a": a, "b": b, "c": c} for (a, b), c in buckets.items()],
+        )
+
+
+def downgrade():
+    op.drop_table('assessment_score_buckets')
+    op.drop_table('assessment_stats')
+    # PostgreSQL cannot drop an enum value; fold expired invites back into declined
+    op.execute("UPDATE invites SET status = 'declined' WHERE status = 'expired'")
@@ -0,0 +1,53 @@
+"""scrub sandbox errors
+
+Revision ID: a8e2c6d4f019
+Revises: f3a7c9d2e815
+Create Date: 2026-10-18 21:05:37.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e2c6d4f019'
+down_revision = 'f3a7c9d2e815'
+branch_labels = None
+depends_on = None
+
+submissions = sa.table(
+    'submissions',
+    sa.column('id', sa.Integer),
+    sa.column('code_results', sa.JSON),
+)
+
+
+def _scrub(results):
+    """Drop error text from codekata verdicts; it was whatever the submitted code raised."""
+    changed = False
+    for verdict in results.values():
+        if not isinstance(verdict, dict) or 'tests' not in verdict:
+            continue
+        changed |= verdict.pop('error', None) is not None
+        for test in verdict['tests']:
+            if isinstance(test, dict):
+                changed |= test.pop('error', None) is not None
+    return changed
+
+
+def upgrade():
+    # Cached verdicts carry the same text; they are rebuilt on the next run
+    op.execute('DELETE FROM code_verdicts')
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(submissions.c.id, submissions.c.code_results).where(submissions.c.code_results.isnot(None))
+    ).all()
+    for row in rows:
+        results = dict(row.code_results or {})
+        if _scrub(results):
+            bind.execute(submissions.update().where(submissions.c.id == row.id).values(code_results=results))
+
+
+def downgrade():
+    pass
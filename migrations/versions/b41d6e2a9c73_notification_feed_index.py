@@ -0,0 +1,25 @@
+"""notification feed index
+
+Revision ID: b41d6e2a9c73
+Revises: 7c3e9a1f5b20
+Create Date: 2026-10-18 10:03:47.218904
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d6e2a9c73'
+down_revision = '7c3e9a1f5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_read_timestamp', ['user_id', 'read', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_read_timestamp')
@@ -0,0 +1,37 @@
+"""submissions recruiter id
+
+Revision ID: c5e19b7d3a48
+Revises: a8e2c6d4f019
+Create Date: 2026-10-18 22:14:09.305716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e19b7d3a48'
+down_revision = 'a8e2c6d4f019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recruiter_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_submissions_recruiter_id_users', 'users', ['recruiter_id'], ['id'])
+
+    op.execute(
+        "UPDATE submissions SET recruiter_id = "
+        "(SELECT assessments.creator_id FROM assessments WHERE assessments.id = submissions.assessment_id)"
+    )
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.create_index('ix_submissions_recruiter_id', ['recruiter_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index('ix_submissions_recruiter_id')
+        batch_op.drop_constraint('fk_submissions_recruiter_id_users', type_='foreignkey')
+        batch_op.drop_column('recruiter_id')
@@ -0,0 +1,34 @@
+"""add code verdicts
+
+Revision ID: d2f84b6c1e57
+Revises: c7d1e3f5a902
+Create Date: 2026-10-18 18:42:51.610274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f84b6c1e57'
+down_revision = 'c7d1e3f5a902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('code_verdicts',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('verdict', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('code_results', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_column('code_results')
+
+    op.drop_table('code_verdicts')
@@ -0,0 +1,25 @@
+"""notification stream backlog index
+
+Revision ID: d7a3f1c6e284
+Revises: c5e19b7d3a48
+Create Date: 2026-10-18 22:31:47.651203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f1c6e284'
+down_revision = 'c5e19b7d3a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_id')
@@ -0,0 +1,85 @@
+"""index foreign keys and lookup columns
+
+Revision ID: e5a80c4d17f2
+Revises: b41d6e2a9c73
+Create Date: 2026-10-18 10:41:12.904417
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a80c4d17f2'
+down_revision = 'b41d6e2a9c73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Results.submission_id becomes unique: keep the newest row per submission
+    op.execute(
+        "DELETE FROM results WHERE submission_id IS NOT NULL AND id NOT IN "
+        "(SELECT MAX(id) FROM results WHERE submission_id IS NOT NULL GROUP BY submission_id)"
+    )
+
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_assessments_creator_id'), ['creator_id'], unique=False)
+
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_feedback_question_id'), ['question_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_feedback_recruiter_id'), ['recruiter_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_feedback_submission_id'), ['submission_id'], unique=False)
+
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invites_assessment_id'), ['assessment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_invites_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_invites_interviewee_id'), ['interviewee_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_invites_recruiter_id'), ['recruiter_id'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_timestamp', ['user_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_profiles_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_questions_assessment_id'), ['assessment_id'], unique=False)
+
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_results_submission_id'), ['submission_id'], unique=True)
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_submissions_assessment_id'), ['assessment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_user_id'))
+        batch_op.drop_index(batch_op.f('ix_submissions_assessment_id'))
+
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_results_submission_id'))
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_questions_assessment_id'))
+
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_profiles_user_id'))
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_timestamp')
+
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invites_recruiter_id'))
+        batch_op.drop_index(batch_op.f('ix_invites_interviewee_id'))
+        batch_op.drop_index(batch_op.f('ix_invites_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_invites_assessment_id'))
+
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_feedback_submission_id'))
+        batch_op.drop_index(batch_op.f('ix_feedback_recruiter_id'))
+        batch_op.drop_index(batch_op.f('ix_feedback_question_id'))
+
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_assessments_creator_id'))
@@ -0,0 +1,28 @@
+"""invite expiry sweeper
+
+Revision ID: f3a7c9d2e815
+Revises: d2f84b6c1e57
+Create Date: 2026-10-18 19:26:14.502718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c9d2e815'
+down_revision = 'd2f84b6c1e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_invites_status_expires_at', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invites', schema=None) as batch_op:
+        batch_op.drop_index('ix_invites_status_expires_at')
+        batch_op.drop_column('reminder_sent_at')
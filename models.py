@@ -1,13 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Enum
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import Enum, select
+from utils.passwords import hash_password, verify_password
+from utils.database import RoutingSession
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime
 
 
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class User(db.Model,SerializerMixin):
     __tablename__ = "users"
@@ -18,13 +19,13 @@ class User(db.Model,SerializerMixin):
     role = db.Column(Enum("recruiter", "interviewee", name="user_roles"), nullable=False)
 
     def set_password(self, plain_password):
-        self.password = generate_password_hash(plain_password)
+        self.password = hash_password(plain_password)
 
     def check_password(self, plain_password):
-        return check_password_hash(self.password, plain_password)
+        return verify_password(self.password, plain_password)
 
     assessments = db.relationship("Assessments", back_populates="creator")
-    submissions = db.relationship("Submissions", back_populates="user")
+    submissions = db.relationship("Submissions", foreign_keys="Submissions.user_id", back_populates="user")
     feedback_given = db.relationship("Feedback", back_populates="recruiter")
     invites_sent = db.relationship("Invites", foreign_keys="Invites.recruiter_id", back_populates="recruiter")
     invites_received = db.relationship("Invites", foreign_keys="Invites.interviewee_id", back_populates="interviewee")
@@ -37,7 +38,7 @@ class Assessments(db.Model, SerializerMixin):
     __tablename__ = "assessments"
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String)
-    creator_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    creator_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     published = db.Column(db.Boolean)
     time_limit = db.Column(db.Integer)
 
@@ -53,7 +54,7 @@ class Assessments(db.Model, SerializerMixin):
 class Questions(db.Model, SerializerMixin):
     __tablename__ = "questions"
     id = db.Column(db.Integer, primary_key=True)
-    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"))
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), index=True)
     type = db.Column(
         Enum("multiple_choice", "codekata", "codewars", name="question_types"),
         nullable=False,
@@ -69,20 +70,34 @@ class Questions(db.Model, SerializerMixin):
     serialize_rules = ("-assessment", "-feedback_entries")
 
 
+def _assessment_creator(context):
+    """recruiter_id for inserts that leave it out, whichever path they take (ORM, bulk or Core)."""
+    assessment_id = context.get_current_parameters().get("assessment_id")
+    if assessment_id is None:
+        return None
+    return context.connection.scalar(select(Assessments.creator_id).where(Assessments.id == assessment_id))
+
+
 class Submissions(db.Model, SerializerMixin):
     __tablename__ = "submissions"
     id = db.Column(db.Integer, primary_key=True)
-    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"))
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    # Denormalized from the assessment so a recruiter's submission list is an index range scan
+    recruiter_id = db.Column(db.Integer, db.ForeignKey("users.id"), default=_assessment_creator)
     answers = db.Column(db.JSON)
     submitted_at = db.Column(db.DateTime)
     grade = db.Column(db.Float)
+    # Per-question verdicts (codekata sandbox runs, Codewars completions), keyed by question id
+    code_results = db.Column(db.JSON)
 
     assessment = db.relationship("Assessments", back_populates="submissions")
-    user = db.relationship("User", back_populates="submissions")
+    user = db.relationship("User", foreign_keys=[user_id], back_populates="submissions")
     feedback = db.relationship("Feedback", back_populates="submission")
     result = db.relationship("Results", back_populates="submission", uselist=False)
 
+    __table_args__ = (db.Index("ix_submissions_recruiter_id", "recruiter_id", "id"),)
+
     serialize_rules = ("-assessment", "-user", "-feedback", "-result")
 
 
@@ -96,9 +111,9 @@ class Feedback(db.Model, SerializerMixin):
         "recruiter.id", "recruiter.name", "recruiter.email", )
     
     id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"))
-    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id"))
-    recruiter_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), index=True)
+    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id"), index=True)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     comment = db.Column(db.Text)
 
     question = db.relationship("Questions", back_populates="feedback_entries")
@@ -111,13 +126,14 @@ class Feedback(db.Model, SerializerMixin):
 class Invites(db.Model, SerializerMixin):
     __tablename__ = "invites"
     id = db.Column(db.Integer, primary_key=True)
-    recruiter_id = db.Column(db.Integer, db.ForeignKey("users.id"))
-    interviewee_id = db.Column(db.Integer, db.ForeignKey("users.id"))
-    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"))
-    status = db.Column(Enum("pending", "accepted", "declined", name="invite_statuses"), default="pending")
+    recruiter_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    interviewee_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), index=True)
+    status = db.Column(Enum("pending", "accepted", "declined", "expired", name="invite_statuses"), default="pending")
     sent_at = db.Column(db.DateTime)
-    expires_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
     accepted_at = db.Column(db.DateTime)
+    reminder_sent_at = db.Column(db.DateTime)
     delivery_channel = db.Column(db.String)
     token = db.Column(db.String, unique=True)
 
@@ -125,10 +141,15 @@ class Invites(db.Model, SerializerMixin):
     interviewee = db.relationship("User", foreign_keys=[interviewee_id], back_populates="invites_received")
     assessment = db.relationship("Assessments", back_populates="invites")
 
+    # The expiry sweeper and reminders range-scan pending invites by expiry
+    __table_args__ = (db.Index("ix_invites_status_expires_at", "status", "expires_at"),)
+
 class Results(db.Model, SerializerMixin):
     __tablename__ = "results"
     id = db.Column(db.Integer, primary_key=True)
-    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id"))
+    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id"), unique=True, index=True)
+    # Denormalized from the submission so per-assessment leaderboards are an index range scan
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"))
     score = db.Column(db.Float)
     time_taken = db.Column(db.Integer)
     rank = db.Column(db.Integer)
@@ -138,12 +159,14 @@ class Results(db.Model, SerializerMixin):
 
     submission = db.relationship("Submissions", back_populates="result")
 
+    __table_args__ = (db.Index("ix_results_assessment_rank", "assessment_id", "rank"),)
+
 
 class Profile(db.Model, SerializerMixin):
     __tablename__ = "profiles"
     id = db.Column(db.Integer, primary_key=True)
     
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     name = db.Column(db.String, nullable=True) 
     company = db.Column(db.String, nullable=True)
     role = db.Column(db.String, nullable=True)
@@ -163,12 +186,17 @@ class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     text = db.Column(db.String(255), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.now)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     read = db.Column(db.Boolean, default=False)
 
     assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), nullable=True)
     assessment = db.relationship("Assessments", back_populates="notifications")
 
+    __table_args__ = (
+        db.Index("ix_notifications_user_read_timestamp", "user_id", "read", "timestamp"),
+        db.Index("ix_notifications_user_timestamp", "user_id", "timestamp"),
+        db.Index("ix_notifications_user_id", "user_id", "id"),
+    )
 
 
     def to_dict(self):
@@ -179,3 +207,88 @@ class Notification(db.Model):
             "read": self.read,
             "assessmentId": self.assessment_id,
         }
+
+
+class MailOutbox(db.Model, SerializerMixin):
+    __tablename__ = "mail_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    invite_id = db.Column(db.Integer, db.ForeignKey("invites.id"), nullable=True, index=True)
+    recipient = db.Column(db.String, nullable=False)
+    subject = db.Column(db.String, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(
+        Enum("queued", "sending", "sent", "failed", name="mail_statuses"),
+        default="queued",
+        nullable=False,
+    )
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claim_token = db.Column(db.String)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    invite = db.relationship("Invites")
+
+    __table_args__ = (db.Index("ix_mail_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    serialize_rules = ("-invite", "-body", "-claim_token")
+
+
+class AssessmentStats(db.Model):
+    """Per-assessment dashboard rollup, kept current by the write paths (utils/assessment_stats.py)."""
+    __tablename__ = "assessment_stats"
+
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), primary_key=True)
+    submission_count = db.Column(db.Integer, default=0, nullable=False)
+    graded_count = db.Column(db.Integer, default=0, nullable=False)
+    grade_total = db.Column(db.Float, default=0, nullable=False)
+    result_count = db.Column(db.Integer, default=0, nullable=False)
+    passed_count = db.Column(db.Integer, default=0, nullable=False)
+    invites_pending = db.Column(db.Integer, default=0, nullable=False)
+    invites_accepted = db.Column(db.Integer, default=0, nullable=False)
+    invites_declined = db.Column(db.Integer, default=0, nullable=False)
+    invites_expired = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AssessmentScoreBucket(db.Model):
+    """Histogram of graded submissions per whole grade point (0-100), for medians."""
+    __tablename__ = "assessment_score_buckets"
+
+    assessment_id = db.Column(db.Integer, db.ForeignKey("assessments.id"), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class Job(db.Model, SerializerMixin):
+    """A long-running task (e.g. a large deletion) executed off the request path."""
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String, nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    params = db.Column(db.JSON)
+    status = db.Column(
+        Enum("queued", "running", "succeeded", "failed", name="job_statuses"),
+        default="queued",
+        nullable=False,
+    )
+    total = db.Column(db.Integer)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+class CodeVerdict(db.Model):
+    """Sandbox verdict for one (code, tests) pair, shared by identical submissions."""
+    __tablename__ = "code_verdicts"
+
+    digest = db.Column(db.String(64), primary_key=True)
+    verdict = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
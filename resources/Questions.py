@@ -1,6 +1,10 @@
+from flask import Response, request
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required
-from models import Questions, db
+from models import Assessments, Questions, db
+from utils.serializers import serialize, serialize_many
+from utils.question_cache import assessment_questions_query, candidate_payload, candidate_view, invalidate
+from utils.auth import current_user_id
 
 parser = reqparse.RequestParser()
 parser.add_argument("prompt", type=str, required=True, help="Prompt is required")
@@ -14,14 +18,51 @@ parser.add_argument(
 )  # ✅ Optional metadata for Codewars
 
 
+def _valid_tests(meta):
+    tests = (meta or {}).get("tests", [])
+    return isinstance(tests, list) and all(
+        isinstance(test, dict) and isinstance(test.get("args", []), list) and "expected" in test
+        for test in tests
+    )
+
+
+def _owned_question(question_id, user_id):
+    """The question, if it exists and belongs to an assessment the caller created."""
+    row = (
+        db.session.query(Questions, Assessments.creator_id)
+        .outerjoin(Assessments, Assessments.id == Questions.assessment_id)
+        .filter(Questions.id == question_id)
+        .first()
+    )
+    if row is None or row.creator_id != user_id:
+        return None
+    return row[0]
+
+
 class QuestionsListResource(Resource):
     @jwt_required()
     def get(self, assessment_id):
-        questions = Questions.query.filter_by(assessment_id=assessment_id).all()
-        return [q.to_dict() for q in questions], 200
+        user_id = current_user_id()
+        cached = candidate_payload(assessment_id)
+
+        # The assessment's creator edits questions and needs the answer keys
+        if cached.creator_id == user_id:
+            questions = assessment_questions_query(assessment_id).all()
+            return serialize_many(questions), 200
+
+        # 🏎 Everyone else shares one precomputed payload, revalidated by ETag
+        response = Response(cached.body, mimetype="application/json")
+        response.set_etag(cached.etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response.make_conditional(request)
 
     @jwt_required()
     def post(self, assessment_id):
+        # 🔒 Only the assessment's creator adds questions to it
+        creator_id = db.session.query(Assessments.creator_id).filter_by(id=assessment_id).scalar()
+        if creator_id is None or creator_id != current_user_id():
+            return {"message": "Assessment not found"}, 404
+
         args = parser.parse_args()
 
         if args["type"] == "multiple_choice":
@@ -34,6 +75,9 @@ class QuestionsListResource(Resource):
             if not args["answer_key"]:
                 return {"message": "Codewars slug is required as answer_key"}, 400
 
+        if args["type"] == "codekata" and not _valid_tests(args["meta"]):
+            return {"message": "Codekata meta.tests must be a list of {args, expected}"}, 400
+
         question = Questions(
             assessment_id=assessment_id,
             prompt=args["prompt"].strip(),
@@ -45,19 +89,33 @@ class QuestionsListResource(Resource):
 
         db.session.add(question)
         db.session.commit()
-        return question.to_dict(), 201
+        invalidate(assessment_id)
+        return serialize(question), 201
 
 
 class QuestionDetailResource(Resource):
     @jwt_required()
     def get(self, question_id):
-        question = Questions.query.get_or_404(question_id)
-        return question.to_dict(), 200
+        user_id = current_user_id()
+        row = (
+            db.session.query(Questions, Assessments.creator_id)
+            .outerjoin(Assessments, Assessments.id == Questions.assessment_id)
+            .filter(Questions.id == question_id)
+            .first_or_404()
+        )
+        question, creator_id = row
+        # Only the assessment's creator sees the answer key, as on the list route
+        if creator_id == user_id:
+            return serialize(question), 200
+        return candidate_view(serialize(question)), 200
 
     @jwt_required()
     def patch(self, question_id):
+        question = _owned_question(question_id, current_user_id())
+        if question is None:
+            return {"message": "Question not found"}, 404
+
         args = parser.parse_args()
-        question = Questions.query.get_or_404(question_id)
 
         if args["prompt"]:
             question.prompt = args["prompt"].strip()
@@ -73,11 +131,16 @@ class QuestionDetailResource(Resource):
             question.meta = args["meta"]
 
         db.session.commit()
-        return question.to_dict(), 200
+        invalidate(question.assessment_id)
+        return serialize(question), 200
 
     @jwt_required()
     def delete(self, question_id):
-        question = Questions.query.get_or_404(question_id)
+        question = _owned_question(question_id, current_user_id())
+        if question is None:
+            return {"message": "Question not found"}, 404
+        assessment_id = question.assessment_id
         db.session.delete(question)
         db.session.commit()
+        invalidate(assessment_id)
         return {"message": "Question deleted"}, 204
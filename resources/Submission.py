@@ -1,82 +1,160 @@
-from flask_restful import Resource
-from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_restful import Resource, reqparse, inputs
+from flask import current_app, request
+from flask_jwt_extended import jwt_required
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from models import db, Submissions, Assessments, User
+from utils.pagination import clamp_limit, decode_cursor, keyset_page
+from utils.serializers import serialize
+from utils import assessment_stats
+from utils.code_grading import codekata_question_ids
+from utils.deletion import count_submissions, delete_recruiter_submissions, recruiter_submissions
+from utils.jobs import enqueue_job
+from utils.auth import current_user_id
+
+
+def submission_list_query(
+    recruiter_id, assessment_id=None, graded=None, submitted_from=None, submitted_to=None, before_id=None
+):
+    """Submissions on a recruiter's assessments, newest first, seeking past `before_id`."""
+    # 👤 Users (and their profiles, which User.to_dict includes) load in bulk
+    query = Submissions.query.filter(Submissions.recruiter_id == recruiter_id).options(
+        joinedload(Submissions.user).selectinload(User.profiles)
+    )
+
+    if assessment_id:
+        query = query.filter(Submissions.assessment_id == assessment_id)
+    if graded is not None:
+        query = query.filter(Submissions.grade.isnot(None) if graded else Submissions.grade.is_(None))
+    if submitted_from:
+        query = query.filter(Submissions.submitted_at >= submitted_from)
+    if submitted_to:
+        query = query.filter(Submissions.submitted_at < submitted_to)
+    if before_id is not None:
+        query = query.filter(Submissions.id < before_id)
+    return query.order_by(Submissions.id.desc())
 
 
 class SubmissionListResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument("assessment_id", type=int, location="args")
+    parser.add_argument("graded", type=inputs.boolean, location="args")
+    parser.add_argument("submitted_from", type=datetime.fromisoformat, location="args")
+    parser.add_argument("submitted_to", type=datetime.fromisoformat, location="args")
+    parser.add_argument("limit", type=int, location="args")
+    parser.add_argument("cursor", type=str, location="args")
+
     @jwt_required()
     def get(self):
-        user_id = int(get_jwt_identity())
-
-        submissions = (
-            Submissions.query.join(Assessments)
-            .filter(Assessments.creator_id == user_id)
-            .all()
+        user_id = current_user_id()
+        args = self.parser.parse_args()
+        limit = clamp_limit(args["limit"])
+
+        before_id = None
+        if args["cursor"]:
+            try:
+                (before_id,) = decode_cursor(args["cursor"])
+            except (TypeError, ValueError):
+                return {"message": "Invalid cursor"}, 400
+
+        query = submission_list_query(
+            user_id,
+            assessment_id=args["assessment_id"],
+            graded=args["graded"],
+            submitted_from=args["submitted_from"],
+            submitted_to=args["submitted_to"],
+            before_id=before_id,
         )
+        submissions = query.limit(limit + 1).all()
+        submissions, headers = keyset_page(submissions, limit, key=lambda s: (s.id,))
 
         result = []
         for sub in submissions:
-            data = sub.to_dict()
-            data["user"] = User.query.get(sub.user_id).to_dict()
+            data = serialize(sub)
+            data["user"] = serialize(sub.user) if sub.user else None
             result.append(data)
 
-        return result, 200
+        return result, 200, headers
 
     @jwt_required()
     def post(self):
         data = request.get_json()
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
         assessment_id = data.get("assessment_id")
         answers = data.get("answers")
 
         if not assessment_id or not answers:
             return {"error": "assessment_id and answers are required"}, 400
 
+        recruiter_id = db.session.scalar(
+            select(Assessments.creator_id).where(Assessments.id == assessment_id)
+        )
+        if recruiter_id is None:
+            return {"error": "Assessment not found"}, 404
+
         submission = Submissions(
             user_id=user_id,
             assessment_id=assessment_id,
+            recruiter_id=recruiter_id,
             answers=answers,
             submitted_at=datetime.now(),
             grade=None,
         )
 
         db.session.add(submission)
+        assessment_stats.record_submission(assessment_id)
         db.session.commit()
 
-        return {"message": "Submission successful", "submission_id": submission.id}, 201
+        body = {"message": "Submission successful", "submission_id": submission.id}
+        # 🧪 Code answers run in the sandbox off the request path
+        code_questions = codekata_question_ids(assessment_id, answers)
+        if code_questions:
+            job = enqueue_job(
+                "grade_code", user_id, {"submission_id": submission.id}, total=len(code_questions)
+            )
+            body["grading_job_id"] = job.id
+        return body, 201
+    delete_parser = reqparse.RequestParser()
+    delete_parser.add_argument("background", type=inputs.boolean, location="args", default=False)
+
     @jwt_required()
     def delete(self):
-        user_id = int(get_jwt_identity())
-
-        # Grab all submissions linked to assessments created by this user
-        submissions = (
-            Submissions.query
-            .join(Assessments)
-            .filter(Assessments.creator_id == user_id)
-            .all()
-        )
+        user_id = current_user_id()
+        args = self.delete_parser.parse_args()
 
-        if not submissions:
+        total = count_submissions(recruiter_submissions(user_id))
+        if not total:
             return {"message": "No submissions found"}, 404
 
-        for sub in submissions:
-            db.session.delete(sub)
-
-        db.session.commit()
-        return {"message": "All submissions deleted"}, 200
+        # 🧹 Large deletions run as a job; poll /jobs/<id> for progress
+        if args["background"] or total > current_app.config["SYNC_DELETE_LIMIT"]:
+            job = enqueue_job(
+                "delete_recruiter_submissions", user_id, {"recruiter_id": user_id}, total=total
+            )
+            return (
+                {"message": "Deletion started", "job_id": job.id, "total": total},
+                202,
+                {"Location": f"/jobs/{job.id}"},
+            )
+
+        deleted = delete_recruiter_submissions(user_id)
+        return {"message": "All submissions deleted", **deleted}, 200
     
 
 class SubmissionDetailResource(Resource):
     @jwt_required()
     def patch(self, submission_id):
-        user_id = int(get_jwt_identity())
+        user_id = current_user_id()
         data = request.get_json()
         new_grade = data.get("grade")
 
         if new_grade is None:
             return {"message": "Grade is required"}, 400
+        try:
+            new_grade = float(new_grade)
+        except (TypeError, ValueError):
+            return {"message": "Grade must be a number"}, 400
 
         submission = Submissions.query.get_or_404(submission_id)
         assessment = Assessments.query.get(submission.assessment_id)
@@ -84,6 +162,7 @@ class SubmissionDetailResource(Resource):
         if assessment.creator_id != user_id:
             return {"message": "Unauthorized to update this grade"}, 403
 
+        assessment_stats.record_grade(submission.assessment_id, submission.grade, new_grade)
         submission.grade = new_grade
         db.session.commit()
 
@@ -1,6 +1,18 @@
-from flask_restful import Resource, reqparse
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Assessments, User
+import csv
+import io
+import json
+from flask import Response, current_app, stream_with_context
+from flask_restful import Resource, reqparse, inputs
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, or_, select
+from models import db, Assessments, Invites, User, Submissions, Results
+from utils.grading import grade_assessment
+from utils.auth import current_role, current_user_id, role_required
+from utils.codewars import count_submissions
+from utils.count_cache import ASSESSMENT_CATALOGUE, TOTAL_COUNT_HEADER, cached_count, invalidate_counts
+from utils.pagination import clamp_limit, decode_cursor, keyset_page
+from utils.deletion import assessment_row_count, delete_assessment
+from utils.jobs import enqueue_job
 
 
 class AssessmentResource(Resource):
@@ -9,28 +21,23 @@ class AssessmentResource(Resource):
     parser.add_argument("time_limit", type=int)
     parser.add_argument("published", type=bool)
 
-    @jwt_required()
+    @role_required(
+        "recruiter", body={"error": "Unauthorized: Only recruiters can create assessments"}
+    )
     def post(self):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-
-        if not user or user.role != "recruiter":
-            return {
-                "error": "Unauthorized: Only recruiters can create assessments"
-            }, 403
-
         args = self.parser.parse_args()
         if not args.title or not args.time_limit:
             return {"error": "Missing required fields"}, 400
 
         new_assessment = Assessments(
             title=args.title,
-            creator_id=current_user_id,
+            creator_id=current_user_id(),
             time_limit=args.time_limit,
             published=args.published if args.published is not None else False,
         )
         db.session.add(new_assessment)
         db.session.commit()
+        invalidate_counts(ASSESSMENT_CATALOGUE)
 
         return {
             "message": "Assessment created",
@@ -45,15 +52,11 @@ class AssessmentResource(Resource):
 
      
 
-    @jwt_required()
+    @role_required("recruiter", body={"error": "Unauthorized"})
     def patch(self, assessment_id):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         assessment = Assessments.query.get(assessment_id)
 
-        if not user or user.role != "recruiter":
-            return {"error": "Unauthorized"}, 403
-        if not assessment or assessment.creator_id != current_user_id:
+        if not assessment or assessment.creator_id != current_user_id():
             return {"error": "Assessment not found or permission denied"}, 404
 
         args = self.parser.parse_args()
@@ -65,24 +68,44 @@ class AssessmentResource(Resource):
             assessment.published = args.published
 
         db.session.commit()
+        invalidate_counts(ASSESSMENT_CATALOGUE)
         return {"message": "Assessment updated"}, 200
 
-    @jwt_required()
+    delete_parser = reqparse.RequestParser()
+    delete_parser.add_argument("background", type=inputs.boolean, location="args", default=False)
+
+    @role_required("recruiter", body={"error": "Unauthorized"})
     def delete(self, assessment_id):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         assessment = Assessments.query.get(assessment_id)
 
-        if not user or user.role != "recruiter":
-            return {"error": "Unauthorized"}, 403
-        if not assessment or assessment.creator_id != current_user_id:
+        if not assessment or assessment.creator_id != current_user_id():
             return {"error": "Assessment not found or permission denied"}, 404
 
-        db.session.delete(assessment)
-        db.session.commit()
-        return {"message": f"Assessment {assessment_id} deleted"}, 200
+        # 🧹 Questions, submissions, results, feedback, invites and notifications go too
+        args = self.delete_parser.parse_args()
+        total = assessment_row_count(assessment_id)
+        if args["background"] or total > current_app.config["SYNC_DELETE_LIMIT"]:
+            job = enqueue_job(
+                "delete_assessment", current_user_id(), {"assessment_id": assessment_id}, total=total
+            )
+            return (
+                {"message": "Deletion started", "job_id": job.id, "total": total},
+                202,
+                {"Location": f"/jobs/{job.id}"},
+            )
+
+        deleted = delete_assessment(assessment_id)
+        return {"message": f"Assessment {assessment_id} deleted", "deleted": deleted}, 200
 
 
+    list_parser = reqparse.RequestParser()
+    list_parser.add_argument("published", type=inputs.boolean, location="args")
+    list_parser.add_argument("creator_id", type=int, location="args")
+    list_parser.add_argument("title", type=str, location="args")
+    list_parser.add_argument("fields", type=str, location="args")
+    list_parser.add_argument("limit", type=int, location="args")
+    list_parser.add_argument("cursor", type=str, location="args")
+
     @jwt_required()
     def get(self, assessment_id=None):
         
@@ -99,14 +122,223 @@ class AssessmentResource(Resource):
                 "published": assessment.published
             }, 200
 
+        args = self.list_parser.parse_args()
+        limit = clamp_limit(args["limit"])
+        try:
+            columns = _catalogue_columns(args["fields"])
+        except ValueError as exc:
+            return {"error": str(exc)}, 400
+
+        role, user_id = current_role(), current_user_id()
+        conditions = catalogue_conditions(role, user_id, args["published"], args["creator_id"], args["title"])
+
+        # 🔢 The total ignores the cursor, so one cached count serves every page
+        total = cached_count(
+            (ASSESSMENT_CATALOGUE, role, user_id, args["published"], args["creator_id"], args["title"]),
+            select(func.count()).select_from(Assessments).where(*conditions),
+        )
+
+        after_id = None
+        if args["cursor"]:
+            try:
+                (after_id,) = decode_cursor(args["cursor"])
+            except (TypeError, ValueError):
+                return {"error": "Invalid cursor"}, 400
+
+        rows = db.session.execute(catalogue_query(columns, conditions, after_id).limit(limit + 1)).all()
+        rows, headers = keyset_page(rows, limit, key=lambda row: (row.id,))
+        headers[TOTAL_COUNT_HEADER] = str(total)
+
+        return [dict(row._mapping) for row in rows], 200, headers
+
+
+CATALOGUE_FIELDS = ("id", "title", "creator_id", "time_limit", "published")
+DEFAULT_CATALOGUE_FIELDS = ("id", "title", "time_limit", "published")
+
+
+def _catalogue_columns(fields):
+    """Columns for `?fields=a,b`; the id is always selected since the cursor needs it."""
+    if not fields:
+        names = DEFAULT_CATALOGUE_FIELDS
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(CATALOGUE_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        names = ["id"] + [name for name in CATALOGUE_FIELDS if name in names and name != "id"]
+    return [getattr(Assessments, name) for name in names]
+
+
+def catalogue_conditions(role, user_id, published=None, creator_id=None, title=None):
+    """Recruiters see their own assessments; interviewees see published or invited ones."""
+    if role == "recruiter":
+        conditions = [Assessments.creator_id == user_id]
+    else:
+        invited = Assessments.id.in_(
+            select(Invites.assessment_id).where(Invites.interviewee_id == user_id)
+        )
+        if published is False:
+            # Unpublished ones are only reachable by invite; start from the invites
+            conditions = [invited]
         else:
-            assessments = db.session.query(Assessments).all()
-            return [
-                {
-                    "id": a.id,
-                    "title": a.title,
-                    "time_limit": a.time_limit,
-                    "published": a.published
-                }
-                for a in assessments
-            ], 200
+            conditions = [or_(Assessments.published == True, invited)]  # noqa: E712
+
+    if published is not None:
+        conditions.append(Assessments.published == published)
+    if creator_id:
+        conditions.append(Assessments.creator_id == creator_id)
+    if title:
+        conditions.append(Assessments.title.startswith(title, autoescape=True))
+    return conditions
+
+
+def catalogue_query(columns, conditions, after_id=None):
+    """One catalogue page in id order, seeking past `after_id`."""
+    if after_id is not None:
+        conditions = [*conditions, Assessments.id > after_id]
+    return select(*columns).where(*conditions).order_by(Assessments.id)
+
+
+class AssessmentGradeResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument("only_ungraded", type=inputs.boolean, default=False)
+
+    @jwt_required()
+    def post(self, assessment_id):
+        user_id = current_user_id()
+        assessment = Assessments.query.get(assessment_id)
+
+        if not assessment or assessment.creator_id != user_id:
+            return {"error": "Assessment not found or permission denied"}, 404
+
+        args = self.parser.parse_args()
+        summary = grade_assessment(assessment_id, only_ungraded=args.only_ungraded)
+
+        if not summary["questions"]:
+            return {"error": "Assessment has no gradable questions"}, 400
+
+        return {"message": "Submissions graded", "assessment_id": assessment_id, **summary}, 200
+
+
+class AssessmentCodewarsSyncResource(Resource):
+    @role_required("recruiter", body={"error": "Unauthorized"})
+    def post(self, assessment_id):
+        assessment = Assessments.query.get(assessment_id)
+
+        if not assessment or assessment.creator_id != current_user_id():
+            return {"error": "Assessment not found or permission denied"}, 404
+
+        # 🥋 One API lookup per candidate, run concurrently off the request path
+        total = count_submissions(assessment_id)
+        job = enqueue_job("codewars_sync", current_user_id(), {"assessment_id": assessment_id}, total=total)
+        return (
+            {"message": "Codewars sync started", "job_id": job.id, "total": total},
+            202,
+            {"Location": f"/jobs/{job.id}"},
+        )
+
+
+EXPORT_COLUMNS = (
+    "submission_id",
+    "name",
+    "email",
+    "submitted_at",
+    "grade",
+    "score",
+    "rank",
+    "time_taken",
+    "pass_status",
+    "is_released",
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+class AssessmentExportResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument("format", type=str, location="args", choices=("csv", "ndjson"), default="csv")
+
+    @jwt_required()
+    def get(self, assessment_id):
+        user_id = current_user_id()
+        assessment = Assessments.query.get(assessment_id)
+
+        if not assessment or assessment.creator_id != user_id:
+            return {"error": "Assessment not found or permission denied"}, 404
+
+        export_format = self.parser.parse_args()["format"]
+        statement = export_query(assessment_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        def rows():
+            # 🚰 Server-side iteration: only one batch is held in memory at a time
+            yield from db.session.execute(statement).partitions()
+
+        def csv_stream():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            for partition in rows():
+                buffer.seek(0)
+                buffer.truncate()
+                for row in partition:
+                    writer.writerow(_export_values(row, escape_formulas=True))
+                yield buffer.getvalue()
+
+        def ndjson_stream():
+            for partition in rows():
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row)))) + "\n"
+                    for row in partition
+                )
+
+        if export_format == "ndjson":
+            stream, mimetype = ndjson_stream(), "application/x-ndjson"
+        else:
+            stream, mimetype = csv_stream(), "text/csv"
+
+        return Response(
+            stream_with_context(stream),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename=assessment-{assessment_id}.{export_format}"
+            },
+        )
+
+
+def export_query(assessment_id):
+    """One row per submission with the candidate and any result, in submission order."""
+    return (
+        select(
+            Submissions.id,
+            User.name,
+            User.email,
+            Submissions.submitted_at,
+            Submissions.grade,
+            Results.score,
+            Results.rank,
+            Results.time_taken,
+            Results.pass_status,
+            Results.is_released,
+        )
+        .join(User, User.id == Submissions.user_id)
+        .outerjoin(Results, Results.submission_id == Submissions.id)
+        .where(Submissions.assessment_id == assessment_id)
+        .order_by(Submissions.id)
+    )
+
+
+# Cells a spreadsheet would evaluate as a formula when the CSV is opened
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _export_values(row, escape_formulas=False):
+    values = list(row)
+    submitted_at = values[3]
+    values[3] = submitted_at.isoformat() if submitted_at else None
+    if escape_formulas:
+        # 🛡 Candidates choose their own name, so "=HYPERLINK(...)" must stay text
+        values = [
+            f"'{value}" if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+            for value in values
+        ]
+    return values
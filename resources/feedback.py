@@ -1,42 +1,196 @@
-from flask_restful import Resource,reqparse 
-from models import Feedback, User, db
+from flask import request
+from flask_restful import Resource, reqparse
+from flask_jwt_extended import jwt_required
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
+from models import db, Assessments, Feedback, Questions, Submissions
+from utils.auth import current_user_id, role_required
+from utils.pagination import clamp_limit, decode_cursor, keyset_page
+from utils.serializers import serialize
+
+BULK_FEEDBACK_LIMIT = 200
+
+
+def feedback_query():
+    """Feedback with its question and recruiter joined into the same SELECT."""
+    return Feedback.query.options(joinedload(Feedback.question), joinedload(Feedback.recruiter))
+
+
+def recruiter_feedback_query(recruiter_id, before_id=None):
+    """A recruiter's own feedback, newest first, seeking past `before_id`."""
+    query = feedback_query().filter(Feedback.recruiter_id == recruiter_id)
+    if before_id is not None:
+        query = query.filter(Feedback.id < before_id)
+    return query.order_by(Feedback.id.desc())
+
+
+def submission_feedback_query(submission_id):
+    """Every comment on a submission, grouped by question."""
+    return (
+        feedback_query()
+        .filter(Feedback.submission_id == submission_id)
+        .order_by(Feedback.question_id, Feedback.id)
+    )
+
+
+def feedback_dict(feedback):
+    data = serialize(feedback)
+    question, recruiter = feedback.question, feedback.recruiter
+    data["question"] = {"id": question.id, "prompt": question.prompt} if question else None
+    data["recruiter"] = {"id": recruiter.id, "name": recruiter.name} if recruiter else None
+    return data
+
+
+def submission_parties(submission_id):
+    """(candidate id, assessment creator id, assessment id) for a submission, or None."""
+    return db.session.execute(
+        select(Submissions.user_id, Assessments.creator_id, Submissions.assessment_id)
+        .join(Assessments, Assessments.id == Submissions.assessment_id)
+        .where(Submissions.id == submission_id)
+    ).first()
+
 
 class FeedbackResource(Resource):
     parser = reqparse.RequestParser()
     parser.add_argument("question_id", type=int, required=True, help="question_id is required")
-    parser.add_argument("submission_id", type=int, required=False, help="submission_id is required")
-    parser.add_argument("recruiter_name", type=str, required=True, help="recruiter_name is required")
+    parser.add_argument("submission_id", type=int, required=False)
     parser.add_argument("comment", type=str, required=True, help="comment is required")
 
-    def get(self, id=None):  
-      if id is None:
-        feedbacks = Feedback.query.all()
-        return [feedback.to_dict() for feedback in feedbacks], 200  
-      else:
-        feedback = Feedback.query.filter_by(id=id).first()
-        if feedback:
-            return feedback.to_dict(), 200
-        return {"error": "Feedback not found"}, 404
+    list_parser = reqparse.RequestParser()
+    list_parser.add_argument("limit", type=int, location="args")
+    list_parser.add_argument("cursor", type=str, location="args")
+
+    @jwt_required()
+    def get(self, id=None):
+        user_id = current_user_id()
+        if id is None:
+            return self._list(user_id)
+
+        feedback = feedback_query().filter(Feedback.id == id).first()
+        if not feedback:
+            return {"error": "Feedback not found"}, 404
+        # 🔒 Its author, the assessment's recruiter and the candidate it is about
+        if feedback.recruiter_id != user_id:
+            parties = submission_parties(feedback.submission_id) if feedback.submission_id else None
+            if not parties or user_id not in (parties.user_id, parties.creator_id):
+                return {"error": "Unauthorized to view this feedback"}, 403
+        return feedback_dict(feedback), 200
+
+    def _list(self, user_id):
+        """The calling recruiter's own feedback, newest first, one keyset page at a time."""
+        args = self.list_parser.parse_args()
+        limit = clamp_limit(args["limit"])
+
+        before_id = None
+        if args["cursor"]:
+            try:
+                (before_id,) = decode_cursor(args["cursor"])
+            except (TypeError, ValueError):
+                return {"error": "Invalid cursor"}, 400
 
+        feedbacks = recruiter_feedback_query(user_id, before_id).limit(limit + 1).all()
+        feedbacks, headers = keyset_page(feedbacks, limit, key=lambda f: (f.id,))
+        return [feedback_dict(f) for f in feedbacks], 200, headers
+
+    @role_required("recruiter", body={"error": "Unauthorized"})
     def post(self):
+        user_id = current_user_id()
         data = FeedbackResource.parser.parse_args()
 
-        recruiter = User.query.filter_by(name=data["recruiter_name"], role="recruiter").first()
-
-        if not recruiter:
-            return {"error": "Recruiter not found"}, 403
+        # 👤 The recruiter is whoever holds the token, not a name in the body
+        question = db.session.execute(
+            select(Questions.assessment_id, Assessments.creator_id)
+            .join(Assessments, Assessments.id == Questions.assessment_id)
+            .where(Questions.id == data["question_id"])
+        ).first()
+        if not question or question.creator_id != user_id:
+            return {"error": "Question not found or permission denied"}, 404
 
-        if not recruiter:
-            return {"error": "Recruiter not found"}, 404
+        if data["submission_id"] is not None:
+            parties = submission_parties(data["submission_id"])
+            if not parties or parties.assessment_id != question.assessment_id:
+                return {"error": "Submission is not for this question's assessment"}, 400
 
         feedback = Feedback(
             question_id=data["question_id"],
             submission_id=data["submission_id"],
-            recruiter_id=recruiter.id,
-            comment=data["comment"]
+            recruiter_id=user_id,
+            comment=data["comment"],
         )
-
         db.session.add(feedback)
         db.session.commit()
 
-        return (feedback.to_dict())
\ No newline at end of file
+        return feedback_dict(feedback), 201
+
+
+class SubmissionFeedbackResource(Resource):
+    @jwt_required()
+    def get(self, submission_id):
+        user_id = current_user_id()
+        parties = submission_parties(submission_id)
+        if not parties:
+            return {"error": "Submission not found"}, 404
+        if user_id not in (parties.user_id, parties.creator_id):
+            return {"error": "Unauthorized to view this feedback"}, 403
+
+        feedbacks = submission_feedback_query(submission_id).all()
+        return [feedback_dict(f) for f in feedbacks], 200
+
+    @role_required("recruiter", body={"error": "Unauthorized"})
+    def post(self, submission_id):
+        """Comment on many questions of one submission in a single transaction.
+
+        Body: {"feedback": [{"question_id": 1, "comment": "..."}, ...]}
+        """
+        user_id = current_user_id()
+        entries = (request.get_json(silent=True) or {}).get("feedback")
+        if not isinstance(entries, list) or not entries:
+            return {"error": "feedback must be a non-empty list"}, 400
+        if len(entries) > BULK_FEEDBACK_LIMIT:
+            return {"error": f"At most {BULK_FEEDBACK_LIMIT} comments per request"}, 400
+
+        parties = submission_parties(submission_id)
+        if not parties:
+            return {"error": "Submission not found"}, 404
+        if parties.creator_id != user_id:
+            return {"error": "Unauthorized to review this submission"}, 403
+
+        rows = []
+        for index, entry in enumerate(entries):
+            entry = entry if isinstance(entry, dict) else {}
+            question_id, comment = entry.get("question_id"), entry.get("comment")
+            # bool is an int subclass, so True would otherwise pass as question 1
+            valid_id = isinstance(question_id, int) and not isinstance(question_id, bool)
+            if not valid_id or not isinstance(comment, str) or not comment.strip():
+                return {"error": f"feedback[{index}] needs an integer question_id and a comment"}, 400
+            rows.append(
+                {
+                    "question_id": question_id,
+                    "submission_id": submission_id,
+                    "recruiter_id": user_id,
+                    "comment": comment,
+                }
+            )
+
+        # 🔎 Every question is checked against the assessment in one query
+        wanted = {row["question_id"] for row in rows}
+        known = set(
+            db.session.scalars(
+                select(Questions.id).where(
+                    Questions.assessment_id == parties.assessment_id, Questions.id.in_(wanted)
+                )
+            )
+        )
+        if wanted - known:
+            return {
+                "error": "Some questions are not part of this assessment",
+                "question_ids": sorted(wanted - known),
+            }, 400
+
+        ids = db.session.scalars(
+            insert(Feedback).returning(Feedback.id, sort_by_parameter_order=True), rows
+        ).all()
+        db.session.commit()
+
+        feedbacks = feedback_query().filter(Feedback.id.in_(ids)).order_by(Feedback.id).all()
+        return [feedback_dict(f) for f in feedbacks], 201
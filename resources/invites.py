@@ -1,61 +1,142 @@
 from datetime import datetime, timedelta
-from flask_restful import Resource, reqparse
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_mail import Message
-from flask import current_app
-from models import db, User, Invites, Assessments
+from flask_restful import Resource, reqparse, inputs
+from flask_jwt_extended import jwt_required
+from flask import request
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import joinedload
+from models import db, User, Invites, Assessments, MailOutbox
+import hmac
 import os
 import secrets
-from utils.notification import create_notification
+from utils.notification import create_notification, create_notifications
+from utils.mail_outbox import enqueue_email
+from utils.invite_emails import invitation_email, invite_url_for
+from utils.invite_tokens import (
+    ExpiredInviteToken,
+    InvalidInviteToken,
+    accept_outcomes,
+    sign_invite_token,
+    verify_invite_token,
+)
+from utils.serializers import compile_serializer, serialize_many
+from utils.auth import USER_GONE, current_user, current_user_id, role_required
+from utils import assessment_stats
+
+BULK_INVITE_LIMIT = 5000
+LOOKUP_CHUNK_SIZE = 500
+MAX_INVITE_DAYS = 365
+expiry_days = inputs.int_range(1, MAX_INVITE_DAYS, "expires_in_days")
+
+# 📋 The invite list nests its people and assessment one level deep, columns only:
+# no profiles, no assessment notifications and no password hashes
+_invite_columns = compile_serializer(Invites, {"recruiter", "interviewee", "assessment"})
+_person = compile_serializer(User, {"password", "profiles"})
+_assessment_summary = compile_serializer(Assessments, {"notifications"})
+
+
+def invite_dict(invite):
+    data = _invite_columns(invite)
+    data["recruiter"] = _person(invite.recruiter) if invite.recruiter else None
+    data["interviewee"] = _person(invite.interviewee) if invite.interviewee else None
+    data["assessment"] = _assessment_summary(invite.assessment) if invite.assessment else None
+    return data
+
+
+def recruiter_invites_query(recruiter_id):
+    """A recruiter's invites, newest first, with both people and the assessment joined in."""
+    return (
+        Invites.query.filter_by(recruiter_id=recruiter_id)
+        .options(
+            joinedload(Invites.recruiter),
+            joinedload(Invites.interviewee),
+            joinedload(Invites.assessment),
+        )
+        .order_by(Invites.sent_at.desc())
+    )
+
+
+def pending_invitees_query(assessment_id, interviewee_ids):
+    """Which of `interviewee_ids` already hold a pending invite to the assessment."""
+    return select(Invites.interviewee_id).where(
+        Invites.assessment_id == assessment_id,
+        Invites.status == "pending",
+        Invites.interviewee_id.in_(interviewee_ids),
+    )
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
 
 
 class InviteResource(Resource):
     @jwt_required()
     def get(self, invite_id):
-        current_user_id = int(get_jwt_identity())
-        invite = Invites.query.get_or_404(invite_id)
+        user_id = current_user_id()
+        invite = (
+            Invites.query.options(
+                joinedload(Invites.recruiter),
+                joinedload(Invites.interviewee),
+                joinedload(Invites.assessment),
+            )
+            .filter(Invites.id == invite_id)
+            .first_or_404()
+        )
 
         if (
-            invite.recruiter_id != current_user_id
-            and invite.interviewee_id != current_user_id
+            invite.recruiter_id != user_id
+            and invite.interviewee_id != user_id
         ):
             return {"message": "Unauthorized"}, 403
 
-        return invite.to_dict(), 200
+        return invite_dict(invite), 200
 
 
-class InviteListResource(Resource):
-    invite_parser = reqparse.RequestParser()
-    invite_parser.add_argument("assessment_id", type=int, required=True)
-    invite_parser.add_argument("interviewee_email", type=str, required=True)
-    invite_parser.add_argument("expires_in_days", type=int, default=7)
-
+class InviteDeliveryResource(Resource):
     @jwt_required()
-    def get(self):
-        current_user_id = int(get_jwt_identity())
-        recruiter = User.query.get(current_user_id)
+    def get(self, invite_id):
+        user_id = current_user_id()
+        invite = Invites.query.get_or_404(invite_id)
 
-        if not recruiter or recruiter.role != "recruiter":
+        if invite.recruiter_id != user_id:
             return {"message": "Unauthorized"}, 403
 
-        invites = (
-            Invites.query.filter_by(recruiter_id=current_user_id)
-            .order_by(Invites.sent_at.desc())
+        emails = (
+            MailOutbox.query.filter_by(invite_id=invite_id)
+            .order_by(MailOutbox.id)
             .all()
         )
-        return [invite.to_dict() for invite in invites], 200
+        return {
+            "invite_id": invite_id,
+            "emails": serialize_many(emails),
+        }, 200
 
-    @jwt_required()
+
+class InviteListResource(Resource):
+    invite_parser = reqparse.RequestParser()
+    invite_parser.add_argument("assessment_id", type=int, required=True)
+    invite_parser.add_argument("interviewee_email", type=str, required=True)
+    invite_parser.add_argument("expires_in_days", type=expiry_days, default=7)
+
+    @role_required("recruiter")
+    def get(self):
+        user_id = current_user_id()
+        invites = recruiter_invites_query(user_id).all()
+        return [invite_dict(invite) for invite in invites], 200
+
+    @role_required("recruiter")
     def post(self):
-        current_user_id = int(get_jwt_identity())
+        user_id = current_user_id()
         data = self.invite_parser.parse_args()
 
-        recruiter = User.query.get(current_user_id)
-        if not recruiter or recruiter.role != "recruiter":
-            return {"message": "Unauthorized"}, 403
+        # ✉️ The emails name the recruiter, so load their row before writing anything
+        mail_enabled = os.getenv("MAIL_ENABLED", "true").lower() == "true"
+        recruiter = current_user() if mail_enabled else None
+        if mail_enabled and recruiter is None:
+            return USER_GONE
 
         assessment = Assessments.query.filter_by(
-            id=data["assessment_id"], creator_id=current_user_id
+            id=data["assessment_id"], creator_id=user_id
         ).first()
 
         if not assessment:
@@ -70,74 +151,55 @@ class InviteListResource(Resource):
                 "message": "Interviewee not found. Please ensure they are registered"
             }, 404
 
-        token = secrets.token_urlsafe(32)
-        expires_at = datetime.utcnow() + timedelta(days=data["expires_in_days"])
+        # Whole seconds, so the expiry signed into the token matches the row
+        expires_at = (datetime.utcnow() + timedelta(days=data["expires_in_days"])).replace(microsecond=0)
 
         invite = Invites(
-            recruiter_id=current_user_id,
+            recruiter_id=user_id,
             interviewee_id=interviewee.id,
             assessment_id=assessment.id,
             status="pending",
-            token=token,
             expires_at=expires_at,
             sent_at=datetime.utcnow(),
         )
 
         db.session.add(invite)
-        db.session.commit()
+        db.session.flush()
+        # 🔏 The token carries the invite id, so it can only be signed once the row has one
+        token = sign_invite_token(invite.id, expires_at)
+        invite.token = token
+        assessment_stats.record_invites(assessment.id)
 
         # 🔔 Send in-app notifications
         create_notification(
-            current_user_id,
+            user_id,
             f"Invite sent to {interviewee.email} for '{assessment.title}'",
         )
         create_notification(
             interviewee.id, f"You’ve been invited to complete '{assessment.title}'"
         )
 
-        # ✉️ Send email if enabled
-        if os.getenv("MAIL_ENABLED", "true").lower() == "true":
-            try:
-                frontend_url = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
-                invite_url = f"{frontend_url}/invites/accept?token={token}"
-
-                subject_i = "Assessment Invitation"
-                body_i = f"""Hello {interviewee.name or interviewee.email},
+        # ✉️ Queue emails; the outbox worker delivers them off the request path
+        if mail_enabled:
+            invite_url = invite_url_for(token)
 
-You have been invited to take: {assessment.title}.
-Accept here: {invite_url}
-
-This invite expires on {expires_at.strftime("%Y-%m-%d %H:%M UTC")}.
-Best,
-{recruiter.name or "Your recruiter"}
-"""
-                msg_i = Message(
-                    subject=subject_i, recipients=[interviewee.email], body=body_i
-                )
-                current_app.extensions["mail"].send(msg_i)
+            subject_i, body_i = invitation_email(
+                interviewee, recruiter, assessment, invite_url, expires_at
+            )
+            enqueue_email(interviewee.email, subject_i, body_i, invite_id=invite.id)
 
-                subject_r = "Invitation Sent"
-                body_r = f"""Hello {recruiter.name or "Recruiter"},
+            subject_r = "Invitation Sent"
+            body_r = f"""Hello {recruiter.name or "Recruiter"},
 
 You successfully invited {interviewee.name or interviewee.email}
 to assessment: {assessment.title}.
 Invite URL: {invite_url}
 Expires on: {expires_at.strftime("%Y-%m-%d %H:%M UTC")}
 """
-                msg_r = Message(
-                    subject=subject_r, recipients=[recruiter.email], body=body_r
-                )
-                current_app.extensions["mail"].send(msg_r)
-
-            except Exception as e:
-                return {
-                    "message": f"Invite created but email failed to send: {str(e)}",
-                    "invite": {
-                        "id": invite.id,
-                        "token": token,
-                        "expires_at": expires_at.isoformat(),
-                    },
-                }, 202
+            enqueue_email(recruiter.email, subject_r, body_r, invite_id=invite.id)
+
+        # Invite, notifications and emails land in one commit
+        db.session.commit()
 
         return {
             "message": "Invite created successfully",
@@ -149,40 +211,232 @@ Expires on: {expires_at.strftime("%Y-%m-%d %H:%M UTC")}
         }, 201
 
 
+class InviteBulkResource(Resource):
+    @role_required("recruiter")
+    def post(self):
+        user_id = current_user_id()
+        data = request.get_json() or {}
+        assessment_id = data.get("assessment_id")
+        emails = data.get("emails")
+
+        if not assessment_id or not isinstance(emails, list) or not emails:
+            return {"message": "assessment_id and a list of emails are required"}, 400
+        try:
+            expires_in_days = expiry_days(data.get("expires_in_days", 7))
+        except ValueError as exc:
+            return {"message": str(exc)}, 400
+        if len(emails) > BULK_INVITE_LIMIT:
+            return {"message": f"At most {BULK_INVITE_LIMIT} emails per request"}, 400
+
+        # ✉️ The emails name the recruiter, so load their row before writing anything
+        mail_enabled = os.getenv("MAIL_ENABLED", "true").lower() == "true"
+        recruiter = current_user() if mail_enabled else None
+        if mail_enabled and recruiter is None:
+            return USER_GONE
+
+        assessment = Assessments.query.filter_by(
+            id=assessment_id, creator_id=user_id
+        ).first()
+        if not assessment:
+            return {"message": "Assessment not found or permission denied"}, 404
+
+        # Keep request order, drop duplicates and blanks
+        wanted = list(dict.fromkeys(e.strip() for e in emails if isinstance(e, str) and e.strip()))
+
+        # 🔎 One set-based lookup per chunk instead of one query per email
+        interviewees = {}
+        for chunk in chunked(wanted, LOOKUP_CHUNK_SIZE):
+            for user in User.query.filter(
+                User.email.in_(chunk), User.role == "interviewee"
+            ):
+                interviewees[user.email] = user
+
+        already_invited = set()
+        interviewee_ids = [u.id for u in interviewees.values()]
+        for chunk in chunked(interviewee_ids, LOOKUP_CHUNK_SIZE):
+            already_invited.update(db.session.scalars(pending_invitees_query(assessment.id, chunk)))
+
+        now = datetime.utcnow()
+        expires_at = (now + timedelta(days=expires_in_days)).replace(microsecond=0)
+        to_invite = [
+            interviewees[email]
+            for email in wanted
+            if email in interviewees and interviewees[email].id not in already_invited
+        ]
+        # Placeholders that match rows back to candidates until the ids are known
+        placeholders = [secrets.token_urlsafe(16) for _ in to_invite]
+
+        created = {}
+        if to_invite:
+            rows = db.session.execute(
+                insert(Invites).returning(Invites.id, Invites.token),
+                [
+                    {
+                        "recruiter_id": user_id,
+                        "interviewee_id": user.id,
+                        "assessment_id": assessment.id,
+                        "status": "pending",
+                        "token": placeholder,
+                        "expires_at": expires_at,
+                        "sent_at": now,
+                    }
+                    for user, placeholder in zip(to_invite, placeholders)
+                ],
+            )
+            placeholder_ids = {row.token: row.id for row in rows}
+
+            # 🔏 Sign each token with its invite id and swap it in with one executemany
+            tokens = [sign_invite_token(placeholder_ids[p], expires_at) for p in placeholders]
+            invite_ids = {token: placeholder_ids[p] for token, p in zip(tokens, placeholders)}
+            db.session.execute(
+                update(Invites),
+                [{"id": invite_id, "token": token} for token, invite_id in invite_ids.items()],
+            )
+            assessment_stats.record_invites(assessment.id, count=len(to_invite))
+            created = {
+                user.email: (invite_ids[token], token)
+                for user, token in zip(to_invite, tokens)
+            }
+
+            # 🔔 One notification per candidate plus a single summary for the recruiter
+            create_notifications(
+                [
+                    {
+                        "user_id": user.id,
+                        "text": f"You’ve been invited to complete '{assessment.title}'",
+                        "assessment_id": assessment.id,
+                        "timestamp": now,
+                    }
+                    for user in to_invite
+                ]
+                + [
+                    {
+                        "user_id": user_id,
+                        "text": f"Invites sent to {len(to_invite)} candidates for '{assessment.title}'",
+                        "assessment_id": assessment.id,
+                        "timestamp": now,
+                    }
+                ]
+            )
+
+            # ✉️ Queue all invitation emails in the same transaction
+            if mail_enabled:
+                email_rows = []
+                for user, token in zip(to_invite, tokens):
+                    subject, body = invitation_email(
+                        user, recruiter, assessment, invite_url_for(token), expires_at
+                    )
+                    email_rows.append(
+                        {
+                            "invite_id": invite_ids[token],
+                            "recipient": user.email,
+                            "subject": subject,
+                            "body": body,
+                            "status": "queued",
+                            "attempts": 0,
+                            "next_attempt_at": now,
+                            "created_at": now,
+                        }
+                    )
+                db.session.execute(insert(MailOutbox), email_rows)
+
+        db.session.commit()
+
+        results = []
+        for email in wanted:
+            if email in created:
+                invite_id, token = created[email]
+                results.append(
+                    {"email": email, "status": "invited", "invite_id": invite_id, "token": token}
+                )
+            elif email not in interviewees:
+                results.append({"email": email, "status": "not_found"})
+            else:
+                results.append({"email": email, "status": "already_invited"})
+
+        return {
+            "message": f"{len(created)} invites created",
+            "assessment_id": assessment.id,
+            "expires_at": expires_at.isoformat(),
+            "invited": len(created),
+            "skipped": len(results) - len(created),
+            "results": results,
+        }, 201
+
+
 class InviteAcceptanceResource(Resource):
     @jwt_required()
     def patch(self, token):
-        current_user_id = int(get_jwt_identity())
+        user_id = current_user_id()
+
+        # ♻️ Repeat attempts on a spent or unknown token are answered from memory
+        cached = accept_outcomes.get(token)
+        if cached:
+            interviewee_id, body, status = cached
+            if interviewee_id is not None and interviewee_id != user_id:
+                return {"message": "You are not authorized to accept this invite"}, 403
+            return body, status
+
+        # 🔏 Forged, malformed and expired signed tokens never reach the database
+        try:
+            invite_id = verify_invite_token(token)
+        except ExpiredInviteToken:
+            return {"message": "This invitation has expired"}, 400
+        except InvalidInviteToken:
+            return {"message": "Invalid invitation token"}, 404
+
+        if invite_id is None:
+            # Random tokens issued before signing, looked up the old way
+            invite = Invites.query.filter_by(token=token).first()
+        else:
+            invite = db.session.get(Invites, invite_id)
+            if invite and not hmac.compare_digest(invite.token or "", token):
+                invite = None
 
-        invite = Invites.query.filter_by(token=token).first()
         if not invite:
-            return {"message": "Invalid invitation token"}, 404
+            body = {"message": "Invalid invitation token"}
+            accept_outcomes.remember(token, None, body, 404)
+            return body, 404
 
-        if invite.interviewee_id != current_user_id:
+        if invite.interviewee_id != user_id:
             return {"message": "You are not authorized to accept this invite"}, 403
 
         if invite.status != "pending":
-            return {"message": "This invitation has already been processed"}, 400
-
-        if datetime.now() > invite.expires_at:
+            body = {"message": "This invitation has already been processed"}
+            accept_outcomes.remember(token, invite.interviewee_id, body, 400)
+            return body, 400
+
+        # expires_at is written in UTC, as the expiry sweeper compares it
+        if datetime.utcnow() > invite.expires_at:
+            invite.status = "expired"
+            assessment_stats.record_invites(invite.assessment_id, "pending", "expired")
+            db.session.commit()
+            accept_outcomes.remember(
+                token, invite.interviewee_id, {"message": "This invitation has expired"}, 400
+            )
             return {"message": "This invitation has expired"}, 400
 
         invite.status = "accepted"
-        invite.accepted_at = datetime.now()
-        db.session.commit()
+        assessment_stats.record_invites(invite.assessment_id, "pending", "accepted")
+        invite.accepted_at = datetime.utcnow()
 
-        # 🗓 Notify interviewee of assessment time window
+        # 🗓 Notify interviewee of the assessment time limit
         assessment = Assessments.query.get(invite.assessment_id)
         if assessment:
-            start_str = assessment.start_time.strftime("%Y-%m-%d %H:%M")
-            end_str = assessment.end_time.strftime("%H:%M")
-            message = (
-                f"You’ve accepted the invite to '{assessment.title}'.\n"
-                f"Time: {start_str} to {end_str}"
-            )
+            message = f"You’ve accepted the invite to '{assessment.title}'."
+            if assessment.time_limit:
+                message += f"\nTime limit: {assessment.time_limit} minutes"
             create_notification(
                 invite.interviewee_id, message, assessment_id=assessment.id
             )
+        db.session.commit()
+        accept_outcomes.remember(
+            token,
+            invite.interviewee_id,
+            {"message": "This invitation has already been processed"},
+            400,
+        )
+
         return {
             "message": "Invitation accepted successfully",
             "assessment_id": invite.assessment_id,
@@ -0,0 +1,18 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from models import db, Job
+from utils.auth import current_user_id
+from utils.serializers import serialize
+
+
+class JobResource(Resource):
+    @jwt_required()
+    def get(self, job_id):
+        job = db.session.get(Job, job_id)
+
+        if not job or job.owner_id != current_user_id():
+            return {"message": "Job not found"}, 404
+
+        data = serialize(job)
+        data["progress"] = round(job.processed / job.total, 4) if job.total else None
+        return data, 200
@@ -0,0 +1,17 @@
+import hmac
+import os
+
+from flask import Response, request
+from flask_restful import Resource
+
+from utils.metrics import registry
+
+
+class MetricsResource(Resource):
+    def get(self):
+        # 🔒 Optional bearer token so the scrape endpoint is not public
+        token = os.getenv("METRICS_TOKEN")
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return {"message": "Unauthorized"}, 401
+
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -1,31 +1,140 @@
 # resources/notification.py
 
-from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import queue
+import time
+from datetime import datetime
+from flask import Response, current_app, request
+from flask_restful import Resource, reqparse, inputs
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_request_location
+from sqlalchemy import tuple_
 from models import db, Notification
+from utils.pagination import clamp_limit, decode_cursor, keyset_page
+from utils.notification_stream import broker, format_event
+from utils.auth import STREAM_SCOPE, current_user_id, issue_stream_token
+
+RESUME_BACKLOG_LIMIT = 100
+
+
+def notification_feed_query(user_id, unread_only=False, before=None):
+    """A user's notifications, newest first, seeking past the `(timestamp, id)` in `before`."""
+    query = Notification.query.filter_by(user_id=user_id)
+    if unread_only:
+        query = query.filter(Notification.read == False)  # noqa: E712
+    if before:
+        query = query.filter(tuple_(Notification.timestamp, Notification.id) < before)
+    return query.order_by(Notification.timestamp.desc(), Notification.id.desc())
+
+
+def missed_notifications_query(user_id, last_id):
+    """What a reconnecting stream missed after event `last_id`, oldest first."""
+    return (
+        Notification.query.filter(Notification.user_id == user_id, Notification.id > last_id)
+        .order_by(Notification.id)
+        .limit(RESUME_BACKLOG_LIMIT)
+    )
 
 
 class NotificationListResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument("limit", type=int, location="args")
+    parser.add_argument("cursor", type=str, location="args")
+    parser.add_argument("unread_only", type=inputs.boolean, location="args", default=False)
+
     @jwt_required()
     def get(self):
-        user_id = int(get_jwt_identity())
+        user_id = current_user_id()
+        args = self.parser.parse_args()
+        limit = clamp_limit(args["limit"])
+
+        # 📄 Keyset pagination on (timestamp, id): the next page seeks past the cursor
+        before = None
+        if args["cursor"]:
+            try:
+                timestamp, last_id = decode_cursor(args["cursor"])
+                before = (datetime.fromisoformat(timestamp), last_id)
+            except (TypeError, ValueError):
+                return {"message": "Invalid cursor"}, 400
+
         notifications = (
-            Notification.query.filter_by(user_id=user_id)
-            .order_by(Notification.timestamp.desc())
-            .all()
+            notification_feed_query(user_id, args["unread_only"], before).limit(limit + 1).all()
+        )
+        notifications, headers = keyset_page(
+            notifications, limit, key=lambda n: (n.timestamp, n.id)
         )
-        return [n.to_dict() for n in notifications], 200
+        return [n.to_dict() for n in notifications], 200, headers
+
+
 
 
+class NotificationStreamTokenResource(Resource):
+    @jwt_required()
+    def post(self):
+        """Trade the session token for one that can go in the EventSource URL."""
+        ttl = current_app.config.get("NOTIFICATION_STREAM_TOKEN_TTL", 60)
+        return {"token": issue_stream_token(current_user_id(), ttl), "expires_in": ttl}, 201
+
+
+class NotificationStreamResource(Resource):
+    # EventSource cannot send headers; URLs end up in logs, so ?jwt= takes stream tokens only
+    @jwt_required(locations=["headers", "query_string"])
+    def get(self):
+        if get_jwt_request_location() == "query_string" and get_jwt().get("scope") != STREAM_SCOPE:
+            return {"message": "Use a token from POST /notifications/stream-token in the query string"}, 401
+        user_id = current_user_id()
+        heartbeat = current_app.config.get("NOTIFICATION_STREAM_HEARTBEAT", 15)
+        max_age = current_app.config.get("NOTIFICATION_STREAM_MAX_AGE", 300)
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+
+        try:
+            last_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return {"message": "Invalid Last-Event-ID"}, 400
+
+        # Subscribe before reading the backlog so nothing slips in between
+        subscriber = broker.subscribe(user_id)
+
+        backlog = []
+        if last_id is not None:
+            backlog = [n.to_dict() for n in missed_notifications_query(user_id, last_id)]
+        db.session.remove()
+
+        def stream():
+            sent_id = last_id or 0
+            deadline = time.monotonic() + max_age
+            try:
+                yield f"retry: {heartbeat * 1000}\n\n"
+                for payload in backlog:
+                    sent_id = max(sent_id, payload["id"])
+                    yield format_event(payload)
+
+                # 💤 Idle clients just block on their queue until a heartbeat is due
+                while time.monotonic() < deadline:
+                    try:
+                        payload = subscriber.get(timeout=heartbeat)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if payload["id"] <= sent_id:
+                        continue
+                    sent_id = payload["id"]
+                    yield format_event(payload)
+            finally:
+                broker.unsubscribe(user_id, subscriber)
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
 
 class NotificationReadResource(Resource):
     @jwt_required()
     def patch(self, notification_id):
-        current_user_id = int(get_jwt_identity())
+        user_id = current_user_id()
         notification = Notification.query.get_or_404(notification_id)
 
-        if notification.user_id != current_user_id:
+        if notification.user_id != user_id:
             return {"message": "Unauthorized"}, 403
 
         if notification.read:
@@ -1,6 +1,7 @@
 from flask_restful import Resource, reqparse
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Profile, User, db
+from flask_jwt_extended import jwt_required
+from models import Profile, db
+from utils.auth import current_user, current_user_id
 
 
 def nullable_str(value):
@@ -19,10 +20,10 @@ class ProfileResource(Resource):
 
     @jwt_required()
     def get(self, id):
-        current_user_id = get_jwt_identity()
+        user_id = current_user_id()
 
         if id == "self":
-            profile = Profile.query.filter_by(user_id=current_user_id).first()
+            profile = Profile.query.filter_by(user_id=user_id).first()
         else:
             profile = Profile.query.filter_by(id=id).first()
 
@@ -33,20 +34,20 @@ class ProfileResource(Resource):
 
     @jwt_required()
     def post(self):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user_id = current_user_id()
+        user = current_user()
 
         if not user:
-            return {"error": "Unauthorized. User not found."}, 404
+            return {"error": "Unauthorized. User not found."}, 401
 
-        existing = Profile.query.filter_by(user_id=current_user_id).first()
+        existing = Profile.query.filter_by(user_id=user_id).first()
         if existing:
             return {"error": "Profile already exists."}, 400
 
         data = self.parser.parse_args()
 
         profile = Profile(
-            user_id=current_user_id,
+            user_id=user_id,
             name=data.get("name"),
             company=data.get("company"),
             role=data.get("role"),
@@ -63,11 +64,11 @@ class ProfileResource(Resource):
 
     @jwt_required()
     def patch(self, id):
-        current_user_id = get_jwt_identity()
+        user_id = current_user_id()
         
 
         if id == "self":
-            profile = Profile.query.filter_by(user_id=current_user_id).first()
+            profile = Profile.query.filter_by(user_id=user_id).first()
         else:
             profile = Profile.query.get(id)
 
@@ -1,27 +1,34 @@
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy import tuple_
 from models import db, Results, Submissions, Assessments, User
+from utils.pagination import clamp_limit, decode_cursor, keyset_page
+from utils.ranking import refresh_ranks
+from utils.serializers import serialize_many
+from utils.auth import current_user_id, role_required
+from utils import assessment_stats
+
+
+def released_results_query(user_id):
+    """Results of a candidate's own submissions that the recruiter has released."""
+    return Results.query.join(Submissions).filter(
+        Submissions.user_id == user_id, Results.is_released == True  # noqa: E712
+    )
 
 
 class IntervieweeResultsResource(Resource):
     @jwt_required()
     def get(self):
-        user_id = int(get_jwt_identity())
+        user_id = current_user_id()
 
-        results = (
-            Results.query.join(Submissions)
-            .filter(Submissions.user_id == user_id, Results.is_released == True)
-            .all()
-        )
-
-        return [r.to_dict() for r in results], 200
+        return serialize_many(released_results_query(user_id).all()), 200
 
 
 class ResultReleaseResource(Resource):
     @jwt_required()
     def patch(self, result_id):
-        recruiter_id = int(get_jwt_identity())
+        recruiter_id = current_user_id()
         result = Results.query.get_or_404(result_id)
 
         # Confirm this recruiter owns the assessment
@@ -38,13 +45,12 @@ class ResultReleaseResource(Resource):
 class ResultCreateOrUpdateResource(Resource):
     @jwt_required()
     def post(self):
-        recruiter_id = int(get_jwt_identity())
+        recruiter_id = current_user_id()
         data = request.get_json()
 
         submission_id = data.get("submission_id")
         score = data.get("score")
         time_taken = data.get("time_taken", None)
-        rank = data.get("rank", None)
         pass_status = data.get("pass_status", False)
         is_released = data.get("is_released", False)
         feedback_summary = data.get("feedback_summary", "")
@@ -63,50 +69,88 @@ class ResultCreateOrUpdateResource(Resource):
 
         if existing:
             # Update existing result
+            assessment_stats.record_result(
+                submission.assessment_id, old_passed=existing.pass_status, new_passed=pass_status
+            )
             existing.score = score
             existing.time_taken = time_taken
-            existing.rank = rank
+            existing.assessment_id = submission.assessment_id
             existing.pass_status = pass_status
             existing.is_released = is_released
             existing.feedback_summary = feedback_summary
+            db.session.flush()
+            # 🏅 Ranks are derived from scores, only this assessment's partition moves
+            refresh_ranks(submission.assessment_id)
             db.session.commit()
             return {"message": "Result updated", "result": existing.to_dict()}, 200
         else:
             # Create new result
             result = Results(
                 submission_id=submission_id,
+                assessment_id=submission.assessment_id,
                 score=score,
                 time_taken=time_taken,
-                rank=rank,
                 pass_status=pass_status,
                 is_released=is_released,
                 feedback_summary=feedback_summary,
             )
 
             db.session.add(result)
+            db.session.flush()
+            assessment_stats.record_result(submission.assessment_id, new_passed=pass_status, created=True)
+            refresh_ranks(submission.assessment_id)
             db.session.commit()
             return {"message": "Result created", "result": result.to_dict()}, 201
 
+def ranking_query(recruiter_id, assessment_id=None, after=None):
+    """Ranked results on a recruiter's assessments, seeking past the (assessment_id, rank, id) in `after`."""
+    # 📊 Stored ranks are kept current on write, so this is a range scan on
+    # (assessment_id, rank) over the recruiter's own assessments
+    query = (
+        db.session.query(Results, User.name)
+        .join(Assessments, Assessments.id == Results.assessment_id)
+        .join(Submissions, Results.submission_id == Submissions.id)
+        .join(User, User.id == Submissions.user_id)
+        .filter(Assessments.creator_id == recruiter_id)
+    )
+    if assessment_id:
+        query = query.filter(Results.assessment_id == assessment_id)
+    if after:
+        query = query.filter(tuple_(Results.assessment_id, Results.rank, Results.id) > after)
+    # Assessments.id (== Results.assessment_id) keeps the join in index order, with no sort
+    return query.order_by(Assessments.id, Results.rank, Results.id)
+
+
 class IntervieweeRankingResource(Resource):
-    @jwt_required()
+    parser = reqparse.RequestParser()
+    parser.add_argument("assessment_id", type=int, location="args")
+    parser.add_argument("limit", type=int, location="args")
+    parser.add_argument("cursor", type=str, location="args")
+
+    @role_required("recruiter", body={"error": "Unauthorized"})
     def get(self):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-
-        if user.role != "recruiter":
-            return {"error": "Unauthorized"}, 403
-
-        ranked = (
-            db.session.query(Results, User.name)
-            .join(Submissions, Results.submission_id == Submissions.id)
-            .join(User, User.id == Submissions.user_id)
-            .order_by(Results.score.desc())
-            .all()
+        user_id = current_user_id()
+        args = self.parser.parse_args()
+        limit = clamp_limit(args["limit"])
+
+        after = None
+        if args["cursor"]:
+            try:
+                last_assessment_id, last_rank, last_id = decode_cursor(args["cursor"])
+            except (TypeError, ValueError):
+                return {"message": "Invalid cursor"}, 400
+            after = (last_assessment_id, last_rank, last_id)
+
+        ranked = ranking_query(user_id, args["assessment_id"], after).limit(limit + 1).all()
+        ranked, headers = keyset_page(
+            ranked, limit, key=lambda row: (row[0].assessment_id, row[0].rank, row[0].id)
         )
 
         return [
             {
                 "name": name,
+                "assessment_id": result.assessment_id,
+                "submission_id": result.submission_id,
                 "score": result.score,
                 "rank": result.rank,
                 "pass_status": result.pass_status,
@@ -115,4 +159,4 @@ class IntervieweeRankingResource(Resource):
                 "feedback_summary": result.feedback_summary,
             }
             for result, name in ranked
-        ], 200
\ No newline at end of file
+        ], 200, headers
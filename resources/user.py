@@ -1,15 +1,21 @@
 from flask_restful import Resource, reqparse
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from models import db, User,Assessments
-from flask_bcrypt import generate_password_hash, check_password_hash
+from flask_jwt_extended import jwt_required
+from collections import defaultdict
+from sqlalchemy import distinct, func, select
+from models import db, User,Assessments, AssessmentStats, AssessmentScoreBucket, Invites
+from utils.passwords import PasswordHasherBusy, hash_password, needs_rehash, verify_password
+from sqlalchemy.orm import selectinload
+from utils.serializers import serialize_many
+from utils.auth import current_user_id, issue_token
+from utils.assessment_stats import COUNTERS, INVITE_COUNTERS, median_from_buckets
 
 
 
 
 class UserListResource(Resource):
     def get(self):
-        users = User.query.all()
-        return [user.to_dict() for user in users], 200
+        users = User.query.options(selectinload(User.profiles)).all()
+        return serialize_many(users), 200
 
 
 class SignupResource(Resource):
@@ -30,13 +36,16 @@ class SignupResource(Resource):
         if User.query.filter_by(email=data["email"]).first():
             return {"message": "User already exists"}, 422
 
-        data["password"] = generate_password_hash(data["password"]).decode("utf-8")
+        try:
+            data["password"] = hash_password(data["password"])
+        except PasswordHasherBusy:
+            return {"message": "Server busy, please retry"}, 503, {"Retry-After": "1"}
         user = User(**data)
 
         db.session.add(user)
         db.session.commit()
 
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_token(user)
         return {
             "message": "Signup successful",
             "user": user.to_dict(),
@@ -57,10 +66,22 @@ class LoginResource(Resource):
         data = self.parser.parse_args()
         user = User.query.filter_by(email=data["email"]).first()
 
-        if not user or not check_password_hash(user.password, data["password"]):
-            return {"message": "Invalid email or password"}, 401
-
-        access_token = create_access_token(identity=str(user.id))
+        try:
+            if not user or not verify_password(user.password, data["password"]):
+                return {"message": "Invalid email or password"}, 401
+        except PasswordHasherBusy:
+            return {"message": "Server busy, please retry"}, 503, {"Retry-After": "1"}
+
+        # 🔁 Upgrade hashes from an older cost or algorithm while we have the password;
+        # optional, so a busy hasher just leaves it for the next login
+        if needs_rehash(user.password):
+            try:
+                user.password = hash_password(data["password"])
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass
+
+        access_token = issue_token(user)
         return {
             "message": "Login successful",
             
@@ -76,14 +97,75 @@ class LoginResource(Resource):
 
         }, 201
 
+def recruiter_stats_query(recruiter_id):
+    """Each of a recruiter's assessments with its rollup row, if it has one yet."""
+    return (
+        select(Assessments.id, Assessments.title, Assessments.published, AssessmentStats)
+        .outerjoin(AssessmentStats, AssessmentStats.assessment_id == Assessments.id)
+        .where(Assessments.creator_id == recruiter_id)
+        .order_by(Assessments.id)
+    )
+
+
+def recruiter_score_buckets_query(recruiter_id):
+    """Non-empty grade histogram buckets across a recruiter's assessments."""
+    return (
+        select(AssessmentScoreBucket)
+        .join(Assessments, Assessments.id == AssessmentScoreBucket.assessment_id)
+        .where(Assessments.creator_id == recruiter_id, AssessmentScoreBucket.count > 0)
+        .order_by(AssessmentScoreBucket.assessment_id, AssessmentScoreBucket.bucket)
+    )
+
+
+def recruiter_interviewees_query(recruiter_id):
+    """Distinct candidates a recruiter has invited, however many invites each holds."""
+    return select(func.count(distinct(Invites.interviewee_id))).where(Invites.recruiter_id == recruiter_id)
+
+
 class RecruiterStatsResource(Resource):
     @jwt_required()
     def get(self):
-        user_id = get_jwt_identity()
-        interviewees = User.query.filter_by(role="interviewee").count()
-        assessments = Assessments.query.filter_by(creator_id=user_id).count()
+        user_id = current_user_id()
+
+        # 📊 Served from the assessment_stats rollup: O(#assessments), not O(#submissions)
+        rows = db.session.execute(recruiter_stats_query(user_id)).all()
+
+        buckets = defaultdict(list)
+        for bucket in db.session.scalars(recruiter_score_buckets_query(user_id)):
+            buckets[bucket.assessment_id].append((bucket.bucket, bucket.count))
+
+        per_assessment = []
+        totals = {"submissions": 0, "graded": 0, "ungraded": 0, "results": 0, "passed": 0}
+        funnel = dict.fromkeys(INVITE_COUNTERS, 0)
+        for assessment_id, title, published, stats in rows:
+            counters = {c: getattr(stats, c) if stats else 0 for c in COUNTERS}
+            invites = {status: counters[column] for status, column in INVITE_COUNTERS.items()}
+            graded = counters["graded_count"]
+            results = counters["result_count"]
+            per_assessment.append({
+                "assessment_id": assessment_id,
+                "title": title,
+                "published": published,
+                "submissions": counters["submission_count"],
+                "graded": graded,
+                "ungraded": counters["submission_count"] - graded,
+                "average_score": round(counters["grade_total"] / graded, 2) if graded else None,
+                "median_score": median_from_buckets(buckets[assessment_id]),
+                "pass_rate": round(counters["passed_count"] / results, 4) if results else None,
+                "invites": invites,
+            })
+            totals["submissions"] += counters["submission_count"]
+            totals["graded"] += graded
+            totals["ungraded"] += counters["submission_count"] - graded
+            totals["results"] += results
+            totals["passed"] += counters["passed_count"]
+            for status, count in invites.items():
+                funnel[status] += count
 
         return {
-            "interviewees": interviewees,
-            "assessments": assessments,
+            "assessments": len(rows),
+            # Candidates invited to this recruiter's assessments, not every interviewee on the platform
+            "interviewees": db.session.scalar(recruiter_interviewees_query(user_id)),
+            "totals": {**totals, "invites": funnel},
+            "per_assessment": per_assessment,
         }, 200
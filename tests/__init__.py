@@ -0,0 +1,51 @@
+"""Shared test setup: every module runs against one throwaway SQLite database.
+
+app.py reads its configuration from the environment when it is first
+imported, so the variables are set here, before any test imports it.
+
+    python -m pytest -q tests    (or: python -m unittest discover -s tests -t .)
+"""
+import os
+import tempfile
+import unittest
+
+_workdir = tempfile.mkdtemp(prefix="smart-recruiter-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_workdir}/test.db"
+os.environ["SQLALCHEMY_ECHO"] = "false"
+# 🚫 Background threads would race the tests for the same rows
+os.environ["MAIL_OUTBOX_WORKER"] = "false"
+os.environ["INVITE_SWEEPER"] = "false"
+os.environ.setdefault("JWT_SECRET_KEY", "test-only-signing-key-0123456789abcdef")
+os.environ.setdefault("MAIL_DEFAULT_SENDER", "noreply@example.com")
+
+
+class AppTestCase(unittest.TestCase):
+    """A fresh schema, an app context and a test client for every test."""
+
+    def setUp(self):
+        from app import app
+        from models import db
+
+        self.app = app
+        self.client = app.test_client()
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        from models import db
+
+        db.session.remove()
+        self.ctx.pop()
+
+    def make_user(self, role, name=None):
+        """A committed user and the Authorization header for their access token."""
+        from models import db, User
+        from utils.auth import issue_token
+
+        name = name or f"{role}{User.query.count() + 1}"
+        user = User(name=name, email=f"{name}@example.com", password="x", role=role)
+        db.session.add(user)
+        db.session.commit()
+        return user, {"Authorization": f"Bearer {issue_token(user)}"}
@@ -0,0 +1,51 @@
+"""role_required authorizes from the token's role claim; only handlers that need the user row load it."""
+from sqlalchemy import event
+
+from models import db, Assessments, User
+from tests import AppTestCase
+
+
+class RoleClaimTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, self.headers = self.make_user("recruiter")
+        assessment = Assessments(title="A", creator_id=self.recruiter.id, published=True)
+        db.session.add(assessment)
+        db.session.commit()
+        self.assessment_id = assessment.id
+        self.candidate, self.candidate_headers = self.make_user("interviewee")
+
+    def user_lookups(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "FROM users" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        return response, statements
+
+    def test_role_check_needs_no_user_lookup(self):
+        response, lookups = self.user_lookups(lambda: self.client.get("/invites", headers=self.headers))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, [])
+
+        response, lookups = self.user_lookups(lambda: self.client.get("/invites", headers=self.candidate_headers))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(lookups, [])
+
+    def test_handler_that_needs_the_row_answers_401_for_a_deleted_user(self):
+        db.session.delete(db.session.get(User, self.recruiter.id))
+        db.session.commit()
+
+        response = self.client.post(
+            "/invites",
+            json={"assessment_id": self.assessment_id, "interviewee_email": self.candidate.email},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json, {"message": "User no longer exists"})
@@ -0,0 +1,221 @@
+"""Codewars client and sync against a local stand-in for the API."""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
+
+from tests import AppTestCase
+from utils.codewars import CodewarsClient, DiskCache, STALE_PARTIAL_SECONDS
+
+# 🥋 Three pages of 200 completions for "ana"; "bob" has one kata; nobody else exists
+COMPLETED = {
+    "ana": [f"kata-{n}" for n in range(450)],
+    "bob": ["kata-1"],
+}
+PAGE_SIZE = 200
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    """Answers the two Codewars endpoints the client uses; every nth hit gets a 429."""
+
+    hits = []
+    throttle_every = 0
+    retry_after = "0.2"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        StubAPI.hits.append(self.path)
+        if StubAPI.throttle_every and len(StubAPI.hits) % StubAPI.throttle_every == 0:
+            self.send_response(429)
+            self.send_header("Retry-After", StubAPI.retry_after)
+            self.end_headers()
+            return
+
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[-1] == "completed":
+            katas = COMPLETED.get(parts[-3])
+            if katas is None:
+                return self._send(404, {})
+            page = int(self.path.split("page=")[1])
+            data = [
+                {"id": f"id-{slug}", "slug": slug, "completedAt": "2026-01-01T00:00:00Z"}
+                for slug in katas[page * PAGE_SIZE : (page + 1) * PAGE_SIZE]
+            ]
+            total_pages = (len(katas) + PAGE_SIZE - 1) // PAGE_SIZE
+            return self._send(200, {"totalPages": total_pages, "totalItems": len(katas), "data": data})
+
+        slug = parts[-1]
+        if not slug.startswith("kata-"):
+            return self._send(404, {})
+        self._send(
+            200,
+            {"id": f"id-{slug}", "slug": slug, "name": slug.title(), "rank": {"name": "6 kyu"}, "url": f"https://cw/{slug}"},
+        )
+
+    def _send(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+class StubServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_address[1]}/api/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        super().setUp()
+        StubAPI.hits = []
+        StubAPI.throttle_every = 0
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.workdir.name, "codewars-cache")
+
+    def tearDown(self):
+        self.workdir.cleanup()
+        super().tearDown()
+
+
+class CodewarsClientTest(StubServerMixin, unittest.TestCase):
+    def client(self, **kwargs):
+        return CodewarsClient(base_url=self.api_url, cache=DiskCache(self.cache_dir), **kwargs)
+
+    def test_completions_follow_every_page(self):
+        result = self.client().fetch_completions(["ana", "ghost"])
+
+        self.assertEqual(len(result["ana"]["katas"]), 450 * 2)  # keyed by id and by slug
+        self.assertIn("kata-449", result["ana"]["katas"])
+        self.assertEqual(result["ghost"], {"found": False})
+        pages = sorted(path.rsplit("=", 1)[1] for path in StubAPI.hits if "/ana/" in path)
+        self.assertEqual(pages, ["0", "1", "2"])
+
+    def test_429_waits_for_retry_after(self):
+        StubAPI.throttle_every = 2
+        client = self.client(max_retries=3)
+
+        started = time.monotonic()
+        result = client.fetch_completions(["ana"])
+
+        self.assertEqual(len(result["ana"]["katas"]), 900)
+        self.assertGreater(client.requests, 3)
+        self.assertGreaterEqual(time.monotonic() - started, float(StubAPI.retry_after))
+
+    def test_429_gives_up_after_max_retries(self):
+        StubAPI.throttle_every = 1
+        StubAPI.retry_after = "0"
+        try:
+            client = self.client(max_retries=2)
+            result = client.fetch_katas(["kata-1"])
+        finally:
+            StubAPI.retry_after = "0.2"
+
+        self.assertIsInstance(result["kata-1"], Exception)
+        self.assertEqual(client.requests, 3)
+
+    def test_cache_hits_skip_the_api(self):
+        self.client().fetch_katas(["kata-1", "kata-2", "nope"])
+        self.assertEqual(len(StubAPI.hits), 3)
+
+        client = self.client()
+        katas = client.fetch_katas(["kata-1", "kata-2", "nope"])
+
+        self.assertEqual(client.requests, 0)
+        self.assertEqual(len(StubAPI.hits), 3)
+        self.assertEqual(katas["kata-1"]["rank"], "6 kyu")
+        self.assertEqual(katas["nope"], {"found": False})
+
+    def test_prune_removes_expired_entries_only(self):
+        cache = DiskCache(self.cache_dir)
+        cache.set(["kata", "old"], {"found": True}, ttl=-1)
+        cache.set(["kata", "fresh"], {"found": True}, ttl=60)
+        with open(os.path.join(self.cache_dir, "broken.json"), "w") as f:
+            f.write("{")
+        abandoned = os.path.join(self.cache_dir, "abandoned.partial")
+        open(abandoned, "w").close()
+        os.utime(abandoned, (0, time.time() - STALE_PARTIAL_SECONDS - 1))
+
+        self.assertEqual(cache.prune(), 3)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(cache._path(["kata", "fresh"]))])
+        self.assertEqual(cache.get(["kata", "fresh"]), {"found": True})
+
+
+class SyncAssessmentTest(StubServerMixin, AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config["CODEWARS_API_URL"] = self.api_url
+        self.app.config["CODEWARS_CACHE_DIR"] = self.cache_dir
+
+    def seed(self, candidates):
+        from models import db, Assessments, Questions, Submissions, User
+
+        recruiter = User(name="R", email="r@example.com", password="x", role="recruiter")
+        db.session.add(recruiter)
+        db.session.flush()
+        assessment = Assessments(title="Katas", creator_id=recruiter.id, published=True)
+        db.session.add(assessment)
+        db.session.flush()
+        question = Questions(assessment_id=assessment.id, type="codewars", prompt="Solve it", answer_key="kata-1")
+        db.session.add(question)
+        db.session.flush()
+        for n, username in enumerate(candidates):
+            user = User(name=username, email=f"{n}@example.com", password="x", role="interviewee")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(
+                Submissions(assessment_id=assessment.id, user_id=user.id, answers={str(question.id): username})
+            )
+        db.session.commit()
+        return assessment.id, question.id
+
+    def test_sync_writes_each_chunk_in_one_statement(self):
+        from models import db, Questions, Submissions
+        from utils.codewars import sync_assessment
+
+        assessment_id, question_id = self.seed(["ana", "bob", "ghost", "https://www.codewars.com/users/bob"])
+        stale = DiskCache(self.cache_dir)
+        stale.set(["completed", "someone-else"], {"found": False}, ttl=-1)
+
+        updates = []
+
+        def count_updates(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE submissions"):
+                updates.append(len(parameters) if executemany else 1)
+
+        event.listen(db.engine, "before_cursor_execute", count_updates)
+        try:
+            summary = sync_assessment(assessment_id, chunk_size=3)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_updates)
+
+        self.assertEqual(summary["submissions"], 4)
+        self.assertEqual(summary["completed"], 3)
+        self.assertEqual(updates, [3, 1])
+        self.assertIsNone(stale.get(["completed", "someone-else"]))
+        self.assertFalse(os.path.exists(stale._path(["completed", "someone-else"])))
+
+        statuses = [s.code_results[str(question_id)]["status"] for s in Submissions.query.order_by(Submissions.id)]
+        self.assertEqual(statuses, ["completed", "completed", "user_not_found", "completed"])
+        self.assertEqual(db.session.get(Questions, question_id).meta["kata"]["rank"], "6 kyu")
+
+        # A second run is served from the disk cache
+        self.assertEqual(sync_assessment(assessment_id)["api_requests"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""RoutingSession against real primary and replica SQLite files."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import update
+
+from models import User
+from utils.database import REPLICA_BIND, RoutingSession, configure_database, init_database
+
+# Its own extension, so the replica bind never leaks into the shared app's db
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+class ReplicaRoutingTest(unittest.TestCase):
+    """Both files hold user 1 under a different name, so each read shows which engine answered."""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        primary = os.path.join(self.workdir.name, "primary.db")
+        replica = os.path.join(self.workdir.name, "replica.db")
+
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{primary}"
+        with mock.patch.dict(os.environ, {"SQLALCHEMY_REPLICA_URI": f"sqlite:///{replica}"}):
+            configure_database(self.app)
+        db.init_app(self.app)
+        init_database(self.app)
+
+        with self.app.app_context():
+            for name, engine in (("primary", db.engine), ("replica", db.engines[REPLICA_BIND])):
+                db.metadata.create_all(engine, tables=[User.__table__])
+                with engine.begin() as connection:
+                    connection.execute(
+                        User.__table__.insert().values(id=1, name=name, email="u@example.com", password="x", role="recruiter")
+                    )
+
+    def tearDown(self):
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        self.workdir.cleanup()
+
+    def name_in(self, engine_name):
+        engine = db.engine if engine_name == "primary" else db.engines[REPLICA_BIND]
+        with engine.connect() as connection:
+            return connection.scalar(User.__table__.select().with_only_columns(User.name).where(User.id == 1))
+
+    def read_name(self):
+        return db.session.scalar(db.select(User.name).where(User.id == 1))
+
+    def test_get_reads_from_the_replica(self):
+        with self.app.test_request_context("/", method="GET"):
+            self.assertEqual(self.read_name(), "replica")
+            self.assertEqual(db.session.get(User, 1).name, "replica")
+
+    def test_other_methods_read_from_the_primary(self):
+        for method in ("POST", "PATCH", "DELETE"):
+            with self.app.test_request_context("/", method=method):
+                self.assertEqual(self.read_name(), "primary")
+
+    def test_outside_a_request_everything_uses_the_primary(self):
+        with self.app.app_context():
+            self.assertEqual(self.read_name(), "primary")
+
+    def test_writes_during_a_get_land_on_the_primary(self):
+        with self.app.test_request_context("/", method="GET"):
+            db.session.execute(update(User).where(User.id == 1).values(name="statement"))
+            db.session.commit()
+            self.assertEqual(self.name_in("primary"), "statement")
+
+            db.session.add(User(id=2, name="flushed", email="f@example.com", password="x", role="recruiter"))
+            db.session.commit()
+            self.assertEqual(self.name_in("replica"), "replica")
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(User, 2).name, "flushed")
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        with self.app.test_request_context("/", method="GET"):
+            self.assertEqual(self.read_name(), "replica")
+            db.session.execute(update(User).where(User.id == 1).values(name="written"))
+            db.session.commit()
+
+            # The replica has not caught up; the rest of the request must see its own write
+            self.assertEqual(self.read_name(), "written")
+            db.session.expire_all()
+            self.assertEqual(db.session.get(User, 1).name, "written")
+
+        with self.app.test_request_context("/", method="GET"):
+            self.assertEqual(self.read_name(), "replica")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""GET /assessments/<id>/export: candidate-supplied cells cannot become spreadsheet formulas."""
+import csv
+import io
+import json
+
+from models import db, Assessments, Submissions, User
+from tests import AppTestCase
+
+NAMES = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tTab", "\rCR", "Ana"]
+
+
+class ExportEscapingTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, self.headers = self.make_user("recruiter")
+        assessment = Assessments(title="A", creator_id=self.recruiter.id)
+        db.session.add(assessment)
+        db.session.flush()
+        for n, name in enumerate(NAMES):
+            user = User(name=name, email=f"c{n}@example.com", password="x", role="interviewee")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Submissions(assessment_id=assessment.id, user_id=user.id, grade=-1.5))
+        db.session.commit()
+        self.url = f"/assessments/{assessment.id}/export"
+
+    def test_csv_cells_are_escaped(self):
+        response = self.client.get(self.url, headers=self.headers)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+        self.assertEqual([row["name"] for row in rows], [f"'{name}" for name in NAMES[:-1]] + ["Ana"])
+        self.assertEqual({row["grade"] for row in rows}, {"-1.5"})
+
+    def test_ndjson_keeps_the_raw_values(self):
+        response = self.client.get(self.url + "?format=ndjson", headers=self.headers)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual([row["name"] for row in rows], NAMES)
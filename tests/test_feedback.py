@@ -0,0 +1,35 @@
+"""POST /submissions/<id>/feedback: every entry names a real integer question of the assessment."""
+from models import db, Assessments, Feedback, Questions, Submissions
+from tests import AppTestCase
+
+
+class BulkFeedbackTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, self.headers = self.make_user("recruiter")
+        candidate, _ = self.make_user("interviewee")
+        assessment = Assessments(title="A", creator_id=self.recruiter.id)
+        db.session.add(assessment)
+        db.session.flush()
+        self.questions = [Questions(assessment_id=assessment.id, type="codekata", prompt=f"Q{n}") for n in range(2)]
+        submission = Submissions(assessment_id=assessment.id, user_id=candidate.id, answers={})
+        db.session.add_all([*self.questions, submission])
+        db.session.commit()
+        self.url = f"/submissions/{submission.id}/feedback"
+
+    def post(self, entries):
+        return self.client.post(self.url, json={"feedback": entries}, headers=self.headers)
+
+    def test_bool_question_id_is_rejected(self):
+        self.assertEqual(self.questions[0].id, 1)
+        response = self.post([{"question_id": True, "comment": "looks like question 1"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("feedback[0]", response.json["error"])
+        self.assertEqual(Feedback.query.count(), 0)
+
+    def test_valid_entries_are_saved(self):
+        response = self.post([{"question_id": q.id, "comment": "ok"} for q in self.questions])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Feedback.query.count(), 2)
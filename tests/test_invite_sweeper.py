@@ -0,0 +1,56 @@
+"""send_reminders: an invite whose candidate or assessment is gone cannot stall the batch."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from models import db, Assessments, AssessmentStats, Invites, MailOutbox, Notification
+from tests import AppTestCase
+from utils import assessment_stats
+from utils.invite_sweeper import send_reminders
+
+
+class ReminderOrphansTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, _ = self.make_user("recruiter")
+        self.kept = Assessments(title="Kept", creator_id=self.recruiter.id)
+        self.dropped = Assessments(title="Dropped", creator_id=self.recruiter.id)
+        db.session.add_all([self.kept, self.dropped])
+        db.session.commit()
+
+    def invite(self, candidate, assessment):
+        now = datetime.utcnow()
+        invite = Invites(
+            recruiter_id=self.recruiter.id,
+            interviewee_id=candidate.id,
+            assessment_id=assessment.id,
+            status="pending",
+            token=f"token-{candidate.id}-{assessment.id}",
+            sent_at=now - timedelta(days=6),
+            expires_at=now + timedelta(hours=2),
+        )
+        db.session.add(invite)
+        assessment_stats.record_invites(assessment.id)
+        db.session.commit()
+        return invite.id
+
+    def test_orphans_are_expired_and_the_rest_reminded(self):
+        ana, _ = self.make_user("interviewee")
+        gone, _ = self.make_user("interviewee")
+        live = self.invite(ana, self.kept)
+        no_user = self.invite(gone, self.kept)
+        no_assessment = self.invite(ana, self.dropped)
+        kept_id = self.kept.id
+        db.session.execute(text("DELETE FROM users WHERE id = :id"), {"id": gone.id})
+        db.session.execute(text("DELETE FROM assessments WHERE id = :id"), {"id": self.dropped.id})
+        db.session.commit()
+
+        self.assertEqual(send_reminders(batch_size=2), 1)
+
+        statuses = dict(db.session.execute(db.select(Invites.id, Invites.status)).all())
+        self.assertEqual(statuses, {live: "pending", no_user: "expired", no_assessment: "expired"})
+        self.assertEqual([m.invite_id for m in MailOutbox.query], [live])
+        self.assertEqual([n.user_id for n in Notification.query], [ana.id])
+        stats = db.session.get(AssessmentStats, kept_id)
+        self.assertEqual((stats.invites_pending, stats.invites_expired), (1, 1))
+        self.assertEqual(send_reminders(), 0)
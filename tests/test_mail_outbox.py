@@ -0,0 +1,203 @@
+"""Outbox delivery against an in-process SMTP server: sending, backoff and claims."""
+import socket
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+from flask_mail import Mail
+
+from models import db, MailOutbox
+from tests import AppTestCase
+from utils.mail_outbox import (
+    BASE_BACKOFF_SECONDS,
+    MAX_ATTEMPTS,
+    STALE_CLAIM_AFTER,
+    claim_batch,
+    deliver_pending,
+    enqueue_email,
+)
+
+MAIL_SETTINGS = ("MAIL_SERVER", "MAIL_PORT", "MAIL_USE_TLS", "MAIL_USERNAME", "MAIL_PASSWORD")
+
+
+class StubSMTP(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: records each accepted message, refuses `rejected` recipients."""
+
+    delivered = []
+    rejected = set()
+    lock = threading.Lock()
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stub ESMTP")
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>")
+                if address in StubSMTP.rejected:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for line in self.rfile:
+                    if line == b".\r\n":
+                        break
+                with StubSMTP.lock:
+                    StubSMTP.delivered.extend(recipients)
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:  # RSET, NOOP
+                self.reply("250 OK")
+
+
+class MailOutboxTest(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubSMTP)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        super().setUp()
+        StubSMTP.delivered = []
+        StubSMTP.rejected = set()
+        self.saved_config = {key: self.app.config.get(key) for key in MAIL_SETTINGS}
+        self.saved_mail = self.app.extensions["mail"]
+        self.point_mail_at(self.server.server_address[1])
+
+    def tearDown(self):
+        self.app.config.update(self.saved_config)
+        self.app.extensions["mail"] = self.saved_mail
+        super().tearDown()
+
+    def point_mail_at(self, port):
+        # Flask-Mail reads its settings once, in init_app
+        self.app.config.update(
+            MAIL_SERVER="127.0.0.1", MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USERNAME=None, MAIL_PASSWORD=None
+        )
+        Mail().init_app(self.app)
+
+    def queue(self, *recipients):
+        emails = [enqueue_email(recipient, "Subject", "Body") for recipient in recipients]
+        db.session.commit()
+        return [email.id for email in emails]
+
+    def rows(self, ids):
+        db.session.expire_all()
+        return [db.session.get(MailOutbox, email_id) for email_id in ids]
+
+    def test_delivers_the_batch_and_releases_the_claim(self):
+        ids = self.queue("a@example.com", "b@example.com", "c@example.com")
+
+        self.assertEqual(deliver_pending(), 3)
+
+        self.assertEqual(sorted(StubSMTP.delivered), ["a@example.com", "b@example.com", "c@example.com"])
+        for email in self.rows(ids):
+            self.assertEqual((email.status, email.attempts, email.last_error), ("sent", 1, None))
+            self.assertIsNotNone(email.sent_at)
+            self.assertIsNone(email.claim_token)
+            self.assertIsNone(email.locked_at)
+        self.assertEqual(deliver_pending(), 0)
+
+    def test_refused_recipient_backs_off_then_fails(self):
+        StubSMTP.rejected = {"gone@example.com"}
+        gone, ok = self.queue("gone@example.com", "ok@example.com")
+
+        before = datetime.utcnow()
+        self.assertEqual(deliver_pending(), 1)
+
+        refused, sent = self.rows([gone, ok])
+        self.assertEqual(sent.status, "sent")
+        self.assertEqual((refused.status, refused.attempts), ("queued", 1))
+        self.assertIn("gone@example.com", refused.last_error)
+        self.assertGreaterEqual(refused.next_attempt_at, before + timedelta(seconds=BASE_BACKOFF_SECONDS))
+
+        # Not due yet: the next pass leaves it alone
+        self.assertEqual(deliver_pending(), 0)
+        self.assertEqual(self.rows([gone])[0].attempts, 1)
+
+        # The delay doubles with each attempt until the last one gives up
+        refused.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        before = datetime.utcnow()
+        deliver_pending()
+        refused = self.rows([gone])[0]
+        self.assertEqual(refused.attempts, 2)
+        self.assertGreaterEqual(refused.next_attempt_at, before + timedelta(seconds=2 * BASE_BACKOFF_SECONDS))
+
+        refused.attempts = MAX_ATTEMPTS - 1
+        refused.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        deliver_pending()
+        self.assertEqual(self.rows([gone])[0].status, "failed")
+        self.assertEqual(StubSMTP.delivered, ["ok@example.com"])
+
+    def test_unreachable_server_requeues_the_whole_batch(self):
+        with socket.socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            port = closed.getsockname()[1]
+        self.point_mail_at(port)
+        ids = self.queue("a@example.com", "b@example.com")
+
+        self.assertEqual(deliver_pending(), 0)
+
+        for email in self.rows(ids):
+            self.assertEqual((email.status, email.attempts), ("queued", 1))
+            self.assertIsNone(email.claim_token)
+
+    def test_claims_are_exclusive_until_they_go_stale(self):
+        ids = self.queue("a@example.com", "b@example.com", "c@example.com")
+
+        first = claim_batch(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual([email.id for email in claim_batch(5)], [ids[2]])
+        self.assertEqual(claim_batch(5), [])
+
+        # A worker that died mid-send leaves "sending" rows; they are reclaimed once stale
+        stale = datetime.utcnow() - STALE_CLAIM_AFTER - timedelta(seconds=1)
+        db.session.execute(db.update(MailOutbox).where(MailOutbox.id == ids[0]).values(locked_at=stale))
+        db.session.commit()
+        self.assertEqual([email.id for email in claim_batch(5)], [ids[0]])
+
+    def test_concurrent_workers_send_each_email_once(self):
+        recipients = [f"c{n}@example.com" for n in range(40)]
+        self.queue(*recipients)
+        errors = []
+
+        def worker():
+            with self.app.app_context():
+                try:
+                    while deliver_pending(batch_size=5):
+                        pass
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(StubSMTP.delivered), sorted(recipients))
+        self.assertEqual(MailOutbox.query.filter_by(status="sent").count(), len(recipients))
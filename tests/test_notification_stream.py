@@ -0,0 +1,212 @@
+"""Notification stream over the Redis backend, against an in-process stand-in for Redis."""
+import json
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+from models import db
+from tests import AppTestCase
+from utils.notification import create_notification
+from utils.notification_stream import NotificationBroker, RedisBackend, broker
+
+
+def encode(value):
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StubRedis(socketserver.StreamRequestHandler):
+    """The pub/sub subset of RESP that redis-py's PubSub uses: SUBSCRIBE, PUBLISH and PING."""
+
+    channels = defaultdict(list)
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        self.resp3 = False
+        self.write_lock = threading.Lock()
+
+    def send(self, raw):
+        with self.write_lock:
+            self.wfile.write(raw)
+            self.wfile.flush()
+
+    def push(self, items):
+        raw = encode(items)
+        self.send(b">" + raw[1:] if self.resp3 else raw)
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        try:
+            while True:
+                command = self.read_command()
+                if command is None:
+                    return
+                name = command[0].upper()
+                if name == b"HELLO":
+                    self.resp3 = True
+                    self.send(b"%1\r\n" + encode("proto") + encode(3))
+                elif name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        with StubRedis.lock:
+                            StubRedis.channels[channel].append(self)
+                        self.push([b"subscribe", channel, 1])
+                elif name == b"PUBLISH":
+                    with StubRedis.lock:
+                        targets = list(StubRedis.channels[command[1]])
+                    for target in targets:
+                        try:
+                            target.push([b"message", command[1], command[2]])
+                        except OSError:
+                            pass
+                    self.send(encode(len(targets)))
+                elif name == b"PING":
+                    self.send(b"+PONG\r\n")
+                else:
+                    self.send(b"+OK\r\n")
+        finally:
+            with StubRedis.lock:
+                for subscribers in StubRedis.channels.values():
+                    if self in subscribers:
+                        subscribers.remove(self)
+
+    @classmethod
+    def listeners(cls, channel=b"notifications"):
+        with cls.lock:
+            return len(cls.channels[channel])
+
+
+class RedisStubMixin:
+    @classmethod
+    def setUpClass(cls):
+        cls.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubRedis)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.redis_url = f"redis://127.0.0.1:{cls.server.server_address[1]}/0"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        super().setUp()
+        self.backends = []
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        for backend in self.backends:
+            backend._thread.join(5)
+        super().tearDown()
+
+    def connect(self, target):
+        """A Redis backend for `target`, returned once its listener has subscribed."""
+        expected = StubRedis.listeners() + 1
+        backend = RedisBackend(target, self.redis_url)
+        self.backends.append(backend)
+        deadline = time.monotonic() + 5
+        while StubRedis.listeners() < expected:
+            self.assertLess(time.monotonic(), deadline, "backend never subscribed")
+            time.sleep(0.01)
+        return backend
+
+
+class FanOutTest(RedisStubMixin, AppTestCase):
+    def test_every_worker_delivers_to_its_own_subscribers(self):
+        workers = [NotificationBroker(), NotificationBroker()]
+        for worker in workers:
+            worker.backend = self.connect(worker)
+        ana_here, ana_there = workers[0].subscribe(1), workers[1].subscribe(1)
+        bob_there = workers[1].subscribe(2)
+
+        workers[0].publish(1, {"id": 7, "text": "hello"})
+
+        self.assertEqual(ana_here.get(timeout=5), {"id": 7, "text": "hello"})
+        self.assertEqual(ana_there.get(timeout=5), {"id": 7, "text": "hello"})
+        self.assertTrue(bob_there.empty())
+
+
+class StreamTest(RedisStubMixin, AppTestCase):
+    SETTINGS = ("NOTIFICATION_STREAM_HEARTBEAT", "NOTIFICATION_STREAM_MAX_AGE", "NOTIFICATION_STREAM_TOKEN_TTL")
+
+    def setUp(self):
+        super().setUp()
+        self.saved_config = {key: self.app.config[key] for key in self.SETTINGS}
+        self.saved_backend = broker.backend
+        broker.backend = self.connect(broker)
+        user, self.headers = self.make_user("interviewee")
+        self.user_id = user.id
+
+    def tearDown(self):
+        broker.backend = self.saved_backend
+        self.app.config.update(self.saved_config)
+        super().tearDown()
+
+    def read_stream(self, response):
+        try:
+            return [chunk.decode() for chunk in response.response]
+        finally:
+            response.close()
+
+    def test_backlog_live_events_and_heartbeats(self):
+        self.app.config.update(NOTIFICATION_STREAM_HEARTBEAT=1, NOTIFICATION_STREAM_MAX_AGE=2)
+        for text in ("seen", "missed"):
+            create_notification(self.user_id, text)
+        db.session.commit()
+
+        def notify_later():
+            time.sleep(0.3)
+            with self.app.app_context():
+                create_notification(self.user_id, "live")
+                db.session.commit()
+
+        threading.Thread(target=notify_later).start()
+        response = self.client.get(
+            "/notifications/stream", headers={**self.headers, "Last-Event-ID": "1"}, buffered=False
+        )
+        chunks = self.read_stream(response)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(chunks[0], "retry: 1000\n\n")
+        events = [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks if chunk.startswith("id: ")]
+        self.assertEqual([(event["id"], event["text"]) for event in events], [(2, "missed"), (3, "live")])
+        # Idle after the live event, so the stream runs out its max age on heartbeats
+        self.assertEqual(chunks[-1], ": keep-alive\n\n")
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_stream_tokens_expire_and_stay_on_the_stream(self):
+        self.app.config.update(NOTIFICATION_STREAM_TOKEN_TTL=1, NOTIFICATION_STREAM_MAX_AGE=0)
+        response = self.client.post("/notifications/stream-token", headers=self.headers)
+        self.assertEqual((response.status_code, response.json["expires_in"]), (201, 1))
+        token = response.json["token"]
+
+        response = self.client.get(f"/notifications/stream?jwt={token}", buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.read_stream(response)
+
+        # Only the stream accepts it, and only in the query string on the stream
+        other = self.client.get("/notifications", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(other.status_code // 100, 4)
+        session_token = self.headers["Authorization"].split()[1]
+        self.assertEqual(self.client.get(f"/notifications/stream?jwt={session_token}").status_code, 401)
+
+        time.sleep(2)
+        self.assertEqual(self.client.get(f"/notifications/stream?jwt={token}").status_code, 401)
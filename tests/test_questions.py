@@ -0,0 +1,57 @@
+"""Question writes are limited to the assessment's creator; answer keys never reach anyone else."""
+from models import db, Assessments, Questions
+from tests import AppTestCase
+
+CODEKATA = {"prompt": "Add", "type": "codekata", "answer_key": "secret", "meta": {"tests": [{"args": [1], "expected": 2}]}}
+
+
+class QuestionOwnershipTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator, self.creator_headers = self.make_user("recruiter")
+        self.other, self.other_headers = self.make_user("recruiter")
+        self.candidate, self.candidate_headers = self.make_user("interviewee")
+        assessment = Assessments(title="A", creator_id=self.creator.id, published=True)
+        db.session.add(assessment)
+        db.session.flush()
+        question = Questions(assessment_id=assessment.id, **CODEKATA)
+        db.session.add(question)
+        db.session.commit()
+        self.assessment_id, self.question_id = assessment.id, question.id
+
+    def test_creator_writes_and_sees_the_answer_key(self):
+        response = self.client.post(f"/assessments/{self.assessment_id}/questions", json=CODEKATA, headers=self.creator_headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json["answer_key"], "secret")
+
+        response = self.client.patch(f"/questions/{self.question_id}", json={**CODEKATA, "prompt": "Sum"}, headers=self.creator_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["prompt"], "Sum")
+        self.assertEqual(response.json["meta"]["tests"], CODEKATA["meta"]["tests"])
+
+        response = self.client.delete(f"/questions/{self.question_id}", headers=self.creator_headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(db.session.get(Questions, self.question_id))
+
+    def test_everyone_else_gets_404_and_nothing_changes(self):
+        for headers in (self.other_headers, self.candidate_headers):
+            post = self.client.post(f"/assessments/{self.assessment_id}/questions", json=CODEKATA, headers=headers)
+            patch = self.client.patch(f"/questions/{self.question_id}", json={**CODEKATA, "prompt": "Hijacked"}, headers=headers)
+            delete = self.client.delete(f"/questions/{self.question_id}", headers=headers)
+            self.assertEqual([post.status_code, patch.status_code, delete.status_code], [404, 404, 404])
+            self.assertNotIn("secret", patch.get_data(as_text=True))
+
+        self.assertEqual(Questions.query.count(), 1)
+        self.assertEqual(db.session.get(Questions, self.question_id).prompt, "Add")
+
+    def test_unknown_ids_are_404(self):
+        self.assertEqual(
+            self.client.post("/assessments/999/questions", json=CODEKATA, headers=self.creator_headers).status_code, 404
+        )
+        self.assertEqual(self.client.patch("/questions/999", json=CODEKATA, headers=self.creator_headers).status_code, 404)
+
+    def test_detail_hides_answer_key_from_others(self):
+        response = self.client.get(f"/questions/{self.question_id}", headers=self.candidate_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("answer_key", response.json)
+        self.assertNotIn("tests", response.json.get("meta") or {})
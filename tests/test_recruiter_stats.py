@@ -0,0 +1,43 @@
+"""GET /stats/recruiter: candidates are counted once, and grades land in their nearest bucket."""
+from models import db, Assessments, Invites
+from tests import AppTestCase
+from utils import assessment_stats
+
+
+class RecruiterStatsTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, self.headers = self.make_user("recruiter")
+        self.assessments = [Assessments(title=f"A{n}", creator_id=self.recruiter.id) for n in range(2)]
+        db.session.add_all(self.assessments)
+        db.session.commit()
+
+    def invite(self, candidate, assessment, status):
+        db.session.add(
+            Invites(recruiter_id=self.recruiter.id, interviewee_id=candidate.id, assessment_id=assessment.id, status=status)
+        )
+        assessment_stats.record_invites(assessment.id, new_status=status)
+
+    def test_interviewees_are_distinct_candidates(self):
+        ana, _ = self.make_user("interviewee")
+        bob, _ = self.make_user("interviewee")
+        self.invite(ana, self.assessments[0], "accepted")
+        self.invite(ana, self.assessments[0], "expired")
+        self.invite(ana, self.assessments[1], "pending")
+        self.invite(bob, self.assessments[1], "declined")
+        db.session.commit()
+
+        body = self.client.get("/stats/recruiter", headers=self.headers).json
+        self.assertEqual(body["interviewees"], 2)
+        self.assertEqual(sum(body["totals"]["invites"].values()), 4)
+
+    def test_grades_round_to_the_nearest_bucket(self):
+        self.assertEqual([assessment_stats.score_bucket(g) for g in (84.4, 84.6, 99.9, -3, 140)], [84, 85, 100, 0, 100])
+
+        assessment_id = self.assessments[0].id
+        for grade in (89.9, 89.8, 70.2):
+            assessment_stats.record_submission(assessment_id, grade=grade)
+        db.session.commit()
+
+        body = self.client.get("/stats/recruiter", headers=self.headers).json
+        self.assertEqual(body["per_assessment"][0]["median_score"], 90)
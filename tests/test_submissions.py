@@ -0,0 +1,82 @@
+"""submissions.recruiter_id: every insert path fills it, so no row drops out of GET /submissions."""
+import os
+
+from flask_migrate import upgrade
+from sqlalchemy import insert, text
+
+from models import db, Assessments, Submissions
+from tests import AppTestCase
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+class RecruiterIdTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter, self.recruiter_headers = self.make_user("recruiter")
+        self.other, self.other_headers = self.make_user("recruiter")
+        self.candidate, self.candidate_headers = self.make_user("interviewee")
+        assessment = Assessments(title="A", creator_id=self.recruiter.id, published=True)
+        db.session.add(assessment)
+        db.session.commit()
+        self.assessment_id = assessment.id
+
+    def listed_ids(self, headers):
+        response = self.client.get("/submissions?limit=100", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["id"] for row in response.json)
+
+    def test_every_insert_path_fills_recruiter_id(self):
+        response = self.client.post(
+            "/submissions",
+            json={"assessment_id": self.assessment_id, "answers": {"1": "a"}},
+            headers=self.candidate_headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+        orm = Submissions(assessment_id=self.assessment_id, user_id=self.candidate.id, answers={})
+        db.session.add(orm)
+        db.session.flush()
+        db.session.execute(
+            insert(Submissions),
+            [{"assessment_id": self.assessment_id, "user_id": self.candidate.id, "answers": {}} for _ in range(3)],
+        )
+        db.session.commit()
+
+        rows = db.session.execute(db.select(Submissions.id, Submissions.recruiter_id)).all()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row.recruiter_id for row in rows}, {self.recruiter.id})
+        self.assertEqual(self.listed_ids(self.recruiter_headers), sorted(row.id for row in rows))
+        self.assertEqual(self.listed_ids(self.other_headers), [])
+
+    def test_unknown_assessment_is_404(self):
+        response = self.client.post(
+            "/submissions", json={"assessment_id": 999, "answers": {"1": "a"}}, headers=self.candidate_headers
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Submissions.query.count(), 0)
+
+
+class RecruiterIdMigrationTest(AppTestCase):
+    def tearDown(self):
+        db.session.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        db.session.commit()
+        super().tearDown()
+
+    def test_upgrade_backfills_existing_rows(self):
+        db.drop_all()
+        upgrade(directory=MIGRATIONS, revision="a8e2c6d4f019")
+        db.session.execute(
+            text(
+                "INSERT INTO users (id, name, email, password, role) VALUES "
+                "(1, 'r', 'r@example.com', 'x', 'recruiter'), (2, 'c', 'c@example.com', 'x', 'interviewee')"
+            )
+        )
+        db.session.execute(text("INSERT INTO assessments (id, title, creator_id) VALUES (1, 'A', 1)"))
+        db.session.execute(text("INSERT INTO submissions (id, assessment_id, user_id) VALUES (1, 1, 2), (2, 1, 2)"))
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS, revision="c5e19b7d3a48")
+
+        rows = db.session.execute(text("SELECT id, recruiter_id FROM submissions ORDER BY id")).all()
+        self.assertEqual([tuple(row) for row in rows], [(1, 1), (2, 1)])
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, AssessmentStats, AssessmentScoreBucket, Assessments, Invites, Results, Submissions
+
+COUNTERS = (
+    "submission_count",
+    "graded_count",
+    "grade_total",
+    "result_count",
+    "passed_count",
+    "invites_pending",
+    "invites_accepted",
+    "invites_declined",
+    "invites_expired",
+)
+REBUILD_CHUNK_SIZE = 500
+INVITE_COUNTERS = {status: f"invites_{status}" for status in ("pending", "accepted", "declined", "expired")}
+
+
+def score_bucket(grade):
+    """The whole grade point nearest to grade, clamped to 0-100."""
+    return min(100, max(0, round(grade)))
+
+
+def _upsert(model, keys, deltas, **assign):
+    """INSERT the deltas as a new row, or add them to the existing one atomically."""
+    dialect = db.session.get_bind().dialect.name
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = dialect_insert(model).values(**keys, **deltas, **assign)
+    updates = {column: getattr(model, column) + statement.excluded[column] for column in deltas}
+    updates.update({column: statement.excluded[column] for column in assign})
+    db.session.execute(statement.on_conflict_do_update(index_elements=list(keys), set_=updates))
+
+
+def bump(assessment_id, **deltas):
+    """Add `deltas` to an assessment's rollup counters within the caller's transaction."""
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if assessment_id is None or not deltas:
+        return
+    _upsert(AssessmentStats, {"assessment_id": assessment_id}, deltas, updated_at=datetime.utcnow())
+
+
+def _bump_bucket(assessment_id, grade, delta):
+    _upsert(
+        AssessmentScoreBucket,
+        {"assessment_id": assessment_id, "bucket": score_bucket(grade)},
+        {"count": delta},
+    )
+
+
+def record_submission(assessment_id, grade=None, delta=1):
+    bump(
+        assessment_id,
+        submission_count=delta,
+        graded_count=delta if grade is not None else 0,
+        grade_total=delta * grade if grade is not None else 0,
+    )
+    if assessment_id is not None and grade is not None:
+        _bump_bucket(assessment_id, grade, delta)
+
+
+def record_grade(assessment_id, old_grade, new_grade):
+    if old_grade == new_grade or assessment_id is None:
+        return
+    bump(
+        assessment_id,
+        graded_count=(new_grade is not None) - (old_grade is not None),
+        grade_total=(new_grade or 0) - (old_grade or 0),
+    )
+    if old_grade is not None and new_grade is not None and score_bucket(old_grade) == score_bucket(new_grade):
+        return
+    if old_grade is not None:
+        _bump_bucket(assessment_id, old_grade, -1)
+    if new_grade is not None:
+        _bump_bucket(assessment_id, new_grade, 1)
+
+
+def record_result(assessment_id, old_passed=None, new_passed=None, created=False):
+    bump(
+        assessment_id,
+        result_count=1 if created else 0,
+        passed_count=bool(new_passed) - bool(old_passed),
+    )
+
+
+def record_invites(assessment_id, old_status=None, new_status="pending", count=1):
+    deltas = defaultdict(int)
+    if old_status:
+        deltas[INVITE_COUNTERS[old_status]] -= count
+    if new_status:
+        deltas[INVITE_COUNTERS[new_status]] += count
+    bump(assessment_id, **deltas)
+
+
+def forget(assessment_id):
+    """Drop an assessment's rollup rows ahead of deleting the assessment."""
+    db.session.execute(delete(AssessmentScoreBucket).where(AssessmentScoreBucket.assessment_id == assessment_id))
+    db.session.execute(delete(AssessmentStats).where(AssessmentStats.assessment_id == assessment_id))
+
+
+def rebuild(assessment_ids):
+    """Recompute rollups from the source tables, for bulk writes and drift repair."""
+    ids = sorted({i for i in assessment_ids if i is not None})
+    if not ids:
+        return 0
+
+    stats = {i: dict.fromkeys(COUNTERS, 0) for i in ids}
+    buckets = defaultdict(int)
+
+    for assessment_id, total, graded, grade_total in db.session.execute(
+        select(
+            Submissions.assessment_id,
+            func.count(),
+            func.count(Submissions.grade),
+            func.coalesce(func.sum(Submissions.grade), 0),
+        )
+        .where(Submissions.assessment_id.in_(ids))
+        .group_by(Submissions.assessment_id)
+    ):
+        stats[assessment_id].update(submission_count=total, graded_count=graded, grade_total=grade_total)
+
+    for assessment_id, grade, count in db.session.execute(
+        select(Submissions.assessment_id, Submissions.grade, func.count())
+        .where(Submissions.assessment_id.in_(ids), Submissions.grade.isnot(None))
+        .group_by(Submissions.assessment_id, Submissions.grade)
+    ):
+        buckets[assessment_id, score_bucket(grade)] += count
+
+    for assessment_id, total, passed in db.session.execute(
+        select(
+            Results.assessment_id,
+            func.count(),
+            func.count(case((Results.pass_status == True, 1))),  # noqa: E712
+        )
+        .where(Results.assessment_id.in_(ids))
+        .group_by(Results.assessment_id)
+    ):
+        stats[assessment_id].update(result_count=total, passed_count=passed)
+
+    for assessment_id, status, count in db.session.execute(
+        select(Invites.assessment_id, Invites.status, func.count())
+        .where(Invites.assessment_id.in_(ids), Invites.status.isnot(None))
+        .group_by(Invites.assessment_id, Invites.status)
+    ):
+        stats[assessment_id][INVITE_COUNTERS[status]] = count
+
+    for assessment_id in ids:
+        forget(assessment_id)
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(AssessmentStats),
+        [{"assessment_id": i, "updated_at": now, **counters} for i, counters in stats.items()],
+    )
+    if buckets:
+        db.session.execute(
+            insert(AssessmentScoreBucket),
+            [{"assessment_id": i, "bucket": b, "count": c} for (i, b), c in buckets.items()],
+        )
+    return len(ids)
+
+
+def median_from_buckets(buckets):
+    """Median grade from (bucket, count) pairs sorted by bucket, to the nearest point."""
+    total = sum(count for _, count in buckets)
+    if total <= 0:
+        return None
+    wanted = (total - 1) // 2, total // 2
+    found = []
+    seen = 0
+    for bucket, count in buckets:
+        if count <= 0:
+            continue
+        while len(found) < 2 and wanted[len(found)] < seen + count:
+            found.append(bucket)
+        seen += count
+        if len(found) == 2:
+            break
+    return (found[0] + found[1]) / 2
+
+
+@click.command("rebuild-assessment-stats")
+@with_appcontext
+def rebuild_assessment_stats_command():
+    """Recompute every assessment's dashboard rollup from the source tables."""
+    ids = db.session.scalars(select(Assessments.id).order_by(Assessments.id)).all()
+    rebuilt = 0
+    for start in range(0, len(ids), REBUILD_CHUNK_SIZE):
+        rebuilt += rebuild(ids[start:start + REBUILD_CHUNK_SIZE])
+        db.session.commit()
+    click.echo(f"Rebuilt stats for {rebuilt} assessments.")
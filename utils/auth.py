@@ -0,0 +1,84 @@
+from datetime import timedelta
+from functools import wraps
+
+from flask import g, request
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+
+from models import db, User
+
+
+def issue_token(user):
+    """Access token carrying the user's role so authorization needs no lookup."""
+    return create_access_token(identity=str(user.id), additional_claims={"role": user.role})
+
+
+STREAM_SCOPE = "notification_stream"
+# The only endpoint each scoped token may be used on
+SCOPED_ENDPOINTS = {STREAM_SCOPE: "notificationstreamresource"}
+
+
+def issue_stream_token(user_id, ttl):
+    """Short-lived token that only opens the notification stream, for ?jwt= in an EventSource URL."""
+    return create_access_token(
+        identity=str(user_id), additional_claims={"scope": STREAM_SCOPE}, expires_delta=timedelta(seconds=ttl)
+    )
+
+
+def scoped_token_allowed(jwt_header, jwt_data):
+    """token_verification_loader: a scoped token is refused everywhere but its own endpoint."""
+    scope = jwt_data.get("scope")
+    return scope is None or SCOPED_ENDPOINTS.get(scope) == request.endpoint
+
+
+def current_user_id():
+    return int(get_jwt_identity())
+
+
+def current_user():
+    """The authenticated User, loaded at most once per request.
+
+    Only handlers that need the row call this; a None means the account was
+    deleted after the token was issued, which they answer with USER_GONE.
+    """
+    if "current_user" not in g:
+        g.current_user = db.session.get(User, current_user_id())
+    return g.current_user
+
+
+USER_GONE = {"message": "User no longer exists"}, 401
+
+
+def current_role():
+    """The caller's role, read from the token: the one source role checks and scoping use."""
+    role = get_jwt().get("role")
+    if role is None:
+        # Tokens issued before roles were embedded fall back to the database
+        user = current_user()
+        role = user.role if user else None
+    return role
+
+
+def role_required(*roles, body=None):
+    """jwt_required() plus a role check against the token's role claim.
+
+    No database round trip: the claim is trusted, so handlers that need the
+    user row load it themselves with current_user() and answer USER_GONE when
+    it has been deleted.
+    """
+    denied = body or {"message": "Unauthorized"}
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            role = current_role()
+            if role is None:
+                # Only a pre-claims token whose user has since been deleted
+                return USER_GONE
+            if role not in roles:
+                return denied, 403
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
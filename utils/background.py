@@ -0,0 +1,21 @@
+import threading
+
+
+def start_on_first_request(app, starter):
+    """Call `starter(app)` once per process, before the first request it serves.
+
+    Threads started when app.py is imported would also run under
+    `flask db upgrade` and every other CLI command that loads the app.
+    """
+    lock = threading.Lock()
+    started = False
+
+    @app.before_request
+    def start_background_worker():
+        nonlocal started
+        if started:
+            return
+        with lock:
+            if not started:
+                started = True
+                starter(app)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, CodeVerdict, Questions, Submissions
+from utils import assessment_stats, sandbox
+from utils.grading import load_answer_key, score
+from utils.jobs import job_handler
+
+
+def _noop(count):
+    pass
+
+
+def code_answers(answers):
+    """{question_id: code} from either answers shape that grading accepts."""
+    if isinstance(answers, dict):
+        items = answers.items()
+    elif isinstance(answers, list):
+        items = ((a.get("question_id"), a.get("answer")) for a in answers if isinstance(a, dict))
+    else:
+        return {}
+
+    code = {}
+    for question_id, answer in items:
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(answer, str) and answer.strip():
+            code[question_id] = answer
+    return code
+
+
+def codekata_question_ids(assessment_id, answers):
+    """The assessment's codekata questions, or [] when `answers` holds no code for any of them."""
+    question_ids = db.session.scalars(
+        select(Questions.id).where(
+            Questions.assessment_id == assessment_id, Questions.type == "codekata"
+        )
+    ).all()
+    if not set(question_ids) & set(code_answers(answers)):
+        return []
+    return question_ids
+
+
+def verdict_digest(code, meta):
+    entry_point, tests = sandbox.test_cases(meta)
+    raw = json.dumps({"code": code, "entry_point": entry_point, "tests": tests}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cached_verdict(code, meta):
+    """The verdict for (code, tests), from the cache or from a sandbox run."""
+    digest = verdict_digest(code, meta)
+    cached = db.session.get(CodeVerdict, digest)
+    if cached:
+        return cached.verdict
+
+    verdict = sandbox.execute(code, meta)
+    if sandbox.cacheable(verdict):
+        dialect = db.session.get_bind().dialect.name
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.session.execute(
+            dialect_insert(CodeVerdict)
+            .values(digest=digest, verdict=verdict)
+            .on_conflict_do_nothing(index_elements=["digest"])
+        )
+    return verdict
+
+
+@job_handler("grade_code")
+def grade_code_submission(submission_id, progress=_noop):
+    """Run a submission's codekata answers in the sandbox and fold them into its grade."""
+    submission = db.session.get(Submissions, submission_id)
+    if submission is None:
+        return {"questions": 0}
+
+    questions = db.session.execute(
+        select(Questions.id, Questions.meta)
+        .where(Questions.assessment_id == submission.assessment_id, Questions.type == "codekata")
+        .order_by(Questions.id)
+    ).all()
+    answers = code_answers(submission.answers)
+
+    breakdown = {}
+    for question in questions:
+        code = answers.get(question.id)
+        if code is None:
+            _, tests = sandbox.test_cases(question.meta)
+            verdict = {"status": "unanswered", "passed": 0, "total": len(tests), "tests": []}
+        else:
+            verdict = cached_verdict(code, question.meta)
+        breakdown[str(question.id)] = verdict
+        progress(1)
+        # Commit per question so no write lock is held while the next one runs
+        db.session.commit()
+
+    submission = db.session.get(Submissions, submission_id)
+    if submission is None:
+        return {"questions": len(questions)}
+    # Codewars verdicts live in the same column and are kept
+    results = {**(submission.code_results or {}), **breakdown}
+    new_grade = score(load_answer_key(submission.assessment_id), submission.answers, results)
+    assessment_stats.record_grade(submission.assessment_id, submission.grade, new_grade)
+    submission.code_results = results
+    submission.grade = new_grade
+    db.session.commit()
+
+    return {"questions": len(questions)}
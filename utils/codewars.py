@@ -0,0 +1,373 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+from models import db, Questions, Submissions
+from utils.assessment_stats import rebuild as rebuild_stats
+from utils.code_grading import code_answers
+from utils.grading import load_answer_key, score
+from utils.jobs import job_handler
+from utils.question_cache import invalidate
+
+DEFAULT_API_URL = "https://www.codewars.com/api/v1"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_KATA_TTL = 24 * 3600
+DEFAULT_COMPLETIONS_TTL = 600
+RETRY_BACKOFF = 0.5
+SYNC_CHUNK_SIZE = 500
+# A write that died between mkstemp and rename leaves a .partial behind
+STALE_PARTIAL_SECONDS = 3600
+
+
+class CodewarsError(Exception):
+    """The API kept failing for a request after every retry."""
+
+
+class DiskCache:
+    """JSON values on disk with a per-entry expiry; shared by every process on the host."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            return None
+        return entry.get("value")
+
+    def set(self, key, value, ttl):
+        # Write-then-rename so concurrent readers never see half a file
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".partial")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+        os.replace(partial, self._path(key))
+
+    def prune(self):
+        """Delete expired or unreadable entries and abandoned partial writes; returns how many."""
+        removed = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".partial"):
+                    stale = entry.stat().st_mtime < now - STALE_PARTIAL_SECONDS
+                else:
+                    with open(entry.path) as f:
+                        stale = json.load(f).get("expires_at", 0) < now
+            except ValueError:
+                stale = True
+            except OSError:
+                continue
+            if stale:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+class CodewarsClient:
+    """Async Codewars API client with bounded concurrency and 429 back-off.
+
+    urllib does the HTTP on worker threads; at most `concurrency` requests
+    are in flight. A 429 pauses every request, honouring Retry-After, and
+    5xx responses or network errors are retried with exponential back-off.
+    """
+
+    def __init__(
+        self,
+        base_url=DEFAULT_API_URL,
+        cache=None,
+        concurrency=DEFAULT_CONCURRENCY,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        kata_ttl=DEFAULT_KATA_TTL,
+        completions_ttl=DEFAULT_COMPLETIONS_TTL,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.kata_ttl = kata_ttl
+        self.completions_ttl = completions_ttl
+        self.requests = 0
+        self._semaphore = None
+        self._paused_until = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            base_url=config.get("CODEWARS_API_URL", DEFAULT_API_URL),
+            cache=DiskCache(config["CODEWARS_CACHE_DIR"]),
+            concurrency=config.get("CODEWARS_CONCURRENCY", DEFAULT_CONCURRENCY),
+            timeout=config.get("CODEWARS_TIMEOUT", DEFAULT_TIMEOUT),
+            max_retries=config.get("CODEWARS_MAX_RETRIES", DEFAULT_MAX_RETRIES),
+            kata_ttl=config.get("CODEWARS_KATA_TTL", DEFAULT_KATA_TTL),
+            completions_ttl=config.get("CODEWARS_COMPLETIONS_TTL", DEFAULT_COMPLETIONS_TTL),
+        )
+
+    def _fetch(self, path):
+        request = urllib.request.Request(
+            self.base_url + path, headers={"Accept": "application/json", "User-Agent": "smart-recruiter"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers, b""
+        except (urllib.error.URLError, OSError) as exc:
+            return None, {}, str(exc).encode()
+
+    async def get_json(self, path):
+        """GET `path`; None on 404, CodewarsError once retries run out."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            while self._paused_until > loop.time():
+                await asyncio.sleep(self._paused_until - loop.time())
+
+            async with self._semaphore:
+                self.requests += 1
+                status, headers, body = await asyncio.to_thread(self._fetch, path)
+
+            if status == 404:
+                return None
+            if status is not None and status < 400:
+                return json.loads(body)
+            if status is not None and status < 500 and status != 429:
+                raise CodewarsError(f"GET {path} returned {status}")
+
+            delay = RETRY_BACKOFF * 2**attempt
+            if status == 429:
+                delay = _retry_after(headers) or delay
+                self._paused_until = max(self._paused_until, loop.time() + delay)
+            else:
+                await asyncio.sleep(delay)
+
+        raise CodewarsError(f"GET {path} failed after {self.max_retries + 1} attempts")
+
+    async def _cached(self, key, ttl, load):
+        value = self.cache.get(key) if self.cache else None
+        if value is None:
+            value = await load()
+            if self.cache:
+                self.cache.set(key, value, ttl)
+        return value
+
+    async def kata(self, slug):
+        """Kata metadata ({"found": False} for an unknown slug)."""
+
+        async def load():
+            data = await self.get_json(f"/code-challenges/{quote(slug, safe='')}")
+            if data is None:
+                return {"found": False}
+            return {
+                "found": True,
+                "id": data.get("id"),
+                "slug": data.get("slug"),
+                "name": data.get("name"),
+                "rank": (data.get("rank") or {}).get("name"),
+                "url": data.get("url"),
+            }
+
+        return await self._cached(["kata", slug], self.kata_ttl, load)
+
+    async def completions(self, username):
+        """{kata id or slug: completedAt} for a user ({"found": False} if there is no such user)."""
+
+        async def load():
+            path = f"/users/{quote(username, safe='')}/code-challenges/completed?page="
+            first = await self.get_json(path + "0")
+            if first is None:
+                return {"found": False}
+            # Page 0 says how many there are; the rest are fetched together
+            rest = await asyncio.gather(
+                *(self.get_json(path + str(page)) for page in range(1, first.get("totalPages") or 1))
+            )
+            katas = {}
+            for page in [first, *rest]:
+                for item in (page or {}).get("data", []):
+                    for key in (item.get("id"), item.get("slug")):
+                        if key:
+                            katas[key] = item.get("completedAt")
+            return {"found": True, "katas": katas}
+
+        return await self._cached(["completed", username], self.completions_ttl, load)
+
+    async def _gather(self, calls):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        keys = list(calls)
+        results = await asyncio.gather(*calls.values(), return_exceptions=True)
+        return dict(zip(keys, results))
+
+    def fetch_katas(self, slugs):
+        return asyncio.run(self._gather({slug: self.kata(slug) for slug in slugs}))
+
+    def fetch_completions(self, usernames):
+        """{username: completions or exception}, fetched concurrently."""
+        return asyncio.run(self._gather({name: self.completions(name) for name in usernames}))
+
+
+def _retry_after(headers):
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def codewars_username(answer):
+    """Candidates answer with their Codewars username or profile URL."""
+    answer = answer.strip().rstrip("/")
+    if "/users/" in answer:
+        answer = answer.rsplit("/users/", 1)[1].split("/", 1)[0]
+    return answer.lstrip("@")
+
+
+def completion_verdict(username, completions, kata):
+    if isinstance(completions, Exception):
+        return {"status": "error", "passed": 0, "total": 1, "username": username, "error": str(completions)}
+    if not completions["found"]:
+        return {"status": "user_not_found", "passed": 0, "total": 1, "username": username}
+    completed_at = completions["katas"].get(kata)
+    if completed_at is None:
+        return {"status": "not_completed", "passed": 0, "total": 1, "username": username}
+    return {"status": "completed", "passed": 1, "total": 1, "username": username, "completed_at": completed_at}
+
+
+def _noop(count):
+    pass
+
+
+def _refresh_kata_meta(client, questions):
+    """Store name, rank and URL from the API in each question's meta; returns unknown slugs."""
+    katas = client.fetch_katas({question.answer_key for question in questions})
+    unknown = sorted(slug for slug, kata in katas.items() if isinstance(kata, dict) and not kata["found"])
+    changed = []
+    for question in questions:
+        kata = katas.get(question.answer_key)
+        if not isinstance(kata, dict) or not kata["found"]:
+            continue
+        details = {key: kata[key] for key in ("id", "name", "rank", "url")}
+        meta = dict(question.meta or {})
+        if meta.get("kata") != details:
+            meta["kata"] = details
+            changed.append({"id": question.id, "meta": meta})
+    if changed:
+        db.session.execute(update(Questions), changed)
+    return unknown
+
+
+@job_handler("codewars_sync")
+def sync_assessment(assessment_id, chunk_size=SYNC_CHUNK_SIZE, progress=_noop):
+    """Check every submission's Codewars answers and fold completions into the grades.
+
+    Submissions are processed in id-ordered chunks: the chunk's usernames
+    are fetched concurrently (or read from the disk cache), then the chunk
+    is written back with one executemany UPDATE.
+    """
+    questions = db.session.execute(
+        select(Questions.id, Questions.answer_key, Questions.meta)
+        .where(Questions.assessment_id == assessment_id, Questions.type == "codewars")
+        .order_by(Questions.id)
+    ).all()
+    questions = [question for question in questions if question.answer_key]
+    if not questions:
+        return {"questions": 0, "submissions": 0}
+
+    client = CodewarsClient.from_config(current_app.config)
+    # 🧹 Entries are only ever replaced, so expired ones would pile up on disk
+    client.cache.prune()
+    unknown_katas = _refresh_kata_meta(client, questions)
+    db.session.commit()
+    invalidate(assessment_id)
+
+    answer_key = load_answer_key(assessment_id)
+    summary = {"questions": len(questions), "submissions": 0, "completed": 0, "errors": 0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Submissions.id, Submissions.answers, Submissions.code_results)
+            .where(Submissions.assessment_id == assessment_id, Submissions.id > last_id)
+            .order_by(Submissions.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        usernames = {
+            row.id: {qid: codewars_username(code) for qid, code in code_answers(row.answers).items()}
+            for row in rows
+        }
+        completions = client.fetch_completions(
+            {name for answered in usernames.values() for name in answered.values() if name}
+        )
+
+        updates = []
+        for row in rows:
+            results = dict(row.code_results or {})
+            for question in questions:
+                username = usernames[row.id].get(question.id)
+                if not username:
+                    verdict = {"status": "unanswered", "passed": 0, "total": 1}
+                else:
+                    verdict = completion_verdict(username, completions[username], question.answer_key)
+                if verdict["status"] == "error":
+                    summary["errors"] += 1
+                    if str(question.id) in results:
+                        # A failed lookup keeps the last known outcome
+                        continue
+                summary["completed"] += verdict["status"] == "completed"
+                results[str(question.id)] = verdict
+            updates.append(
+                {"id": row.id, "code_results": results, "grade": score(answer_key, row.answers, results)}
+            )
+
+        db.session.execute(update(Submissions), updates)
+        progress(len(rows))
+        db.session.commit()
+        summary["submissions"] += len(rows)
+        last_id = rows[-1].id
+
+    rebuild_stats([assessment_id])
+    db.session.commit()
+
+    summary["api_requests"] = client.requests
+    summary["unknown_katas"] = unknown_katas
+    return summary
+
+
+def count_submissions(assessment_id):
+    return db.session.scalar(
+        select(func.count()).select_from(Submissions).where(Submissions.assessment_id == assessment_id)
+    )
+
+
+@click.command("codewars-sync")
+@click.argument("assessment_id", type=int)
+@with_appcontext
+def codewars_sync_command(assessment_id):
+    """Check Codewars completions for every submission of an assessment."""
+    summary = sync_assessment(assessment_id)
+    click.echo(json.dumps(summary))
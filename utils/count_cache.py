@@ -0,0 +1,42 @@
+import threading
+import time
+from collections import OrderedDict
+
+from models import db
+
+COUNT_TTL = 30
+MAX_ENTRIES = 10000
+TOTAL_COUNT_HEADER = "X-Total-Count"
+ASSESSMENT_CATALOGUE = "assessment_catalogue"
+
+_counts = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached_count(key, statement, ttl=COUNT_TTL):
+    """Return the scalar result of a COUNT statement, reusing it for `ttl` seconds.
+
+    Keys are per scope and filter set; invalidation only reaches this
+    process, so the TTL bounds how stale a total can be across workers.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _counts.get(key)
+        if cached and cached[1] > now:
+            _counts.move_to_end(key)
+            return cached[0]
+
+    count = db.session.scalar(statement)
+    with _lock:
+        _counts[key] = (count, now + ttl)
+        _counts.move_to_end(key)
+        while len(_counts) > MAX_ENTRIES:
+            _counts.popitem(last=False)
+    return count
+
+
+def invalidate_counts(namespace):
+    """Drop every cached count whose key tuple starts with `namespace`."""
+    with _lock:
+        for key in [key for key in _counts if key[0] == namespace]:
+            del _counts[key]
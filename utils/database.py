@@ -0,0 +1,95 @@
+import os
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(uri):
+    """Pool settings for one engine; in-memory SQLite keeps Flask-SQLAlchemy's static pool."""
+    if not uri or _is_memory_sqlite(uri):
+        return {}
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 10),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def configure_database(app):
+    """Engine options, SQLite pragmas and the optional replica bind; call before db.init_app."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(uri)
+    app.config["SQLITE_JOURNAL_MODE"] = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    app.config["SQLITE_SYNCHRONOUS"] = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+    replica_uri = os.getenv("SQLALCHEMY_REPLICA_URI")
+    if replica_uri:
+        app.config["SQLALCHEMY_BINDS"] = {
+            REPLICA_BIND: {"url": replica_uri, **engine_options(replica_uri)}
+        }
+
+
+def init_database(app):
+    """Apply the SQLite pragmas to every new connection of the app's engines."""
+    pragmas = (
+        f"PRAGMA busy_timeout = {int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA journal_mode = {app.config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}",
+    )
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    db = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite" and not _is_memory_sqlite(str(engine.url)):
+                event.listen(engine, "connect", apply_pragmas)
+
+
+def _reads_from_replica():
+    return has_request_context() and request.method in READ_METHODS
+
+
+class RoutingSession(Session):
+    """Sends the reads of GET requests to the replica bind; everything else to the primary.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary, so
+    a GET that happens to write still lands in the right database. Once the
+    session has written, its later reads stay on the primary too: the
+    replica may not have the write yet.
+    """
+
+    _wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote = True
+        elif bind is None and not self._wrote and _reads_from_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,125 @@
+from sqlalchemy import delete, func, select
+
+from models import (
+    db,
+    Assessments,
+    Feedback,
+    Invites,
+    MailOutbox,
+    Notification,
+    Questions,
+    Results,
+    Submissions,
+)
+from utils import assessment_stats
+from utils.count_cache import ASSESSMENT_CATALOGUE, invalidate_counts
+from utils.jobs import job_handler
+from utils.question_cache import invalidate
+from utils.ranking import refresh_ranks
+
+DELETE_CHUNK_SIZE = 1000
+
+
+def _noop(count):
+    pass
+
+
+def _delete_chunked(model, condition, chunk_size, progress):
+    """DELETE matching rows one id chunk per transaction, so each lock is held briefly."""
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(model.id).where(condition).order_by(model.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(model).where(model.id.in_(ids)))
+        progress(len(ids))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def _delete_submission_chunks(condition, chunk_size, progress):
+    """Delete submissions with their feedback and results, one chunk per transaction."""
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(Submissions.id).where(condition).order_by(Submissions.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(Feedback).where(Feedback.submission_id.in_(ids)))
+        db.session.execute(delete(Results).where(Results.submission_id.in_(ids)))
+        db.session.execute(delete(Submissions).where(Submissions.id.in_(ids)))
+        progress(len(ids))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def recruiter_submissions(recruiter_id):
+    return Submissions.recruiter_id == recruiter_id
+
+
+def count_submissions(condition):
+    return db.session.scalar(select(func.count()).select_from(Submissions).where(condition))
+
+
+@job_handler("delete_recruiter_submissions")
+def delete_recruiter_submissions(recruiter_id, chunk_size=DELETE_CHUNK_SIZE, progress=_noop):
+    """Delete every submission on a recruiter's assessments, with feedback and results."""
+    assessment_ids = db.session.scalars(
+        select(Assessments.id).where(Assessments.creator_id == recruiter_id)
+    ).all()
+    deleted = _delete_submission_chunks(recruiter_submissions(recruiter_id), chunk_size, progress)
+
+    # 📊 Dashboard rollups and leaderboards follow the deleted rows
+    for start in range(0, len(assessment_ids), assessment_stats.REBUILD_CHUNK_SIZE):
+        chunk = assessment_ids[start : start + assessment_stats.REBUILD_CHUNK_SIZE]
+        assessment_stats.rebuild(chunk)
+        for assessment_id in chunk:
+            refresh_ranks(assessment_id)
+        db.session.commit()
+
+    return {"submissions": deleted}
+
+
+def assessment_row_count(assessment_id):
+    """Rows an assessment delete will remove, for job progress totals."""
+    return sum(
+        db.session.scalar(select(func.count()).select_from(model).where(condition))
+        for model, condition in (
+            (Submissions, Submissions.assessment_id == assessment_id),
+            (Questions, Questions.assessment_id == assessment_id),
+            (Invites, Invites.assessment_id == assessment_id),
+            (Notification, Notification.assessment_id == assessment_id),
+        )
+    )
+
+
+@job_handler("delete_assessment")
+def delete_assessment(assessment_id, chunk_size=DELETE_CHUNK_SIZE, progress=_noop):
+    """Delete an assessment and everything hanging off it, children first."""
+    question_ids = select(Questions.id).where(Questions.assessment_id == assessment_id)
+    invite_ids = select(Invites.id).where(Invites.assessment_id == assessment_id)
+
+    counts = {
+        "submissions": _delete_submission_chunks(
+            Submissions.assessment_id == assessment_id, chunk_size, progress
+        ),
+        "results": _delete_chunked(Results, Results.assessment_id == assessment_id, chunk_size, _noop),
+        "feedback": _delete_chunked(Feedback, Feedback.question_id.in_(question_ids), chunk_size, _noop),
+        "questions": _delete_chunked(Questions, Questions.assessment_id == assessment_id, chunk_size, progress),
+        "emails": _delete_chunked(MailOutbox, MailOutbox.invite_id.in_(invite_ids), chunk_size, _noop),
+        "invites": _delete_chunked(Invites, Invites.assessment_id == assessment_id, chunk_size, progress),
+        "notifications": _delete_chunked(
+            Notification, Notification.assessment_id == assessment_id, chunk_size, progress
+        ),
+    }
+
+    assessment_stats.forget(assessment_id)
+    db.session.execute(delete(Assessments).where(Assessments.id == assessment_id))
+    db.session.commit()
+    invalidate(assessment_id)
+    invalidate_counts(ASSESSMENT_CATALOGUE)
+
+    return counts
@@ -0,0 +1,148 @@
+import operator
+from collections import namedtuple
+
+from sqlalchemy import select, update
+
+from models import db, Questions, Submissions
+from utils.assessment_stats import rebuild as rebuild_stats
+
+GRADE_CHUNK_SIZE = 2000
+# Question types graded from Submissions.code_results (sandbox runs, Codewars completions)
+VERDICT_TYPES = ("codekata", "codewars")
+
+AnswerKey = namedtuple("AnswerKey", ["question_ids", "keys", "positions", "code_question_ids"])
+
+
+def normalize(value):
+    if value is None:
+        return None
+    return str(value).strip().casefold()
+
+
+def load_answer_key(assessment_id):
+    """Load the multiple-choice answer keys once into position-aligned arrays.
+
+    Codekata and Codewars question ids come along too; their credit is read
+    from the verdicts stored on each submission rather than from an answer key.
+    Multiple-choice questions without a key are left out: an unanswered slot
+    would otherwise "match" the missing key.
+    """
+    rows = db.session.execute(
+        select(Questions.id, Questions.type, Questions.answer_key)
+        .where(
+            Questions.assessment_id == assessment_id,
+            Questions.type.in_(("multiple_choice",) + VERDICT_TYPES),
+        )
+        .order_by(Questions.id)
+    ).all()
+
+    choice_rows = [row for row in rows if row.type == "multiple_choice" and normalize(row.answer_key)]
+    question_ids = [row.id for row in choice_rows]
+    keys = [normalize(row.answer_key) for row in choice_rows]
+    positions = {qid: i for i, qid in enumerate(question_ids)}
+    code_question_ids = [row.id for row in rows if row.type in VERDICT_TYPES]
+    return AnswerKey(question_ids, keys, positions, code_question_ids)
+
+
+def align_answers(answer_key, answers):
+    """Project a submission's answers onto the answer-key positions.
+
+    Accepts {question_id: answer} mappings (string or int keys) and lists of
+    {"question_id": ..., "answer": ...} objects.
+    """
+    aligned = [None] * len(answer_key.keys)
+    if isinstance(answers, dict):
+        items = answers.items()
+    elif isinstance(answers, list):
+        items = (
+            (a.get("question_id"), a.get("answer")) for a in answers if isinstance(a, dict)
+        )
+    else:
+        return aligned
+
+    positions = answer_key.positions
+    for question_id, answer in items:
+        try:
+            position = positions.get(int(question_id))
+        except (TypeError, ValueError):
+            continue
+        if position is not None:
+            aligned[position] = normalize(answer)
+    return aligned
+
+
+def code_credit(answer_key, code_results):
+    """Fraction of test cases passed, summed over the code questions."""
+    code_results = code_results or {}
+    credit = 0.0
+    for question_id in answer_key.code_question_ids:
+        verdict = code_results.get(str(question_id))
+        if verdict and verdict.get("total"):
+            credit += verdict["passed"] / verdict["total"]
+    return credit
+
+
+def score(answer_key, answers, code_results=None):
+    """Percentage score with every question weighted equally.
+
+    A multiple-choice question counts 1 when correct; a codekata question
+    counts the share of its test cases the submitted code passed, and a
+    Codewars question counts 1 once the kata is completed.
+    """
+    questions = len(answer_key.keys) + len(answer_key.code_question_ids)
+    if not questions:
+        return None
+    aligned = align_answers(answer_key, answers)
+    correct = sum(map(operator.eq, aligned, answer_key.keys))
+    correct += code_credit(answer_key, code_results)
+    return round(100.0 * correct / questions, 2)
+
+
+def grade_assessment(assessment_id, only_ungraded=False, chunk_size=GRADE_CHUNK_SIZE):
+    """Grade every submission of an assessment against its answer keys.
+
+    Code questions use the verdicts already stored on each submission; the
+    sandbox runs when the submission is made (see code_grading) and Codewars
+    completions come from utils.codewars.sync_assessment.
+
+    Submissions are read in id-ordered chunks and each chunk is written back
+    with one executemany UPDATE, committing per chunk to bound lock time.
+    """
+    answer_key = load_answer_key(assessment_id)
+    questions = len(answer_key.keys) + len(answer_key.code_question_ids)
+    if not questions:
+        return {"graded": 0, "questions": 0}
+
+    graded = 0
+    last_id = 0
+    while True:
+        query = (
+            select(Submissions.id, Submissions.answers, Submissions.code_results)
+            .where(Submissions.assessment_id == assessment_id, Submissions.id > last_id)
+            .order_by(Submissions.id)
+            .limit(chunk_size)
+        )
+        if only_ungraded:
+            query = query.where(Submissions.grade.is_(None))
+
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        db.session.execute(
+            update(Submissions),
+            [
+                {"id": row.id, "grade": score(answer_key, row.answers, row.code_results)}
+                for row in rows
+            ],
+        )
+        db.session.commit()
+
+        graded += len(rows)
+        last_id = rows[-1].id
+
+    # 📊 One aggregate pass refreshes the dashboard rollup for the whole batch
+    rebuild_stats([assessment_id])
+    db.session.commit()
+
+    return {"graded": graded, "questions": questions}
@@ -0,0 +1,117 @@
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.metrics import COUNT_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+# "IN (?, ?, ?)" and "VALUES (?, ?), (?, ?)" vary with the batch size, not the query shape
+_PARAMETER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by endpoint."
+)
+requests_total = registry.counter("http_requests_total", "Requests by endpoint and status.")
+request_queries = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per request.", buckets=COUNT_BUCKETS
+)
+request_db_time = registry.histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per request."
+)
+n_plus_one_total = registry.counter(
+    "db_n_plus_one_total", "Requests that repeated one statement shape past the N+1 threshold."
+)
+slow_requests_total = registry.counter("http_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.")
+
+
+def statement_shape(statement):
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueries:
+    """SQL executed while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, None)
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        if elapsed > self.slowest[0]:
+            self.slowest = (elapsed, statement)
+        self.shapes[statement_shape(statement)] += 1
+
+
+def _current_queries():
+    return g.get("sql_queries") if has_app_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    queries = _current_queries()
+    if queries is not None:
+        queries.record(statement, elapsed)
+
+
+def init_instrumentation(app):
+    """Count and time the SQL behind every request, and flag N+1s and slow requests."""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_queries = RequestQueries()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        queries = g.pop("sql_queries", None)
+        if started is None or queries is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        method = request.method
+
+        request_duration.observe(elapsed, endpoint=endpoint, method=method)
+        requests_total.inc(endpoint=endpoint, method=method, status=response.status_code)
+        request_queries.observe(queries.count, endpoint=endpoint)
+        request_db_time.observe(queries.duration, endpoint=endpoint)
+
+        threshold = app.config["N_PLUS_ONE_THRESHOLD"]
+        repeated = [(shape, n) for shape, n in queries.shapes.most_common(3) if n > threshold]
+        if repeated:
+            n_plus_one_total.inc(endpoint=endpoint)
+            for shape, n in repeated:
+                logger.warning("Possible N+1 in %s %s: %d× %s", method, endpoint, n, shape)
+
+        if elapsed * 1000 >= app.config["SLOW_REQUEST_MS"]:
+            slow_requests_total.inc(endpoint=endpoint)
+            slowest_time, slowest_statement = queries.slowest
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries, %.0f ms in SQL; slowest %.0f ms: %s",
+                method,
+                request.path,
+                elapsed * 1000,
+                queries.count,
+                queries.duration * 1000,
+                slowest_time * 1000,
+                statement_shape(slowest_statement) if slowest_statement else "-",
+            )
+
+        return response
@@ -0,0 +1,32 @@
+import os
+
+
+def invite_url_for(token):
+    frontend_url = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
+    return f"{frontend_url}/invites/accept?token={token}"
+
+
+def invitation_email(interviewee, recruiter, assessment, invite_url, expires_at):
+    subject = "Assessment Invitation"
+    body = f"""Hello {interviewee.name or interviewee.email},
+
+You have been invited to take: {assessment.title}.
+Accept here: {invite_url}
+
+This invite expires on {expires_at.strftime("%Y-%m-%d %H:%M UTC")}.
+Best,
+{recruiter.name or "Your recruiter"}
+"""
+    return subject, body
+
+
+def reminder_email(interviewee, assessment, invite_url, expires_at):
+    subject = "Reminder: your assessment invitation expires soon"
+    body = f"""Hello {interviewee.name or interviewee.email},
+
+Your invitation to take {assessment.title} is still open.
+Accept here: {invite_url}
+
+It expires on {expires_at.strftime("%Y-%m-%d %H:%M UTC")}.
+"""
+    return subject, body
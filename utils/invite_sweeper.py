@@ -0,0 +1,207 @@
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, update
+
+from models import db, Assessments, Invites, MailOutbox, User
+from utils import assessment_stats
+from utils.invite_emails import invite_url_for, reminder_email
+from utils.notification import create_notifications
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 500
+REMINDER_WINDOW = timedelta(hours=24)
+
+
+def overdue_invites(now, batch_size=SWEEP_BATCH_SIZE):
+    """Ids of the next batch of pending invites past their expiry."""
+    return (
+        select(Invites.id)
+        .where(Invites.status == "pending", Invites.expires_at < now)
+        .order_by(Invites.expires_at)
+        .limit(batch_size)
+    )
+
+
+def invites_due_reminder(now, window=REMINDER_WINDOW, batch_size=SWEEP_BATCH_SIZE):
+    """Ids of the next batch of unreminded pending invites expiring within `window`."""
+    return (
+        select(Invites.id)
+        .where(
+            Invites.status == "pending",
+            Invites.expires_at >= now,
+            Invites.expires_at < now + window,
+            Invites.reminder_sent_at.is_(None),
+            Invites.sent_at < now - window,
+        )
+        .order_by(Invites.expires_at)
+        .limit(batch_size)
+    )
+
+
+def expire_overdue(batch_size=SWEEP_BATCH_SIZE):
+    """Mark pending invites past their expiry as expired, one batch per transaction.
+
+    The UPDATE re-checks status == "pending", so when several workers sweep
+    at once each invite is flipped (and counted in the rollup) exactly once.
+    """
+    expired = 0
+    while True:
+        overdue = overdue_invites(datetime.utcnow(), batch_size).scalar_subquery()
+        rows = db.session.execute(
+            update(Invites)
+            .where(Invites.id.in_(overdue), Invites.status == "pending")
+            .values(status="expired")
+            .returning(Invites.assessment_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            return expired
+
+        for assessment_id, count in Counter(row.assessment_id for row in rows).items():
+            assessment_stats.record_invites(assessment_id, "pending", "expired", count)
+        db.session.commit()
+        expired += len(rows)
+
+
+def send_reminders(window=REMINDER_WINDOW, batch_size=SWEEP_BATCH_SIZE):
+    """Remind candidates whose pending invite expires within `window`.
+
+    Invites are claimed by stamping reminder_sent_at in the same UPDATE
+    that selects them, and the notifications and emails commit with the
+    claim, so each invite gets one reminder however many workers run.
+    Invites sent less than `window` ago are left alone.
+    """
+    reminded = 0
+    while True:
+        now = datetime.utcnow()
+        due = invites_due_reminder(now, window, batch_size).scalar_subquery()
+        claimed = db.session.execute(
+            update(Invites)
+            .where(Invites.id.in_(due), Invites.status == "pending", Invites.reminder_sent_at.is_(None))
+            .values(reminder_sent_at=now)
+            .returning(Invites.id, Invites.interviewee_id, Invites.assessment_id, Invites.token, Invites.expires_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not claimed:
+            return reminded
+
+        users = {
+            user.id: user
+            for user in User.query.filter(User.id.in_({row.interviewee_id for row in claimed}))
+        }
+        assessments = {
+            assessment.id: assessment
+            for assessment in Assessments.query.filter(
+                Assessments.id.in_({row.assessment_id for row in claimed})
+            )
+        }
+
+        # 🧹 An invite whose candidate or assessment was deleted has nobody to
+        # remind; expire it instead of failing the whole batch
+        orphaned = [row for row in claimed if row.interviewee_id not in users or row.assessment_id not in assessments]
+        if orphaned:
+            db.session.execute(
+                update(Invites)
+                .where(Invites.id.in_([row.id for row in orphaned]), Invites.status == "pending")
+                .values(status="expired")
+                .execution_options(synchronize_session=False)
+            )
+            live_assessments = Counter(row.assessment_id for row in orphaned if row.assessment_id in assessments)
+            for assessment_id, count in live_assessments.items():
+                assessment_stats.record_invites(assessment_id, "pending", "expired", count)
+            claimed = [row for row in claimed if row not in orphaned]
+
+        # 🔔 One executemany for the notifications (stamped by create_notifications'
+        # UTC clock, like every other feed row), one for the emails
+        create_notifications(
+            [
+                {
+                    "user_id": row.interviewee_id,
+                    "text": f"Your invite to '{assessments[row.assessment_id].title}' expires soon",
+                    "assessment_id": row.assessment_id,
+                }
+                for row in claimed
+            ]
+        )
+        if claimed and os.getenv("MAIL_ENABLED", "true").lower() == "true":
+            email_rows = []
+            for row in claimed:
+                subject, body = reminder_email(
+                    users[row.interviewee_id],
+                    assessments[row.assessment_id],
+                    invite_url_for(row.token),
+                    row.expires_at,
+                )
+                email_rows.append(
+                    {
+                        "invite_id": row.id,
+                        "recipient": users[row.interviewee_id].email,
+                        "subject": subject,
+                        "body": body,
+                        "status": "queued",
+                        "attempts": 0,
+                        "next_attempt_at": now,
+                        "created_at": now,
+                    }
+                )
+            db.session.execute(insert(MailOutbox), email_rows)
+
+        db.session.commit()
+        reminded += len(claimed)
+
+
+def sweep_invites(batch_size=SWEEP_BATCH_SIZE, window=REMINDER_WINDOW):
+    """Expire overdue invites, then remind the ones about to expire."""
+    return {
+        "expired": expire_overdue(batch_size),
+        "reminded": send_reminders(window, batch_size),
+    }
+
+
+def start_invite_sweeper(app, interval=None):
+    """Run sweep_invites every `interval` seconds in a daemon thread for this process.
+
+    app.py starts it with the first request a process serves, so CLI
+    commands such as `flask db upgrade` never race it for the database.
+    """
+    interval = interval or app.config.get("INVITE_SWEEP_INTERVAL", 300)
+    batch_size = app.config.get("INVITE_SWEEP_BATCH_SIZE", SWEEP_BATCH_SIZE)
+    window = timedelta(hours=app.config.get("INVITE_REMINDER_HOURS", 24))
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    summary = sweep_invites(batch_size, window)
+                    if summary["expired"] or summary["reminded"]:
+                        logger.info("Invite sweep: %(expired)s expired, %(reminded)s reminded", summary)
+                except Exception:
+                    logger.exception("Invite sweep failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            stop.wait(interval)
+
+    thread = threading.Thread(target=run, name="invite-sweeper", daemon=True)
+    thread.start()
+    return stop
+
+
+@click.command("sweep-invites")
+@with_appcontext
+def sweep_invites_command():
+    """Expire overdue invites and send expiry reminders once (for cron)."""
+    summary = sweep_invites(
+        current_app.config.get("INVITE_SWEEP_BATCH_SIZE", SWEEP_BATCH_SIZE),
+        timedelta(hours=current_app.config.get("INVITE_REMINDER_HOURS", 24)),
+    )
+    click.echo(f"{summary['expired']} invites expired, {summary['reminded']} reminders queued")
@@ -0,0 +1,95 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+
+TOKEN_VERSION = "v1"
+# secrets.token_urlsafe(32), the format of every token issued before signing
+LEGACY_TOKEN = re.compile(r"^[A-Za-z0-9_-]{43}$")
+OUTCOME_CACHE_SIZE = 4096
+
+
+class InvalidInviteToken(Exception):
+    """Malformed, forged, or (when legacy tokens are off) unsigned."""
+
+
+class ExpiredInviteToken(Exception):
+    pass
+
+
+def _key():
+    secret = current_app.config.get("INVITE_TOKEN_SECRET")
+    if secret:
+        return secret.encode()
+    # Derived rather than reused, so an invite signature can never pass as a JWT one
+    return hmac.new(current_app.config["JWT_SECRET_KEY"].encode(), b"invite-tokens", hashlib.sha256).digest()
+
+
+def _signature(payload):
+    digest = hmac.new(_key(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def sign_invite_token(invite_id, expires_at):
+    """`v1.<invite id>.<expiry as unix seconds>.<HMAC-SHA256>`; expires_at is naive UTC."""
+    payload = f"{TOKEN_VERSION}.{invite_id}.{calendar.timegm(expires_at.utctimetuple())}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def verify_invite_token(token, now=None):
+    """Return the invite id a signed token is for, or None for a legacy random token.
+
+    Everything is checked in memory; raises InvalidInviteToken or
+    ExpiredInviteToken without touching the database.
+    """
+    parts = token.split(".")
+    if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+        if current_app.config.get("INVITE_LEGACY_TOKENS", True) and LEGACY_TOKEN.match(token):
+            return None
+        raise InvalidInviteToken()
+
+    _, invite_id, expires, signature = parts
+    if not (invite_id.isdigit() and expires.isdigit()):
+        raise InvalidInviteToken()
+    if not hmac.compare_digest(signature, _signature(".".join(parts[:3]))):
+        raise InvalidInviteToken()
+    if int(expires) < calendar.timegm((now or datetime.utcnow()).utctimetuple()):
+        raise ExpiredInviteToken()
+    return int(invite_id)
+
+
+class OutcomeCache:
+    """LRU of final accept outcomes per token, so repeat attempts skip the database.
+
+    Only outcomes that can never change are stored: unknown tokens and
+    invites that are no longer pending. The invitee is kept with the
+    outcome so other users still get a 403.
+    """
+
+    def __init__(self, size=OUTCOME_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                self._entries.move_to_end(token)
+            return entry
+
+    def remember(self, token, interviewee_id, body, status):
+        with self._lock:
+            self._entries[token] = (interviewee_id, body, status)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+accept_outcomes = OutcomeCache()
@@ -0,0 +1,92 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import update
+
+from models import db, Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """Register `fn(progress, **params)` as the runner for jobs of `kind`."""
+
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("JOB_WORKERS", 2), thread_name_prefix="jobs"
+            )
+        return _executor
+
+
+def enqueue_job(kind, owner_id, params, total=None):
+    """Record a job and start it on this process's job pool once committed."""
+    if kind not in HANDLERS:
+        raise KeyError(f"No handler registered for job kind {kind!r}")
+
+    job = Job(kind=kind, owner_id=owner_id, params=params, total=total, status="queued", processed=0)
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _get_executor(app).submit(run_job, app, job.id)
+    return job
+
+
+def _progress(job_id):
+    def advance(count):
+        # Written in the caller's transaction, so progress commits with each chunk
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(processed=Job.processed + count)
+        )
+
+    return advance
+
+
+def run_job(app, job_id):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        if job is None or job.status != "queued":
+            return
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        handler = HANDLERS[job.kind]
+        params = dict(job.params or {})
+
+        try:
+            result = handler(progress=_progress(job_id), **params)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            db.session.rollback()
+            db.session.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(status="failed", error=str(exc), finished_at=datetime.utcnow())
+            )
+        else:
+            db.session.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(status="succeeded", result=result, finished_at=datetime.utcnow())
+            )
+        db.session.commit()
+        db.session.remove()
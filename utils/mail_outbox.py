@@ -0,0 +1,173 @@
+import logging
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+from sqlalchemy import and_, or_, select, update
+
+from models import db, MailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BASE_BACKOFF_SECONDS = 30
+STALE_CLAIM_AFTER = timedelta(minutes=10)
+
+
+def enqueue_email(recipient, subject, body, invite_id=None):
+    """Queue an email in the caller's session; it is delivered after commit."""
+    email = MailOutbox(
+        invite_id=invite_id,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        status="queued",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        created_at=datetime.utcnow(),
+    )
+    db.session.add(email)
+    return email
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=BASE_BACKOFF_SECONDS * (2 ** (attempts - 1)))
+
+
+def claim_batch(batch_size):
+    """Atomically claim due emails so concurrent workers never send the same row.
+
+    The UPDATE repeats the whole due-or-stale condition: a row another worker
+    claimed after our subquery ran is "sending" with a fresh locked_at, and
+    must not match again (Postgres re-checks the WHERE on the locked row).
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+
+    due = or_(
+        and_(MailOutbox.status == "queued", MailOutbox.next_attempt_at <= now),
+        and_(MailOutbox.status == "sending", MailOutbox.locked_at < now - STALE_CLAIM_AFTER),
+    )
+    due_ids = (
+        select(MailOutbox.id)
+        .where(due)
+        .order_by(MailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(MailOutbox)
+        .where(MailOutbox.id.in_(due_ids))
+        .where(due)
+        .values(status="sending", claim_token=token, locked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return MailOutbox.query.filter_by(claim_token=token, status="sending").all()
+
+
+def deliver_pending(batch_size=50):
+    """Send one batch of due emails over a single SMTP connection.
+
+    Returns the number of emails delivered. Must run inside an app context.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0
+
+    mail = current_app.extensions["mail"]
+    delivered = 0
+    remaining = list(emails)
+
+    try:
+        with mail.connect() as conn:
+            while remaining:
+                email = remaining[0]
+                try:
+                    conn.send(Message(subject=email.subject, recipients=[email.recipient], body=email.body))
+                except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                    # Connection-level failure: the rest of the batch cannot go out either
+                    raise
+                except Exception as e:
+                    _mark_failed_attempt(email, e)
+                else:
+                    email.status = "sent"
+                    email.sent_at = datetime.utcnow()
+                    email.attempts += 1
+                    email.last_error = None
+                    delivered += 1
+                remaining.pop(0)
+    except Exception as e:
+        logger.warning("Mail outbox connection failed: %s", e)
+        for email in remaining:
+            _mark_failed_attempt(email, e)
+
+    for email in emails:
+        email.claim_token = None
+        email.locked_at = None
+    db.session.commit()
+    return delivered
+
+
+def _mark_failed_attempt(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = "failed"
+    else:
+        email.status = "queued"
+        email.next_attempt_at = datetime.utcnow() + backoff_delay(email.attempts)
+
+
+def start_outbox_worker(app, interval=None, batch_size=None):
+    """Run the outbox delivery loop in a daemon thread for this process.
+
+    app.py starts it with the first request a process serves (see
+    utils.background); `flask deliver-mail` runs the same loop on its own.
+    """
+    interval = interval or app.config.get("MAIL_OUTBOX_INTERVAL", 5)
+    batch_size = batch_size or app.config.get("MAIL_OUTBOX_BATCH_SIZE", 50)
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            delivered = 0
+            with app.app_context():
+                try:
+                    delivered = deliver_pending(batch_size)
+                except Exception:
+                    logger.exception("Mail outbox delivery loop failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            # Keep draining while full batches are coming back
+            if delivered < batch_size:
+                stop.wait(interval)
+
+    thread = threading.Thread(target=run, name="mail-outbox", daemon=True)
+    thread.start()
+    return stop
+
+
+@click.command("deliver-mail")
+@click.option("--once", is_flag=True, help="Deliver what is due now and exit (for cron).")
+@with_appcontext
+def deliver_mail_command(once):
+    """Deliver queued emails, in the foreground, until interrupted."""
+    batch_size = current_app.config.get("MAIL_OUTBOX_BATCH_SIZE", 50)
+    if once:
+        delivered = 0
+        while True:
+            sent = deliver_pending(batch_size)
+            delivered += sent
+            if sent < batch_size:
+                break
+        click.echo(f"{delivered} emails delivered")
+        return
+    start_outbox_worker(current_app._get_current_object()).wait()
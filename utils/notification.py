@@ -1,15 +1,105 @@
 from models import Notification
 from datetime import datetime
 from models import db
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from utils.notification_stream import broker
+
+PENDING_KEY = "pending_notifications"
+WRITTEN_KEY = "written_notifications"
+
+
+# Every notification is stamped with naive UTC: the feed is keyset-ordered by
+# (timestamp, id), so one writer on another clock would skip or reorder rows.
 
 
 def create_notification(user_id, text, assessment_id=None):
-    notification = Notification(
-        user_id=user_id,
-        text=text,
-        assessment_id=assessment_id,
-        timestamp=datetime.now(),
-        read=False,
+    """Queue a notification in the caller's unit of work.
+
+    Nothing is committed here: queued rows are written with one executemany
+    when the session commits (or at the end of the request).
+    """
+    db.session.info.setdefault(PENDING_KEY, []).append(
+        {
+            "user_id": user_id,
+            "text": text,
+            "assessment_id": assessment_id,
+            "timestamp": datetime.utcnow(),
+            "read": False,
+        }
     )
-    db.session.add(notification)
-    db.session.commit()
+
+
+def create_notifications(rows):
+    """Insert many notifications with a single executemany, without committing.
+
+    `rows` are dicts with user_id, text and optionally assessment_id.
+    """
+    now = datetime.utcnow()
+    payload = [
+        {
+            "user_id": row["user_id"],
+            "text": row["text"],
+            "assessment_id": row.get("assessment_id"),
+            "timestamp": row.get("timestamp", now),
+            "read": False,
+        }
+        for row in rows
+    ]
+    _insert_notifications(db.session(), payload)
+    return len(payload)
+
+
+def _insert_notifications(session, rows):
+    if not rows:
+        return
+    ids = session.scalars(
+        insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    # Remember what was written so it can be pushed to live streams after commit
+    written = session.info.setdefault(WRITTEN_KEY, [])
+    for notification_id, row in zip(ids, rows):
+        written.append((notification_id, row))
+
+
+def flush_notifications(session=None):
+    session = session or db.session()
+    pending = session.info.pop(PENDING_KEY, None)
+    _insert_notifications(session, pending)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_notifications(session):
+    flush_notifications(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_written_notifications(session):
+    for notification_id, row in session.info.pop(WRITTEN_KEY, None) or ():
+        broker.publish(
+            row["user_id"],
+            {
+                "id": notification_id,
+                "text": row["text"],
+                "timestamp": row["timestamp"].isoformat(),
+                "read": False,
+                "assessmentId": row["assessment_id"],
+            },
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_notifications(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(WRITTEN_KEY, None)
+
+
+def init_notifications(app):
+    """Commit notifications queued by a request that never committed itself."""
+
+    @app.after_request
+    def commit_pending_notifications(response):
+        if response.status_code < 400 and db.session.info.get(PENDING_KEY):
+            db.session.commit()
+        return response
@@ -0,0 +1,120 @@
+import json
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class NotificationBroker:
+    """Fans notifications out to the SSE subscribers connected to this process.
+
+    Publishing goes through a backend: the local backend dispatches straight
+    to this process, the Redis backend relays through a channel so every
+    worker receives every notification and dispatches to its own clients.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.backend = LocalBackend(self)
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, user_id, payload):
+        try:
+            self.backend.publish(user_id, payload)
+        except Exception:
+            logger.exception("Failed to publish notification %s", payload.get("id"))
+
+    def dispatch(self, user_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(payload)
+            except queue.Full:
+                # A stalled client resyncs from Last-Event-ID when it reconnects
+                pass
+
+
+class LocalBackend:
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, user_id, payload):
+        self.broker.dispatch(user_id, payload)
+
+    def close(self):
+        pass
+
+
+class RedisBackend:
+    """Cross-worker fan-out over a Redis pub/sub channel (needs the `redis` package)."""
+
+    def __init__(self, broker, url, channel="notifications"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("NOTIFICATION_BROKER_URL requires the 'redis' package")
+
+        self.broker = broker
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._listen, name="notification-fanout", daemon=True)
+        self._thread.start()
+
+    def publish(self, user_id, payload):
+        self.client.publish(self.channel, json.dumps({"user_id": user_id, "notification": payload}))
+
+    def _listen(self):
+        while not self._stop.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        data = json.loads(message["data"])
+                        self.broker.dispatch(data["user_id"], data["notification"])
+            except Exception:
+                logger.exception("Notification fan-out connection lost, reconnecting")
+                self._stop.wait(1.0)
+            finally:
+                pubsub.close()
+
+    def close(self):
+        self._stop.set()
+
+
+broker = NotificationBroker()
+
+
+def init_notification_stream(app):
+    url = app.config.get("NOTIFICATION_BROKER_URL")
+    if url:
+        broker.backend = RedisBackend(broker, url)
+
+
+def format_event(payload):
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
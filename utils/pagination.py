@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_limit(limit, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def encode_cursor(*values):
+    """Pack the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the list of values packed by encode_cursor, or raise ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_page(rows, limit, key):
+    """Trim a `limit + 1` result to one page and build the next-page headers."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    headers = {}
+    if has_more and rows:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows, headers
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import bcrypt
+from werkzeug.security import check_password_hash as werkzeug_check_password_hash
+
+DEFAULT_ROUNDS = 12
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE_TIMEOUT = 5
+# bcrypt only looks at the first 72 bytes; newer releases raise instead of truncating
+BCRYPT_MAX_BYTES = 72
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when every hashing slot is taken for longer than the queue timeout."""
+
+
+class PasswordHasher:
+    """bcrypt hashing behind a bounded number of slots so CPU-bound work cannot take over request threads.
+
+    The hash runs on the calling thread once it holds a slot. bcrypt releases
+    the GIL while hashing, so threaded workers keep serving other requests.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=DEFAULT_WORKERS, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.rounds = rounds
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy()
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, plain_password):
+        salt = bcrypt.gensalt(self.rounds)
+        return self._run(bcrypt.hashpw, _encode(plain_password), salt).decode("utf-8")
+
+    def verify(self, stored_hash, plain_password):
+        if not stored_hash:
+            return False
+        if is_bcrypt(stored_hash):
+            return self._run(bcrypt.checkpw, _encode(plain_password), stored_hash.encode("utf-8"))
+        # Hashes written by the old werkzeug-based User.set_password
+        return self._run(werkzeug_check_password_hash, stored_hash, plain_password)
+
+    def needs_rehash(self, stored_hash):
+        return not is_bcrypt(stored_hash) or bcrypt_rounds(stored_hash) != self.rounds
+
+
+def _encode(plain_password):
+    return plain_password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def is_bcrypt(stored_hash):
+    return stored_hash.startswith(("$2b$", "$2a$", "$2y$"))
+
+
+def bcrypt_rounds(stored_hash):
+    try:
+        return int(stored_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+hasher = PasswordHasher()
+
+
+def init_passwords(app):
+    global hasher
+    hasher = PasswordHasher(
+        rounds=app.config.get("BCRYPT_LOG_ROUNDS", DEFAULT_ROUNDS),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS),
+        queue_timeout=app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT),
+    )
+
+
+def hash_password(plain_password):
+    return hasher.hash(plain_password)
+
+
+def verify_password(stored_hash, plain_password):
+    return hasher.verify(stored_hash, plain_password)
+
+
+def needs_rehash(stored_hash):
+    return hasher.needs_rehash(stored_hash)
@@ -0,0 +1,177 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Query, Session
+
+from models import (
+    db,
+    User,
+    Assessments,
+    Questions,
+    Submissions,
+    Feedback,
+    Invites,
+    Results,
+    Profile,
+    Notification,
+)
+from resources.assessments import _catalogue_columns, catalogue_conditions, catalogue_query, export_query
+from resources.feedback import recruiter_feedback_query, submission_feedback_query
+from resources.invites import pending_invitees_query, recruiter_invites_query
+from resources.notification import missed_notifications_query, notification_feed_query
+from resources.results import ranking_query, released_results_query
+from resources.Submission import submission_list_query
+from resources.user import recruiter_interviewees_query, recruiter_score_buckets_query, recruiter_stats_query
+from utils.invite_sweeper import invites_due_reminder, overdue_invites
+from utils.question_cache import assessment_questions_query
+
+# A SQLite plan line like "SCAN submissions" (no index) means a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?! USING (?:COVERING )?INDEX)")
+# A LIMITed query that sorts in a temp B-tree reads every matching row to return one page
+TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?ORDER BY")
+PAGE = 21
+# Pages that must be driven by their owner's index: a rowid range over the
+# whole table ("USING INTEGER PRIMARY KEY (rowid<?)") is not a full scan, but
+# it reads every user's rows on the way to one user's page
+DRIVING_INDEXES = {
+    "notifications feed, next page": "ix_notifications_user_timestamp",
+    "missed notifications": "ix_notifications_user_id",
+    "recruiter submissions, next page": "ix_submissions_recruiter_id",
+    "recruiter feedback": "ix_feedback_recruiter_id",
+    "recruiter feedback, next page": "ix_feedback_recruiter_id",
+    "recruiter catalogue": "ix_assessments_creator_id",
+}
+
+
+def resource_queries():
+    """The statements the resources and sweepers build, with representative parameters."""
+    now = datetime.now()
+    return {
+        "notifications feed": notification_feed_query(1).limit(PAGE),
+        "notifications feed, next page": notification_feed_query(1, before=(now, 1000)).limit(PAGE),
+        "unread notifications": notification_feed_query(1, unread_only=True).limit(PAGE),
+        "missed notifications": missed_notifications_query(1, 1000),
+        "recruiter submissions": submission_list_query(1).limit(PAGE),
+        "recruiter submissions, next page": submission_list_query(1, before_id=2000).limit(PAGE),
+        "recruiter submissions, filtered": submission_list_query(
+            1, assessment_id=1, graded=True, submitted_from=now - timedelta(days=1), before_id=2000
+        ).limit(PAGE),
+        "assessment export": export_query(1),
+        "interviewee results": released_results_query(200),
+        "result by submission": select(Results).where(Results.submission_id == 1),
+        "recruiter ranking": ranking_query(1).limit(PAGE),
+        "recruiter ranking, next page": ranking_query(1, after=(1, 5, 100)).limit(PAGE),
+        "recruiter invites": recruiter_invites_query(1),
+        "pending invitees": pending_invitees_query(1, [1, 2, 3]),
+        "overdue pending invites": overdue_invites(now),
+        "invites due a reminder": invites_due_reminder(now),
+        "assessment questions": assessment_questions_query(1),
+        "submission feedback": submission_feedback_query(1),
+        "recruiter feedback": recruiter_feedback_query(1).limit(PAGE),
+        "recruiter feedback, next page": recruiter_feedback_query(1, before_id=500).limit(PAGE),
+        "own profile": select(Profile).where(Profile.user_id == 1),
+        "recruiter catalogue": catalogue_query(
+            _catalogue_columns(None), catalogue_conditions("recruiter", 1, title="Assess"), after_id=1
+        ).limit(PAGE),
+        "recruiter stats": recruiter_stats_query(1),
+        "recruiter score buckets": recruiter_score_buckets_query(1),
+        "recruiter interviewees": recruiter_interviewees_query(1),
+    }
+
+
+def seed(session, users=400, assessments=40, submissions=4000):
+    rng = random.Random(7)
+    now = datetime.now()
+
+    session.add_all(
+        User(id=i, name=f"user{i}", email=f"user{i}@example.com", password="x",
+             role="recruiter" if i <= users // 10 else "interviewee")
+        for i in range(1, users + 1)
+    )
+    creators = {i: rng.randint(1, users // 10) for i in range(1, assessments + 1)}
+    session.add_all(
+        Assessments(id=i, title=f"Assessment {i}", creator_id=creators[i], published=True, time_limit=60)
+        for i in range(1, assessments + 1)
+    )
+    session.add_all(
+        Questions(assessment_id=rng.randint(1, assessments), type="multiple_choice",
+                  prompt="?", options=["a", "b"], answer_key="a")
+        for _ in range(assessments * 10)
+    )
+    submission_assessments = {i: rng.randint(1, assessments) for i in range(1, submissions + 1)}
+    session.add_all(
+        Submissions(id=i, assessment_id=a, recruiter_id=creators[a],
+                    user_id=rng.randint(users // 10 + 1, users), answers={},
+                    submitted_at=now - timedelta(minutes=i))
+        for i, a in submission_assessments.items()
+    )
+    session.add_all(
+        Results(submission_id=i, assessment_id=submission_assessments[i], score=rng.random() * 100,
+                rank=rng.randint(1, 50))
+        for i in range(1, submissions + 1, 2)
+    )
+    session.add_all(
+        Feedback(submission_id=rng.randint(1, submissions), question_id=1,
+                 recruiter_id=rng.randint(1, users // 10), comment="ok")
+        for _ in range(submissions // 4)
+    )
+    session.add_all(
+        Invites(recruiter_id=rng.randint(1, users // 10), interviewee_id=rng.randint(1, users),
+                assessment_id=rng.randint(1, assessments), status="pending",
+                sent_at=now, expires_at=now + timedelta(days=rng.randint(-5, 5)))
+        for _ in range(submissions)
+    )
+    session.add_all(Profile(user_id=i) for i in range(1, users + 1))
+    session.add_all(
+        Notification(user_id=rng.randint(1, users), text="n", read=rng.random() < 0.5,
+                     timestamp=now - timedelta(minutes=i))
+        for i in range(submissions * 2)
+    )
+    session.commit()
+
+
+def explain(connection, statement):
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(echo=print):
+    """Seed a SQLite copy of the schema; fail on full scans, sorted pages or pages off their index."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session)
+
+    failures = []
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+        for name, statement in resource_queries().items():
+            if isinstance(statement, Query):
+                statement = statement.statement
+            plan = explain(connection, statement)
+            problems = [line for line in plan if FULL_SCAN.match(line)]
+            # Exports and lookups read every matching row anyway; a page must not
+            if statement._limit_clause is not None:
+                problems += [line for line in plan if TEMP_SORT.match(line)]
+            index = DRIVING_INDEXES.get(name)
+            if index and not any(f" INDEX {index} (" in line for line in plan):
+                problems.append(f"not driven by {index}")
+            echo(f"{'FAIL' if problems else 'ok  '} {name}: {'; '.join(plan)}")
+            if problems:
+                failures.append(name)
+    return failures
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """Assert every resource query is served by an index, and every page in index order."""
+    failures = check_query_plans(echo=click.echo)
+    if failures:
+        raise click.ClickException(f"Full table scans, sorted pages or pages off their index in: {', '.join(failures)}")
+    click.echo("All resource queries use an index.")
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from models import db, Assessments, Questions
+from utils.serializers import output_json, serialize_many
+
+CACHE_TTL = 30
+MAX_ENTRIES = 1000
+HIDDEN_FIELDS = ("answer_key",)
+
+CachedPayload = namedtuple("CachedPayload", ["etag", "body", "creator_id", "expires_at"])
+
+# LRU of payloads; build locks only exist while a rebuild is in flight
+_cache = OrderedDict()
+_lock = threading.Lock()
+_build_locks = {}
+
+
+def _fresh(assessment_id):
+    with _lock:
+        cached = _cache.get(assessment_id)
+        if cached is None:
+            return None
+        if cached.expires_at <= time.monotonic():
+            del _cache[assessment_id]
+            return None
+        _cache.move_to_end(assessment_id)
+        return cached
+
+
+def candidate_payload(assessment_id, ttl=CACHE_TTL):
+    """Return the answer-key-stripped question list for an assessment.
+
+    The JSON body is encoded once and shared by every request until it is
+    invalidated or the TTL runs out (the TTL bounds staleness across workers,
+    since invalidation only reaches the current process).
+    """
+    cached = _fresh(assessment_id)
+    if cached:
+        return cached
+
+    with _lock:
+        build_lock = _build_locks.setdefault(assessment_id, threading.Lock())
+
+    # Single flight: concurrent misses wait for one rebuild instead of all querying
+    with build_lock:
+        cached = _fresh(assessment_id)
+        if cached:
+            return cached
+        cached = _build(assessment_id, ttl)
+        with _lock:
+            _cache[assessment_id] = cached
+            _cache.move_to_end(assessment_id)
+            while len(_cache) > MAX_ENTRIES:
+                _cache.popitem(last=False)
+            # Later misses find the fresh payload; waiters still hold their reference
+            if _build_locks.get(assessment_id) is build_lock:
+                del _build_locks[assessment_id]
+        return cached
+
+
+def assessment_questions_query(assessment_id):
+    return Questions.query.filter_by(assessment_id=assessment_id).order_by(Questions.id)
+
+
+def _build(assessment_id, ttl):
+    creator_id = db.session.query(Assessments.creator_id).filter_by(id=assessment_id).scalar()
+    questions = assessment_questions_query(assessment_id).all()
+    payload = [candidate_view(question) for question in serialize_many(questions)]
+    body = output_json(payload, 200).get_data()
+    return CachedPayload(
+        etag=hashlib.sha256(body).hexdigest(),
+        body=body,
+        creator_id=creator_id,
+        expires_at=time.monotonic() + ttl,
+    )
+
+
+def candidate_view(question):
+    """A serialized question without its answer key or codekata test cases."""
+    view = {key: value for key, value in question.items() if key not in HIDDEN_FIELDS}
+    meta = view.get("meta")
+    if isinstance(meta, dict) and "tests" in meta:
+        # Codekata test cases hold the expected outputs
+        view["meta"] = {key: value for key, value in meta.items() if key != "tests"}
+    return view
+
+
+def invalidate(assessment_id):
+    with _lock:
+        _cache.pop(assessment_id, None)
@@ -0,0 +1,27 @@
+from sqlalchemy import func, select, update
+
+from models import db, Results
+
+
+def rank_window():
+    """RANK() OVER (PARTITION BY assessment ORDER BY score DESC, time_taken)."""
+    return func.rank().over(
+        partition_by=Results.assessment_id,
+        order_by=(Results.score.desc().nulls_last(), Results.time_taken.asc().nulls_last()),
+    )
+
+
+def refresh_ranks(assessment_id):
+    """Recompute stored ranks for one assessment, writing only rows that moved."""
+    ranked = (
+        select(Results.id, rank_window().label("new_rank"))
+        .where(Results.assessment_id == assessment_id)
+        .subquery()
+    )
+    return db.session.execute(
+        update(Results)
+        .where(Results.id == ranked.c.id)
+        .where(Results.rank.is_distinct_from(ranked.c.new_rank))
+        .values(rank=ranked.c.new_rank)
+        .execution_options(synchronize_session=False)
+    ).rowcount
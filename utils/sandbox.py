@@ -0,0 +1,229 @@
+import builtins
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import namedtuple
+
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_runner.py")
+JAIL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_jail.py")
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The only host paths a worker can see, read-only (plus the interpreter's prefix)
+SYSTEM_PATHS = ("/usr", "/bin", "/lib", "/lib32", "/lib64")
+DEFAULT_WORKERS = 2
+DEFAULT_CPU_SECONDS = 2
+DEFAULT_MEMORY_MB = 256
+DEFAULT_WALL_SECONDS = 5
+FILE_LIMIT_BYTES = 1024 * 1024
+
+Limits = namedtuple("Limits", ["cpu_seconds", "memory_mb", "wall_seconds"])
+
+# Worker exits that mean the CPU limit was hit (SIGXCPU at the soft limit, SIGKILL at the hard one)
+CPU_SIGNALS = (-signal.SIGXCPU, -signal.SIGKILL)
+
+RUNNER_STATUSES = {"ok", "compile_error", "missing_entry_point", "memory_limit"}
+# Runner errors are stored and shown to recruiters, so only these shapes get through
+BUILTIN_EXCEPTIONS = {
+    name for name, value in vars(builtins).items() if isinstance(value, type) and issubclass(value, BaseException)
+}
+LINE_ERROR = re.compile(r"^(\w+) at line \d{1,6}$")
+
+
+class SandboxUnavailable(Exception):
+    """This host cannot isolate submitted code, so none is run."""
+
+
+def _within(path, base):
+    return os.path.commonpath([path, base]) == base
+
+
+def jail_binds():
+    """(interpreter, [[source, target], ...]) for the worker's root, checked against the app directory."""
+    python = os.path.realpath(sys.executable)
+    sources = [path for path in SYSTEM_PATHS if os.path.lexists(path)]
+    prefix = os.path.realpath(sys.base_prefix)
+    if not any(_within(prefix, os.path.realpath(path)) for path in sources):
+        sources.append(prefix)
+    for path in sources:
+        if _within(os.path.realpath(APP_ROOT), os.path.realpath(path)):
+            raise SandboxUnavailable(f"{path} contains the application directory")
+    if not any(_within(python, os.path.realpath(path)) for path in sources):
+        raise SandboxUnavailable(f"{python} is outside the paths a worker can see")
+    return python, [[path, path] for path in sources] + [[RUNNER, "/sandbox/runner.py"]]
+
+
+class SandboxPool:
+    """Pre-started runner processes, each used for exactly one job and then replaced.
+
+    Workers are spawned ahead of time so a job only pays for the code it
+    runs, not for interpreter start-up. A spent worker is replaced in the
+    background, and at most `workers` jobs run at once; the rest wait for a
+    warm process. Each worker runs as nobody in its own namespaces with no
+    network and no view of the app (see sandbox_jail.py). The pool will not
+    start as root, and checks that a worker really comes up jailed first.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, limits=None):
+        if os.geteuid() == 0:
+            raise SandboxUnavailable("Refusing to run submitted code as root; run the app as an unprivileged user")
+        self.limits = limits or Limits(DEFAULT_CPU_SECONDS, DEFAULT_MEMORY_MB, DEFAULT_WALL_SECONDS)
+        self._python, self._binds = jail_binds()
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+        self._probe()
+
+    def _probe(self):
+        report = self.run("import os\ndef solution():\n    return os.getuid()", "solution", [[]])
+        if report["status"] != "ok" or report["outputs"] != [{"value": 65534}]:
+            raise SandboxUnavailable(f"Sandbox workers do not start jailed ({report['status']})")
+
+    def _spawn(self):
+        workdir = tempfile.mkdtemp(prefix="sandbox-")
+        config = {
+            "binds": self._binds,
+            "python": self._python,
+            "argv": [
+                str(self.limits.cpu_seconds),
+                str(self.limits.memory_mb * 1024 * 1024),
+                str(FILE_LIMIT_BYTES),
+            ],
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-I", "-S", JAIL, workdir, json.dumps(config)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=workdir,
+            env={},
+            # Own process group, so a timeout kills anything the job left behind
+            start_new_session=True,
+        )
+        return process, workdir
+
+    def _replace(self):
+        threading.Thread(target=lambda: self._idle.put(self._spawn()), daemon=True).start()
+
+    def run(self, code, entry_point, inputs):
+        """Run one job on a warm worker; returns the runner's report."""
+        process, workdir = self._idle.get()
+        self._replace()
+        payload = json.dumps({"code": code, "entry_point": entry_point, "inputs": inputs}).encode()
+        try:
+            output, _ = process.communicate(payload, timeout=self.limits.wall_seconds)
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            return {"status": "timeout"}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        if process.returncode in CPU_SIGNALS:
+            return {"status": "cpu_limit"}
+        try:
+            return _clean_report(json.loads(output))
+        except (ValueError, TypeError, AttributeError):
+            return {"status": "crashed", "error": f"runner exited with {process.returncode}"}
+
+
+def _clean_error(error):
+    match = LINE_ERROR.match(error) if isinstance(error, str) else None
+    if error in BUILTIN_EXCEPTIONS or (match and match.group(1) in BUILTIN_EXCEPTIONS):
+        return error
+    return "Exception"
+
+
+def _clean_report(report):
+    """Keep only the report fields and error labels the runner is allowed to send.
+
+    Submitted code shares the runner's process and could write its own
+    report, so nothing free-form from it is trusted.
+    """
+    if report.get("status") not in RUNNER_STATUSES:
+        return {"status": "crashed", "error": "runner sent an invalid report"}
+    clean = {"status": report["status"]}
+    if "error" in report:
+        clean["error"] = _clean_error(report["error"])
+    if report["status"] == "ok":
+        clean["outputs"] = [
+            {"error": _clean_error(output["error"])} if "error" in output else {"value": output.get("value")}
+            for output in report.get("outputs", [])
+        ]
+    return clean
+
+
+def _kill(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.communicate()
+
+
+def test_cases(meta):
+    """(entry point, tests) from a codekata question's meta.
+
+    meta = {"entry_point": "solution", "tests": [{"args": [1, 2], "expected": 3}, ...]}
+    """
+    meta = meta or {}
+    tests = [test for test in meta.get("tests") or () if isinstance(test, dict)]
+    return meta.get("entry_point") or "solution", tests
+
+
+def verdict_for(report, tests):
+    """Compare a runner report with the expected outputs."""
+    verdict = {"status": report["status"], "passed": 0, "total": len(tests), "tests": []}
+    if "error" in report:
+        verdict["error"] = report["error"]
+    if report["status"] != "ok":
+        return verdict
+
+    for test, output in zip(tests, report.get("outputs", [])):
+        outcome = {"passed": "value" in output and output["value"] == test.get("expected")}
+        if "error" in output:
+            outcome["error"] = output["error"]
+        verdict["tests"].append(outcome)
+        verdict["passed"] += outcome["passed"]
+    return verdict
+
+
+def cacheable(verdict):
+    # Wall-clock timeouts depend on load at the time; every other verdict is a property of the code
+    return verdict["status"] not in ("timeout", "crashed")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_settings = {"workers": DEFAULT_WORKERS, "limits": None}
+
+
+def init_sandbox(app):
+    _settings["workers"] = app.config.get("SANDBOX_WORKERS", DEFAULT_WORKERS)
+    _settings["limits"] = Limits(
+        app.config.get("SANDBOX_CPU_SECONDS", DEFAULT_CPU_SECONDS),
+        app.config.get("SANDBOX_MEMORY_MB", DEFAULT_MEMORY_MB),
+        app.config.get("SANDBOX_WALL_SECONDS", DEFAULT_WALL_SECONDS),
+    )
+
+
+def get_pool():
+    """The process's sandbox pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool(**_settings)
+        return _pool
+
+
+def execute(code, meta):
+    """Run `code` against a question's test cases and return its verdict."""
+    entry_point, tests = test_cases(meta)
+    if not tests:
+        return {"status": "no_tests", "passed": 0, "total": 0, "tests": []}
+    report = get_pool().run(code, entry_point, [test.get("args", []) for test in tests])
+    return verdict_for(report, tests)
@@ -0,0 +1,145 @@
+"""Starts one sandbox worker inside its own namespaces; standard library only.
+
+Started as `python -I -S sandbox_jail.py ROOT CONFIG_JSON` by SandboxPool,
+which refuses to run as root. Before any submitted code exists this:
+
+- enters new user, mount, network, PID, IPC and UTS namespaces. The worker
+  has no network (not even loopback is up) and cannot see or signal any
+  process outside its namespace;
+- maps the app's uid and gid to nobody (65534) inside the user namespace;
+- mounts a tmpfs on ROOT holding read-only binds of the interpreter and
+  system libraries only, and chroots into it. The application directory,
+  its .env and the database are not part of the worker's filesystem;
+- execs sandbox_runner.py as nobody, which drops every capability the
+  namespace granted.
+
+CONFIG_JSON is {"binds": [[source, target], ...], "python": path, "argv": [...]}.
+"""
+import ctypes
+import json
+import os
+import resource
+import signal
+import sys
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_NOATIME = 0x400
+MS_NODIRATIME = 0x800
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+MS_RELATIME = 0x200000
+
+# Flags a bind inherits from its source and that a user namespace may not clear on remount
+LOCKED_FLAGS = (
+    (os.ST_NOSUID, MS_NOSUID),
+    (os.ST_NODEV, MS_NODEV),
+    (os.ST_NOEXEC, MS_NOEXEC),
+    (os.ST_NOATIME, MS_NOATIME),
+    (os.ST_NODIRATIME, MS_NODIRATIME),
+    (os.ST_RELATIME, MS_RELATIME),
+)
+
+NOBODY = 65534
+RUNNER_PATH = "/sandbox/runner.py"
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def _check(result, what):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+
+def _mount(source, target, fstype, flags, data=None):
+    encode = lambda value: value.encode() if value is not None else None
+    _check(
+        _libc.mount(encode(source), encode(target), encode(fstype), ctypes.c_ulong(flags), encode(data)),
+        f"mount {target}",
+    )
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def enter_namespaces():
+    uid, gid = os.getuid(), os.getgid()
+    _check(
+        _libc.unshare(
+            CLONE_NEWUSER | CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS
+        ),
+        "unshare",
+    )
+    _write("/proc/self/setgroups", "deny")
+    _write("/proc/self/uid_map", f"{NOBODY} {uid} 1")
+    _write("/proc/self/gid_map", f"{NOBODY} {gid} 1")
+
+
+def build_root(root, binds):
+    """A tmpfs root with read-only binds of `binds` and an empty /tmp; chroot into it."""
+    _mount(None, "/", None, MS_REC | MS_PRIVATE)
+    _mount("tmpfs", root, "tmpfs", MS_NOSUID | MS_NODEV, "size=16m,mode=755")
+
+    for source, target in binds:
+        target = root + target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.islink(source):
+            os.symlink(os.readlink(source), target)
+            continue
+        if os.path.isdir(source):
+            os.makedirs(target, exist_ok=True)
+        else:
+            open(target, "w").close()
+        _mount(source, target, None, MS_BIND | MS_REC)
+        flags = os.statvfs(source).f_flag
+        locked = sum(ms for st, ms in LOCKED_FLAGS if flags & st)
+        _mount(None, target, None, MS_REMOUNT | MS_BIND | MS_RDONLY | locked)
+
+    os.makedirs(root + "/tmp")
+    os.chroot(root)
+    os.chdir("/tmp")
+
+
+def _exit_like(status):
+    """Exit the way the worker did, so the pool can tell a CPU-limit kill from a crash."""
+    if os.WIFSIGNALED(status):
+        sig = os.WTERMSIG(status)
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if sig != signal.SIGKILL:
+            signal.signal(sig, signal.SIG_DFL)
+        os.kill(os.getpid(), sig)
+    os._exit(os.waitstatus_to_exitcode(status))
+
+
+def main():
+    root, config = sys.argv[1], json.loads(sys.argv[2])
+    enter_namespaces()
+    build_root(root, config["binds"])
+
+    # The child is PID 1 of the new namespace; exec as nobody leaves it no capabilities
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execv(config["python"], [config["python"], "-I", "-S", RUNNER_PATH, *config["argv"]])
+        finally:
+            os._exit(127)
+    _, status = os.waitpid(pid, 0)
+    _exit_like(status)
+
+
+if __name__ == "__main__":
+    main()
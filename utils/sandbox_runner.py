@@ -0,0 +1,80 @@
+"""Runs inside a sandbox worker process; standard library only.
+
+Started by sandbox_jail.py, already inside the worker's namespaces and
+chroot, as `python -I -S /sandbox/runner.py CPU_SECONDS MEMORY_BYTES FILE_BYTES`.
+The limits are applied before anything is read, then the process waits on
+stdin for one job ({"code", "entry_point", "inputs"}), writes the outputs as
+JSON to stdout and exits. Every job gets a fresh process. Outputs are
+compared with the expected values by the parent, so submitted code cannot
+forge a passing verdict. Errors are reported by exception type only: the
+message (and a custom class's name) are whatever the submission chose.
+"""
+import io
+import json
+import os
+import resource
+import sys
+
+def apply_limits(cpu_seconds, memory_bytes, file_bytes):
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    # No child processes from submitted code
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def _error(exc):
+    builtin = next(kind for kind in type(exc).__mro__ if kind.__module__ == "builtins")
+    if isinstance(exc, SyntaxError) and isinstance(exc.lineno, int):
+        return f"{builtin.__name__} at line {exc.lineno}"
+    return builtin.__name__
+
+
+def _plain(value):
+    # Tuples become lists and so on, so outputs compare like the JSON test data
+    return json.loads(json.dumps(value))
+
+
+def run(code, entry_point, inputs):
+    """Call `entry_point` once per argument list; expected outputs never reach this process."""
+    namespace = {"__name__": "__submission__"}
+    try:
+        exec(compile(code, "<submission>", "exec"), namespace)
+    except MemoryError:
+        return {"status": "memory_limit"}
+    except BaseException as exc:
+        return {"status": "compile_error", "error": _error(exc)}
+
+    function = namespace.get(entry_point)
+    if not callable(function):
+        return {"status": "missing_entry_point"}
+
+    outputs = []
+    for args in inputs:
+        try:
+            outputs.append({"value": _plain(function(*args))})
+        except MemoryError:
+            return {"status": "memory_limit"}
+        except BaseException as exc:
+            outputs.append({"error": _error(exc)})
+    return {"status": "ok", "outputs": outputs}
+
+
+def main():
+    cpu_seconds, memory_bytes, file_bytes = (int(value) for value in sys.argv[1:4])
+    apply_limits(cpu_seconds, memory_bytes, file_bytes)
+
+    job = json.loads(sys.stdin.read())
+    # Anything the submission prints stays out of the report channel
+    report_channel = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout = sys.stderr = io.StringIO()
+    os.close(1)
+
+    report = run(job["code"], job["entry_point"], job["inputs"])
+    report_channel.write(json.dumps(report))
+    report_channel.flush()
+
+
+if __name__ == "__main__":
+    main()
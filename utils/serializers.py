@@ -0,0 +1,144 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import make_response
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import types
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy_serializer import SerializerMixin
+
+import models
+
+MAX_DEPTH = 4
+
+
+class UnsupportedRules(Exception):
+    pass
+
+
+def _negative_rules(model):
+    """Split serialize_rules into excluded paths, rejecting what we cannot precompile."""
+    if model.serialize_only or model.serializable_keys or model.auto_serialize_properties:
+        raise UnsupportedRules(model.__name__)
+    excluded = set()
+    for rule in model.serialize_rules:
+        if not rule.startswith("-"):
+            raise UnsupportedRules(f"{model.__name__}: {rule}")
+        excluded.add(rule[1:])
+    return excluded
+
+
+def _column_converter(model, column_type):
+    if isinstance(column_type, types.DateTime):
+        fmt = model.datetime_format
+        return lambda v: v.strftime(fmt) if v is not None else None
+    if isinstance(column_type, types.Date):
+        fmt = model.date_format
+        return lambda v: v.strftime(fmt) if v is not None else None
+    if isinstance(column_type, types.Time):
+        fmt = model.time_format
+        return lambda v: v.strftime(fmt) if v is not None else None
+    if isinstance(column_type, types.Numeric) and column_type.asdecimal:
+        fmt = model.decimal_format
+        return lambda v: fmt.format(v) if v is not None else None
+    return None
+
+
+def compile_serializer(model, excluded=frozenset(), depth=0):
+    """Build a flat extractor equivalent to model.to_dict() for `model`.
+
+    Columns become direct attribute reads with a type converter chosen once;
+    relationships that the rules keep are compiled recursively.
+    """
+    if depth > MAX_DEPTH:
+        raise UnsupportedRules(f"{model.__name__}: nesting too deep")
+
+    excluded = set(excluded) | _negative_rules(model)
+    mapper = sa_inspect(model)
+
+    columns = []
+    for attr in mapper.column_attrs:
+        if attr.key in excluded:
+            continue
+        columns.append((attr.key, _column_converter(model, attr.columns[0].type)))
+
+    relations = []
+    for rel in mapper.relationships:
+        if rel.key in excluded:
+            continue
+        target = rel.mapper.class_
+        prefix = rel.key + "."
+        nested = {path[len(prefix):] for path in excluded if path.startswith(prefix)}
+        if issubclass(target, SerializerMixin):
+            relations.append((rel.key, rel.uselist, compile_serializer(target, nested, depth + 1)))
+        elif rel.uselist:
+            # SerializerMixin silently drops members it cannot serialize
+            relations.append((rel.key, True, None))
+        else:
+            raise UnsupportedRules(f"{model.__name__}.{rel.key}")
+
+    plain = tuple(key for key, convert in columns if convert is None)
+    converted = tuple((key, convert) for key, convert in columns if convert is not None)
+    relations = tuple(relations)
+
+    def serialize(obj):
+        data = {key: getattr(obj, key) for key in plain}
+        for key, convert in converted:
+            data[key] = convert(getattr(obj, key))
+        for key, uselist, nested_serializer in relations:
+            value = getattr(obj, key)
+            if uselist:
+                data[key] = [nested_serializer(v) for v in value] if nested_serializer else []
+            else:
+                data[key] = nested_serializer(value) if value is not None else None
+        return data
+
+    return serialize
+
+
+def _build_registry():
+    configure_mappers()
+    registry = {}
+    for mapper in models.db.Model.registry.mappers:
+        model = mapper.class_
+        if not issubclass(model, SerializerMixin):
+            continue
+        try:
+            registry[model] = compile_serializer(model)
+        except UnsupportedRules:
+            registry[model] = model.to_dict
+    return registry
+
+
+SERIALIZERS = _build_registry()
+
+
+def serialize(obj):
+    serializer = SERIALIZERS.get(type(obj))
+    return serializer(obj) if serializer else obj.to_dict()
+
+
+def serialize_many(objects):
+    return [serialize(obj) for obj in objects]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+def output_json(data, code, headers=None):
+    """flask_restful representation using the compact C-accelerated JSON encoder."""
+    response = make_response(_encoder.encode(data) + "\n", code)
+    response.headers["Content-Type"] = "application/json"
+    response.headers.extend(headers or {})
+    return response